@@ -0,0 +1,29 @@
+"""Add the availability columns to menu_items.
+
+Run once after deploying item availability:
+
+    python -m app.commands.add_menu_availability
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.database import engine
+
+AVAILABILITY_COLUMNS = (
+    "is_available BOOLEAN NOT NULL DEFAULT TRUE",
+    "sold_out_until TIMESTAMP WITH TIME ZONE",
+    "daily_quantity_cap INTEGER",
+    "daily_quantity_remaining INTEGER",
+    "quantity_business_date DATE",
+)
+
+
+async def migrate():
+    async with engine.begin() as conn:
+        for column in AVAILABILITY_COLUMNS:
+            await conn.execute(text(f"ALTER TABLE menu_items ADD COLUMN IF NOT EXISTS {column}"))
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
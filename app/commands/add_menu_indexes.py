@@ -0,0 +1,22 @@
+"""Create the per-restaurant menu and category indexes on an existing database.
+
+Run once after deploying the grouped menu query:
+
+    python -m app.commands.add_menu_indexes
+"""
+import asyncio
+
+from app.core.database import engine
+from app.models.item_category_model import ItemCategory
+from app.models.menu_model import Menu
+
+
+async def migrate():
+    async with engine.begin() as conn:
+        for table in (ItemCategory.__table__, Menu.__table__):
+            for index in table.indexes:
+                await conn.run_sync(lambda sync_conn, idx=index: idx.create(sync_conn, checkfirst=True))
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
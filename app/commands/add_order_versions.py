@@ -0,0 +1,34 @@
+"""Add Order.version and the order list indexes to an existing database.
+
+Run once after deploying optimistic order versioning:
+
+    python -m app.commands.add_order_versions
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.models.order_model import Order, OrderItem, OrderPayment
+
+ORDER_INDEXES = (
+    "ix_orders_restaurant_created_id",
+    "ix_orders_status_created",
+    "ix_order_items_order",
+    "ix_order_payments_order",
+)
+
+
+async def migrate():
+    async with engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE orders ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1"))
+
+    async with engine.begin() as conn:
+        for table in (Order.__table__, OrderItem.__table__, OrderPayment.__table__):
+            for index in table.indexes:
+                if index.name in ORDER_INDEXES:
+                    await conn.run_sync(lambda sync_conn, idx=index: idx.create(sync_conn, checkfirst=True))
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,23 @@
+"""Move closed orders older than ORDER_ARCHIVE_AFTER_DAYS into the archive tables.
+
+Safe to run alongside the background archiver; locked rows are skipped:
+
+    python -m app.commands.archive_orders
+"""
+import asyncio
+
+from app.core.database import engine, AsyncSessionLocal, Base
+from app.models import order_archive_model  # noqa: F401  registers the archive tables
+from app.services.order_archive_service import OrderArchiveService
+
+
+async def archive():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        moved = await OrderArchiveService(session).archive_closed_orders()
+    print(f"Archived {moved} orders")
+
+
+if __name__ == "__main__":
+    asyncio.run(archive())
@@ -0,0 +1,37 @@
+"""Add Menu.image_variants and render variants for existing local menu images.
+
+Run once after deploying image variants:
+
+    python -m app.commands.backfill_menu_image_variants
+"""
+import asyncio
+
+from sqlalchemy import select, text
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.menu_model import Menu
+from app.services.menu_service import derive_image_variants
+from app.utils.image_variants import shutdown_variant_pool
+
+
+async def backfill():
+    async with engine.begin() as conn:
+        await conn.execute(text("ALTER TABLE menu_items ADD COLUMN IF NOT EXISTS image_variants JSON"))
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Menu.id, Menu.restaurant_id, Menu.image)
+            .where(Menu.image.is_not(None), Menu.image_variants.is_(None), Menu.image.not_like("http%"))
+            .order_by(Menu.id)
+        )
+        rows = result.all()
+
+    try:
+        for menu_id, restaurant_id, image in rows:
+            await derive_image_variants(menu_id, restaurant_id, image)
+    finally:
+        shutdown_variant_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
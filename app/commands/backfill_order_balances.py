@@ -0,0 +1,55 @@
+"""Add and backfill Order.paid_total / Order.balance_due from existing payments.
+
+Run once after deploying payment tracking:
+
+    python -m app.commands.backfill_order_balances
+"""
+import asyncio
+
+from sqlalchemy import func, select, text, update
+
+from app.core.database import engine
+from app.models.order_model import Order, OrderPayment, PaymentStatus
+from app.models.order_archive_model import orders_archive, order_payments_archive
+
+BATCH_SIZE = 5000
+
+
+async def _backfill_table(orders, payments, batch_size: int):
+    async with engine.begin() as conn:
+        max_id = (await conn.execute(select(func.max(orders.c.id)))).scalar() or 0
+
+    paid = (
+        select(func.coalesce(func.sum(payments.c.amount), 0))
+        .where(payments.c.order_id == orders.c.id, payments.c.status == PaymentStatus.success)
+        .scalar_subquery()
+    )
+    last_id = 0
+    while last_id < max_id:
+        # Short transactions per id range, as with the search backfill
+        async with engine.begin() as conn:
+            await conn.execute(
+                update(orders)
+                .where(orders.c.id > last_id, orders.c.id <= last_id + batch_size)
+                .values(paid_total=paid, balance_due=orders.c.grand_total - paid)
+            )
+        last_id += batch_size
+
+
+async def backfill(batch_size: int = BATCH_SIZE):
+    async with engine.begin() as conn:
+        for table in ("orders", "orders_archive"):
+            await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS paid_total NUMERIC(12, 2) NOT NULL DEFAULT 0"))
+            await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS balance_due NUMERIC(12, 2) NOT NULL DEFAULT 0"))
+
+    await _backfill_table(Order.__table__, OrderPayment.__table__, batch_size)
+    await _backfill_table(orders_archive, order_payments_archive, batch_size)
+
+    async with engine.begin() as conn:
+        for index in Order.__table__.indexes:
+            if index.name == "ix_orders_restaurant_unpaid":
+                await conn.run_sync(lambda sync_conn, idx=index: idx.create(sync_conn, checkfirst=True))
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
@@ -0,0 +1,52 @@
+"""Add and backfill the normalized customer search columns on existing orders.
+
+Run once after deploying indexed order search:
+
+    python -m app.commands.backfill_order_search
+"""
+import asyncio
+
+from sqlalchemy import func, select, text, update
+
+from app.core.database import engine
+from app.models.order_model import Order
+
+BATCH_SIZE = 5000
+
+SEARCH_INDEXES = (
+    "ix_orders_restaurant_phone_digits",
+    "ix_orders_customer_name_trgm",
+    "ix_orders_customer_phone_trgm",
+)
+
+
+async def backfill(batch_size: int = BATCH_SIZE):
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text("ALTER TABLE orders ADD COLUMN IF NOT EXISTS customer_name_norm VARCHAR"))
+        await conn.execute(text("ALTER TABLE orders ADD COLUMN IF NOT EXISTS customer_phone_digits VARCHAR"))
+        max_id = (await conn.execute(select(func.max(Order.id)))).scalar() or 0
+
+    # Same normalization as app.utils.search, done in SQL so rows never leave the database
+    name_norm = func.nullif(func.regexp_replace(func.lower(func.trim(Order.customer_name)), r"\s+", " ", "g"), "")
+    digits = func.nullif(func.regexp_replace(Order.customer_phone, r"\D", "", "g"), "")
+
+    last_id = 0
+    while last_id < max_id:
+        # One short transaction per id range keeps row locks brief on a live table
+        async with engine.begin() as conn:
+            await conn.execute(
+                update(Order)
+                .where(Order.id > last_id, Order.id <= last_id + batch_size)
+                .values(customer_name_norm=name_norm, customer_phone_digits=digits)
+            )
+        last_id += batch_size
+
+    async with engine.begin() as conn:
+        for index in Order.__table__.indexes:
+            if index.name in SEARCH_INDEXES:
+                await conn.run_sync(lambda sync_conn, idx=index: idx.create(sync_conn, checkfirst=True))
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
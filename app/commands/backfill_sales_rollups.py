@@ -0,0 +1,118 @@
+"""Rebuild the daily sales rollups from live and archived orders.
+
+Run once after deploying sales reporting, or to repair the rollups:
+
+    python -m app.commands.backfill_sales_rollups [restaurant_id]
+
+Live and archived rows are read in a single statement so the archiver
+moving orders mid-run cannot double count or drop them.
+"""
+import asyncio
+import sys
+from typing import Optional
+
+from sqlalchemy import Date, case, cast, delete, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import engine, Base
+from app.models.order_model import Order, OrderItem, OrderStatus
+from app.models.order_archive_model import orders_archive, order_items_archive
+from app.models.sales_rollup_model import SalesDailyTotal, SalesDailyItem, UNCATEGORIZED
+from app.repositories.report_repository import ORDER_MONEY_COLUMNS
+
+CLOSED_STATUSES = (OrderStatus.completed, OrderStatus.canceled)
+
+
+def _closed_orders(orders, restaurant_id: Optional[int]):
+    query = select(
+        orders.c.id,
+        orders.c.restaurant_id,
+        orders.c.channel,
+        orders.c.status,
+        cast(func.timezone("UTC", orders.c.created_at), Date).label("business_date"),
+        *(orders.c[name] for name in ORDER_MONEY_COLUMNS),
+    ).where(orders.c.status.in_(CLOSED_STATUSES))
+    if restaurant_id is not None:
+        query = query.where(orders.c.restaurant_id == restaurant_id)
+    return query
+
+
+def _completed_lines(orders, items, restaurant_id: Optional[int]):
+    query = (
+        select(
+            orders.c.restaurant_id,
+            orders.c.channel,
+            cast(func.timezone("UTC", orders.c.created_at), Date).label("business_date"),
+            func.coalesce(items.c.category_name_snapshot, UNCATEGORIZED).label("category_name"),
+            func.coalesce(items.c.menu_item_id, 0).label("menu_item_id"),
+            items.c.name_snapshot,
+            items.c.qty,
+            items.c.line_total,
+        )
+        .join(orders, orders.c.id == items.c.order_id)
+        .where(orders.c.status == OrderStatus.completed)
+    )
+    if restaurant_id is not None:
+        query = query.where(orders.c.restaurant_id == restaurant_id)
+    return query
+
+
+async def backfill(restaurant_id: Optional[int] = None):
+    totals_table = SalesDailyTotal.__table__
+    items_table = SalesDailyItem.__table__
+
+    closed = union_all(
+        _closed_orders(Order.__table__, restaurant_id),
+        _closed_orders(orders_archive, restaurant_id),
+    ).subquery()
+    is_completed = closed.c.status == OrderStatus.completed
+    totals_select = (
+        select(
+            closed.c.restaurant_id,
+            closed.c.business_date,
+            closed.c.channel,
+            func.count().filter(is_completed).label("completed_orders"),
+            func.count().filter(closed.c.status == OrderStatus.canceled).label("canceled_orders"),
+            *(func.sum(case((is_completed, closed.c[name]), else_=literal(0))).label(name) for name in ORDER_MONEY_COLUMNS),
+        )
+        .group_by(closed.c.restaurant_id, closed.c.business_date, closed.c.channel)
+    )
+
+    lines = union_all(
+        _completed_lines(Order.__table__, OrderItem.__table__, restaurant_id),
+        _completed_lines(orders_archive, order_items_archive, restaurant_id),
+    ).subquery()
+    line_key = (lines.c.restaurant_id, lines.c.business_date, lines.c.channel, lines.c.category_name, lines.c.menu_item_id)
+    items_select = (
+        select(
+            *line_key,
+            func.max(lines.c.name_snapshot).label("item_name"),
+            func.sum(lines.c.qty).label("qty"),
+            func.sum(lines.c.line_total).label("sales"),
+        )
+        .group_by(*line_key)
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=[totals_table, items_table]))
+        clear_totals = delete(totals_table)
+        clear_items = delete(items_table)
+        if restaurant_id is not None:
+            clear_totals = clear_totals.where(totals_table.c.restaurant_id == restaurant_id)
+            clear_items = clear_items.where(items_table.c.restaurant_id == restaurant_id)
+        await conn.execute(clear_totals)
+        await conn.execute(clear_items)
+
+        # Rows are rebuilt from scratch inside this transaction, so plain inserts suffice
+        await conn.execute(insert(totals_table).from_select(
+            ["restaurant_id", "business_date", "channel", "completed_orders", "canceled_orders", *ORDER_MONEY_COLUMNS],
+            totals_select,
+        ))
+        await conn.execute(insert(items_table).from_select(
+            ["restaurant_id", "business_date", "channel", "category_name", "menu_item_id", "item_name", "qty", "sales"],
+            items_select,
+        ))
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,86 @@
+"""Rename existing local menu images (and their variants) to content-hash names.
+
+Duplicates collapse into one file and every item pointing at them is
+updated. Run once after deploying content-addressed image storage:
+
+    python -m app.commands.rehash_menu_images
+"""
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+
+from sqlalchemy import select, update
+
+from app.core.database import AsyncSessionLocal
+from app.models.menu_model import Menu
+from app.utils.image_storage import BASE_DIR
+from app.utils.image_upload import SNIFF_BYTES, sniff_image_type
+from app.utils.image_variants import variant_paths
+from app.utils.static_files import CONTENT_ADDRESSED_NAME
+
+CHUNK_BYTES = 1024 * 1024
+
+
+def _hash_file(path: Path) -> tuple[str, bytes]:
+    hasher = hashlib.sha256()
+    head = b""
+    with open(path, "rb") as handle:
+        while chunk := handle.read(CHUNK_BYTES):
+            if not head:
+                head = chunk[:SNIFF_BYTES]
+            hasher.update(chunk)
+    return hasher.hexdigest(), head
+
+
+def _link(source: Path, destination: Path) -> bool:
+    if not source.exists():
+        return False
+    if not destination.exists():
+        os.link(source, destination)
+    return True
+
+
+def _unlink(path: Path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def rehash():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Menu.image).where(Menu.image.is_not(None), Menu.image.not_like("http%")).distinct()
+        )
+        images = result.scalars().all()
+
+    for image in images:
+        source = BASE_DIR / image
+        if CONTENT_ADDRESSED_NAME.match(Path(image).stem) or not source.exists():
+            continue
+        digest, head = _hash_file(source)
+        detected = sniff_image_type(head)
+        extension = detected[1] if detected else Path(image).suffix.lower()
+        new_image = str(Path(image).with_name(f"{digest}{extension}"))
+
+        # Link the new names first so rows never point at a missing file, then switch rows, then drop the old names
+        _link(source, BASE_DIR / new_image)
+        old_variants, new_variants = variant_paths(image), variant_paths(new_image)
+        variants_moved = all(
+            [_link(BASE_DIR / old_variants[name], BASE_DIR / new_variants[name]) for name in old_variants]
+        )
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Menu)
+                .where(Menu.image == image)
+                .values(image=new_image, image_variants=new_variants if variants_moved else None)
+            )
+            await session.commit()
+        _unlink(source)
+        for path in old_variants.values():
+            _unlink(BASE_DIR / path)
+
+
+if __name__ == "__main__":
+    asyncio.run(rehash())
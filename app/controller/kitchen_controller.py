@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.services.kitchen_service import KitchenService
+from app.schema.kitchen_schema import (
+    KitchenStationCreate,
+    KitchenStationCategoriesUpdate,
+    KitchenStationRead,
+    KitchenQueueRead,
+    KitchenTicketRead,
+    KitchenTicketStatusUpdate,
+)
+from app.schema.base_response import BaseResponse
+from app.utils.role_checker import RoleChecker
+
+router = APIRouter(prefix="/kitchen", tags=["Kitchen"])
+
+
+@router.post(
+    "/stations/{restaurant_id}",
+    response_model=BaseResponse[KitchenStationRead],
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RoleChecker(["admin"]))],
+)
+async def create_station(restaurant_id: int, data: KitchenStationCreate, db: AsyncSession = Depends(get_db)):
+    service = KitchenService(db)
+    station = await service.create_station(restaurant_id, data)
+    return BaseResponse(status="success", message="Kitchen station created", data=station)
+
+
+@router.get(
+    "/stations/{restaurant_id}",
+    response_model=BaseResponse[list[KitchenStationRead]],
+    dependencies=[Depends(RoleChecker(["admin", "staff"]))],
+)
+async def get_stations(restaurant_id: int, db: AsyncSession = Depends(get_db)):
+    service = KitchenService(db)
+    stations = await service.get_stations(restaurant_id)
+    return BaseResponse(status="success", message="Kitchen stations fetched", data=stations)
+
+
+@router.put(
+    "/stations/{station_id}/categories",
+    response_model=BaseResponse[KitchenStationRead],
+    dependencies=[Depends(RoleChecker(["admin"]))],
+)
+async def update_station_categories(station_id: int, data: KitchenStationCategoriesUpdate, db: AsyncSession = Depends(get_db)):
+    service = KitchenService(db)
+    station = await service.update_station_categories(station_id, data)
+    return BaseResponse(status="success", message="Station categories updated", data=station)
+
+
+@router.get(
+    "/stations/{station_id}/queue",
+    response_model=BaseResponse[KitchenQueueRead],
+    dependencies=[Depends(RoleChecker(["admin", "staff"]))],
+)
+async def get_station_queue(station_id: int, limit: int = Query(50, ge=1, le=500), db: AsyncSession = Depends(get_db)):
+    service = KitchenService(db)
+    queue = await service.get_station_queue(station_id, limit)
+    return BaseResponse(status="success", message="Station queue fetched", data=queue)
+
+
+@router.patch(
+    "/tickets/{ticket_id}/status",
+    response_model=BaseResponse[KitchenTicketRead],
+    dependencies=[Depends(RoleChecker(["admin", "staff"]))],
+)
+async def update_ticket_status(ticket_id: int, data: KitchenTicketStatusUpdate, db: AsyncSession = Depends(get_db)):
+    service = KitchenService(db)
+    ticket = await service.update_ticket_status(ticket_id, data.status)
+    return BaseResponse(status="success", message="Ticket updated", data=ticket)
@@ -1,15 +1,45 @@
-from fastapi import APIRouter, Depends, status, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, status, UploadFile, File, Form, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.services.menu_service import MenuService
-from app.schema.menu_schema import MenuRead, MenuUpdate, MenuCategoryGroup, MenuCreate
+from app.schema.menu_schema import (
+    MenuAvailabilityRead,
+    MenuAvailabilityUpdate,
+    MenuRead,
+    MenuUpdate,
+    MenuCategoryGroup,
+    MenuCreate,
+    MenuImportModeEnum,
+    MenuImportResultRead,
+    MenuSearchHitRead,
+    MenuTransferFormatEnum,
+)
 from app.schema.base_response import BaseResponse
 from app.utils.role_checker import RoleChecker
+from app.utils.etag import etag_matches
+from app.utils.menu_cache import MenuCacheEntry, pick_encoding
 
 
 router = APIRouter(prefix="/menus", tags=["Menu"])
 
+TRANSFER_MEDIA_TYPES = {
+    MenuTransferFormatEnum.csv: "text/csv",
+    MenuTransferFormatEnum.json: "application/json",
+}
+
+
+def _cached_menu_response(request: Request, entry: MenuCacheEntry) -> Response:
+    # Public and identical for every caller; clients and CDNs revalidate with the ETag
+    headers = {"ETag": entry.etag, "Cache-Control": "public, no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body, encoding = pick_encoding(entry, request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.post(
     "/{restaurant_id}",
@@ -32,6 +62,59 @@ async def create_menu(
     return BaseResponse(status="success", message="Menu item created successfully", data=menu)
 
 
+@router.post(
+    "/{restaurant_id}/import",
+    response_model=BaseResponse[MenuImportResultRead],
+    dependencies=[Depends(RoleChecker(["admin", "staff"]))],
+)
+async def import_menu(
+    restaurant_id: int,
+    file: UploadFile = File(...),
+    format: MenuTransferFormatEnum | None = Query(None, description="Defaults to the file's extension or content type"),
+    mode: MenuImportModeEnum = Query(MenuImportModeEnum.create),
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+):
+    service = MenuService(db)
+    result = await service.import_menu(restaurant_id, file, format, mode, dry_run)
+    message = "Menu import validated" if dry_run else "Menu imported successfully"
+    return BaseResponse(status="success", message=message, data=result)
+
+
+@router.get(
+    "/restaurant/{restaurant_id}/search",
+    response_model=BaseResponse[list[MenuSearchHitRead]],
+)
+async def search_menu(
+    restaurant_id: int,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    service = MenuService(db)
+    hits = await service.search_menu(restaurant_id, q, limit)
+    return BaseResponse(status="success", message=f"{len(hits)} menu items matched", data=hits)
+
+
+@router.get(
+    "/restaurant/{restaurant_id}/export",
+    dependencies=[Depends(RoleChecker(["admin", "staff"]))],
+)
+async def export_menu(
+    restaurant_id: int,
+    format: MenuTransferFormatEnum = Query(MenuTransferFormatEnum.csv),
+    db: AsyncSession = Depends(get_db),
+):
+    service = MenuService(db)
+    body = await service.export_menu(restaurant_id, format)
+    filename = f"menu-{restaurant_id}.{format.value}"
+    return StreamingResponse(
+        body,
+        media_type=TRANSFER_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.put(
     "/{menu_id}",
     response_model=BaseResponse[MenuRead],
@@ -52,6 +135,17 @@ async def update_menu(
     return BaseResponse(status="success", message="Menu item updated successfully", data=menu)
 
 
+@router.patch(
+    "/{menu_id}/availability",
+    response_model=BaseResponse[MenuAvailabilityRead],
+    dependencies=[Depends(RoleChecker(["admin", "staff"]))],
+)
+async def update_menu_availability(menu_id: int, payload: MenuAvailabilityUpdate, db: AsyncSession = Depends(get_db)):
+    service = MenuService(db)
+    availability = await service.update_availability(menu_id, payload)
+    return BaseResponse(status="success", message="Menu item availability updated", data=availability)
+
+
 @router.delete(
     "/{menu_id}",
     response_model=BaseResponse[None],
@@ -75,21 +169,27 @@ async def get_menu(menu_id: int, db: AsyncSession = Depends(get_db)):
     response_model=BaseResponse[list[MenuRead]],
 )
 async def get_menus_by_restaurant(
+    request: Request,
     restaurant_id: int,
     item_category_id: int | None = Query(None),
     db: AsyncSession = Depends(get_db),
 ):
     service = MenuService(db)
-    menus = await service.get_menus_by_restaurant(restaurant_id, item_category_id)
-    return BaseResponse(status="success", message=f"{len(menus)} menu items fetched", data=menus)
+    entry = await service.get_public_menu(restaurant_id, item_category_id)
+    return _cached_menu_response(request, entry)
 
 
 @router.get(
     "/restaurant/{restaurant_id}/grouped",
     response_model=BaseResponse[list[MenuCategoryGroup]],
 )
-async def get_grouped_menus(restaurant_id: int, db: AsyncSession = Depends(get_db)):
+async def get_grouped_menus(
+    request: Request,
+    restaurant_id: int,
+    with_counts: bool = Query(False, description="Include item_count for each category"),
+    db: AsyncSession = Depends(get_db),
+):
     service = MenuService(db)
-    groups = await service.get_menus_grouped_by_category(restaurant_id)
-    return BaseResponse(status="success", message="Menu items grouped by category fetched successfully", data=groups)
+    entry = await service.get_public_grouped_menu(restaurant_id, with_counts)
+    return _cached_menu_response(request, entry)
 
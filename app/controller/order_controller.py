@@ -1,14 +1,24 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, status
+from datetime import datetime
+from typing import List, Optional, Union
+from fastapi import APIRouter, Body, Depends, Header, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.services.order_service import OrderService
+from app.services.order_archive_service import OrderArchiveService
 from app.schema.order_schema import (
     OrderCreate,
+    OrderBulkCreateRead,
     OrderRead,
     OrderListRead,
+    OrderSummaryListRead,
+    OrderSummaryRead,
+    OrderViewEnum,
     OrderStatusEnum,
+    OrderCountModeEnum,
+    OrderExportFormatEnum,
     OrderUpdate,
     OrderStatusUpdate,
     OrderAddItems,
@@ -19,12 +29,19 @@ from app.schema.order_schema import (
     OrderBulkUpdateItems,
     OrderAddPayment,
     OrderCancel,
+    OrderPaymentStatusUpdate,
+    OrderSettle,
+    GroupBillRead,
+    OrderGroupPay,
+    OrderGroupPayRead,
     OrderEventRead,
     OrderPaymentRead,
 )
 from app.schema.base_response import BaseResponse
 from app.utils.oauth2 import get_current_user
 from app.utils.role_checker import RoleChecker
+from app.utils.order_feed import ORDER_FEED, stream_feed
+from app.utils.etag import parse_if_match
 
 
 router = APIRouter(prefix="/orders", tags=["Orders"], dependencies=[Depends(RoleChecker(["admin", "staff"]))])
@@ -41,14 +58,118 @@ async def create_order(payload: OrderCreate, db: AsyncSession = Depends(get_db),
     return BaseResponse(status="success", message="Order created", data=order)
 
 
+@router.post("/bulk", response_model=BaseResponse[OrderBulkCreateRead], status_code=status.HTTP_201_CREATED)
+async def bulk_create_orders(
+    payload: List[OrderCreate] = Body(..., min_length=1, max_length=200),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    service = OrderService(db)
+    result = await service.bulk_create_orders(payload, _actor(current_user))
+    return BaseResponse(status="success", message=f"{result['created']} orders created, {result['failed']} failed", data=result)
+
+
+@router.get("/search", response_model=BaseResponse[List[OrderSummaryRead]])
+async def search_orders(
+    restaurant_id: int,
+    q: str = Query(..., min_length=2),
+    days: Optional[int] = Query(None, gt=0, le=365),
+    limit: int = Query(20, gt=0, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    service = OrderService(db)
+    orders = await service.search_orders(restaurant_id, q, days, limit)
+    return BaseResponse(status="success", message=f"{len(orders)} orders found", data=orders)
+
+
+@router.get("/feed")
+async def order_feed(
+    request: Request,
+    restaurant_id: int,
+    last_event_id: Optional[int] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    db: AsyncSession = Depends(get_db),
+):
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    service = OrderService(db)
+    subscription, backlog, truncated = await service.open_feed(restaurant_id, last_event_id)
+    return StreamingResponse(
+        stream_feed(
+            ORDER_FEED, subscription, backlog, request.is_disconnected, settings.ORDER_FEED_HEARTBEAT_SECONDS, truncated
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+EXPORT_MEDIA_TYPES = {
+    OrderExportFormatEnum.csv: "text/csv",
+    OrderExportFormatEnum.ndjson: "application/x-ndjson",
+}
+
+
+@router.get("/export", dependencies=[Depends(RoleChecker(["admin"]))])
+async def export_orders(
+    restaurant_id: int,
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    channel: Optional[str] = Query(None),
+    format: OrderExportFormatEnum = Query(OrderExportFormatEnum.csv),
+    db: AsyncSession = Depends(get_db),
+):
+    service = OrderService(db)
+    body = await service.export_orders(restaurant_id, date_from, date_to, channel, format)
+    filename = f"orders-{restaurant_id}.{format.value}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/history", response_model=BaseResponse[OrderSummaryListRead])
+async def order_history(
+    restaurant_id: int,
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    status: Optional[List[OrderStatusEnum]] = Query(None),
+    channel: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    service = OrderArchiveService(db)
+    page = await service.get_history(restaurant_id, date_from, date_to, status, channel, limit, cursor)
+    return BaseResponse(status="success", message="Order history fetched", data=page)
+
+
+@router.get("/groups/{group_id}/bill", response_model=BaseResponse[GroupBillRead])
+async def get_group_bill(group_id: int, restaurant_id: int, db: AsyncSession = Depends(get_db)):
+    service = OrderService(db)
+    bill = await service.get_group_bill(restaurant_id, group_id)
+    return BaseResponse(status="success", message="Group bill fetched", data=bill)
+
+
+@router.post("/groups/{group_id}/pay", response_model=BaseResponse[OrderGroupPayRead])
+async def pay_group(group_id: int, payload: OrderGroupPay, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    service = OrderService(db)
+    result = await service.pay_group(group_id, payload, _actor(current_user))
+    return BaseResponse(status="success", message="Group payment recorded", data=result)
+
+
 @router.get("/{order_id}", response_model=BaseResponse[OrderRead])
-async def get_order(order_id: int, db: AsyncSession = Depends(get_db)):
+async def get_order(order_id: int, db: AsyncSession = Depends(get_db), if_none_match: Optional[str] = Header(None, alias="If-None-Match")):
     service = OrderService(db)
-    order = await service.get_order(order_id)
-    return BaseResponse(status="success", message="Order fetched", data=order)
+    etag, data = await service.get_order_read(order_id, if_none_match)
+    # Clients may keep the body but must revalidate it before use
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if data is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(content={"status": "success", "message": "Order fetched", "data": data}, headers=headers)
 
 
-@router.get("/table/{table_id}", response_model=BaseResponse[OrderListRead])
+@router.get("/table/{table_id}", response_model=BaseResponse[Union[OrderListRead, OrderSummaryListRead]])
 async def get_orders_by_table(
     table_id: int,
     status: Optional[List[OrderStatusEnum]] = Query(None),
@@ -56,14 +177,18 @@ async def get_orders_by_table(
     search: Optional[str] = Query(None),
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = Query(None),
+    count: OrderCountModeEnum = Query(OrderCountModeEnum.exact),
+    view: OrderViewEnum = Query(OrderViewEnum.full),
+    unpaid_only: bool = Query(False),
     db: AsyncSession = Depends(get_db),
 ):
     service = OrderService(db)
-    orders, total = await service.get_orders_by_table(table_id, status, channel, search, skip, limit)
-    return BaseResponse(status="success", message="Orders fetched", data={"orders": orders, "total": total})
+    page = await service.get_orders_by_table(table_id, status, channel, search, skip, limit, cursor, count, view, unpaid_only)
+    return BaseResponse(status="success", message="Orders fetched", data=page)
 
 
-@router.get("/", response_model=BaseResponse[OrderListRead])
+@router.get("/", response_model=BaseResponse[Union[OrderListRead, OrderSummaryListRead]])
 async def list_orders(
     restaurant_id: int,
     status: Optional[List[OrderStatusEnum]] = Query(None),
@@ -72,59 +197,63 @@ async def list_orders(
     search: Optional[str] = Query(None),
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = Query(None),
+    count: OrderCountModeEnum = Query(OrderCountModeEnum.exact),
+    view: OrderViewEnum = Query(OrderViewEnum.full),
+    unpaid_only: bool = Query(False),
     db: AsyncSession = Depends(get_db),
 ):
     service = OrderService(db)
-    orders, total = await service.list_orders(restaurant_id, status, channel, table_id, search, skip, limit)
-    return BaseResponse(status="success", message="Orders fetched", data={"orders": orders, "total": total})
+    page = await service.list_orders(restaurant_id, status, channel, table_id, search, skip, limit, cursor, count, view, unpaid_only)
+    return BaseResponse(status="success", message="Orders fetched", data=page)
 
 
 @router.patch("/{order_id}/status", response_model=BaseResponse[OrderRead])
-async def update_status(order_id: int, payload: OrderStatusUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def update_status(order_id: int, payload: OrderStatusUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.update_status(order_id, payload.status, _actor(current_user))
+    order = await service.update_status(order_id, payload.status, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Status updated", data=order)
 
 
 @router.patch("/{order_id}", response_model=BaseResponse[OrderRead])
-async def update_order(order_id: int, payload: OrderUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def update_order(order_id: int, payload: OrderUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.update_order(order_id, payload, _actor(current_user))
+    order = await service.update_order(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Order updated", data=order)
 
 
 @router.post("/{order_id}/items", response_model=BaseResponse[OrderRead])
-async def add_items(order_id: int, payload: OrderAddItems, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def add_items(order_id: int, payload: OrderAddItems, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.add_items(order_id, payload, _actor(current_user))
+    order = await service.add_items(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Items updated", data=order)
 
 
 @router.post("/{order_id}/items/bulk-add", response_model=BaseResponse[OrderRead])
-async def bulk_add_items(order_id: int, payload: OrderBulkAddItems, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def bulk_add_items(order_id: int, payload: OrderBulkAddItems, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.bulk_add_items(order_id, payload, _actor(current_user))
+    order = await service.bulk_add_items(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Items updated", data=order)
 
 
 @router.post("/{order_id}/items/bulk-update", response_model=BaseResponse[OrderRead])
-async def bulk_update_items(order_id: int, payload: OrderBulkUpdateItems, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def bulk_update_items(order_id: int, payload: OrderBulkUpdateItems, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.bulk_update_items(order_id, payload, _actor(current_user))
+    order = await service.bulk_update_items(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Items updated", data=order)
 
 
 @router.post("/{order_id}/items/add", response_model=BaseResponse[OrderRead])
-async def add_item(order_id: int, payload: OrderAddSingleItem, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def add_item(order_id: int, payload: OrderAddSingleItem, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.add_item(order_id, payload, _actor(current_user))
+    order = await service.add_item(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Item added", data=order)
 
 
 @router.patch("/{order_id}/items/{item_id}", response_model=BaseResponse[OrderRead])
-async def update_item_quantity(order_id: int, item_id: int, payload: OrderItemQuantityUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def update_item_quantity(order_id: int, item_id: int, payload: OrderItemQuantityUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.update_item_quantity(order_id, item_id, payload, _actor(current_user))
+    order = await service.update_item_quantity(order_id, item_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Item quantity updated", data=order)
 
 
@@ -136,23 +265,37 @@ async def remove_item(order_id: int, item_id: int, db: AsyncSession = Depends(ge
 
 
 @router.put("/{order_id}/items/by-channel", response_model=BaseResponse[OrderRead])
-async def update_items_by_channel(order_id: int, payload: OrderItemsChannelUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def update_items_by_channel(order_id: int, payload: OrderItemsChannelUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.update_items_by_channel(order_id, payload, _actor(current_user))
+    order = await service.update_items_by_channel(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Items updated", data=order)
 
 
 @router.post("/{order_id}/payments", response_model=BaseResponse[OrderPaymentRead])
-async def add_payment(order_id: int, payload: OrderAddPayment, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def add_payment(order_id: int, payload: OrderAddPayment, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    payment = await service.add_payment(order_id, payload, _actor(current_user))
+    payment = await service.add_payment(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Payment added", data=payment)
 
 
+@router.patch("/{order_id}/payments/{payment_id}", response_model=BaseResponse[OrderPaymentRead])
+async def update_payment_status(order_id: int, payment_id: int, payload: OrderPaymentStatusUpdate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
+    service = OrderService(db)
+    payment = await service.update_payment_status(order_id, payment_id, payload.status, _actor(current_user), parse_if_match(if_match, order_id))
+    return BaseResponse(status="success", message="Payment updated", data=payment)
+
+
+@router.post("/{order_id}/settle", response_model=BaseResponse[OrderRead])
+async def settle_order(order_id: int, payload: OrderSettle, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
+    service = OrderService(db)
+    order = await service.settle_order(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
+    return BaseResponse(status="success", message="Order settled", data=order)
+
+
 @router.post("/{order_id}/cancel", response_model=BaseResponse[OrderRead])
-async def cancel_order(order_id: int, payload: OrderCancel, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def cancel_order(order_id: int, payload: OrderCancel, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user), if_match: Optional[str] = Header(None, alias="If-Match")):
     service = OrderService(db)
-    order = await service.cancel_order(order_id, payload, _actor(current_user))
+    order = await service.cancel_order(order_id, payload, _actor(current_user), parse_if_match(if_match, order_id))
     return BaseResponse(status="success", message="Order canceled", data=order)
 
 
@@ -0,0 +1,49 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.services.report_service import ReportService
+from app.schema.order_schema import OrderChannelEnum
+from app.schema.report_schema import SalesSummaryRead, SalesItemListRead, SalesItemGroupEnum
+from app.schema.base_response import BaseResponse
+from app.utils.role_checker import RoleChecker
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+
+@router.get(
+    "/sales",
+    response_model=BaseResponse[SalesSummaryRead],
+    dependencies=[Depends(RoleChecker(["admin", "superadmin"]))],
+)
+async def get_sales_summary(
+    restaurant_id: int,
+    date_from: date,
+    date_to: date,
+    channel: Optional[OrderChannelEnum] = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    service = ReportService(db)
+    report = await service.get_sales_summary(restaurant_id, date_from, date_to, channel)
+    return BaseResponse(status="success", message="Sales summary fetched", data=report)
+
+
+@router.get(
+    "/sales/items",
+    response_model=BaseResponse[SalesItemListRead],
+    dependencies=[Depends(RoleChecker(["admin", "superadmin"]))],
+)
+async def get_item_sales(
+    restaurant_id: int,
+    date_from: date,
+    date_to: date,
+    channel: Optional[OrderChannelEnum] = Query(None),
+    group_by: SalesItemGroupEnum = Query(SalesItemGroupEnum.item),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    service = ReportService(db)
+    report = await service.get_item_sales(restaurant_id, date_from, date_to, channel, group_by, limit)
+    return BaseResponse(status="success", message="Item sales fetched", data=report)
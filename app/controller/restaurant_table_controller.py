@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.schema.restaurant_table_schema import RestaurantTableCreate, RestaurantTableRead, RestaurantTableUpdate
+from app.schema.restaurant_table_schema import RestaurantTableCreate, RestaurantTableRead, RestaurantTableUpdate, FloorPlanRead
 from app.services.restaurant_table_service import RestaurantTableService
 from app.utils.oauth2 import get_current_user
 from app.utils.role_checker import RoleChecker
@@ -95,6 +95,23 @@ async def get_all_tables(restaurant_id: int, db: AsyncSession = Depends(get_db))
         data=tables,
     )
     
+# Live floor view: every table with occupancy derived from open orders
+@router.get(
+    "/floor/{restaurant_id}",
+    response_model=BaseResponse[FloorPlanRead],
+    dependencies=[Depends(RoleChecker(["admin", "staff"]))],
+)
+async def get_floor_plan(restaurant_id: int, db: AsyncSession = Depends(get_db)):
+    service = RestaurantTableService(db)
+    floor = await service.get_floor_plan(restaurant_id)
+
+    return BaseResponse(
+        status="success",
+        message="Floor plan fetched successfully",
+        data=floor,
+    )
+
+
 # Delete Table
 @router.delete(
     "/{table_id}",
@@ -15,6 +15,35 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # default: 7 days
     RATE_LIMIT_REQUESTS: int = 100  # max requests per window per client
     RATE_LIMIT_WINDOW_SECONDS: int = 60  # window size in seconds
+    CATALOG_CACHE_TTL_SECONDS: int = 300  # max age of a cached restaurant catalog snapshot
+    ORDER_COUNT_CAP: int = 1000  # upper bound for the "capped" order list count mode
+    ORDER_SEARCH_WINDOW_DAYS: int = 90  # default look-back for customer order search
+    ORDER_FEED_QUEUE_SIZE: int = 256  # pending deltas per live feed client before it is dropped
+    ORDER_FEED_BUFFER_SIZE: int = 1000  # recent deltas kept per restaurant for resume
+    ORDER_FEED_HEARTBEAT_SECONDS: int = 15
+    ORDER_FEED_RESUME_GRACE_SECONDS: int = 10  # events this much older than a client's last one are re-sent on resume from the database
+    ORDER_CONFLICT_RETRIES: int = 3  # automatic retries when a concurrent edit bumps an order's version
+    ORDER_ARCHIVE_ENABLED: bool = False  # run the background job that moves old closed orders to archive tables
+    ORDER_ARCHIVE_AFTER_DAYS: int = 90  # completed/canceled orders older than this leave the hot tables
+    ORDER_ARCHIVE_BATCH_SIZE: int = 500
+    ORDER_ARCHIVE_INTERVAL_SECONDS: int = 3600
+    SALES_REPORT_MAX_DAYS: int = 366  # widest date range a sales report will cover
+    ORDER_EXPORT_BATCH_SIZE: int = 1000  # rows fetched per round trip while streaming an export
+    ORDER_READ_CACHE_TTL_SECONDS: int = 30  # lifetime of a cached GET /orders/{id} body
+    ORDER_READ_CACHE_MAX_ENTRIES: int = 2000
+    FLOOR_STATE_TTL_SECONDS: int = 30  # how long a restaurant floor view is served from memory before a rebuild
+    KITCHEN_QUEUE_TTL_SECONDS: int = 60  # a station queue is reloaded from the database after this long
+    MENU_CACHE_TTL_SECONDS: int = 60  # rendered public menus are rebuilt at least this often
+    MENU_CACHE_WARM_LIMIT: int = 100  # restaurants whose menus are rendered at startup, busiest first
+    MENU_CACHE_WARM_DAYS: int = 7
+    MENU_SEARCH_TTL_SECONDS: int = 300  # a restaurant's menu search index is rebuilt at least this often
+    MAX_IMAGE_UPLOAD_BYTES: int = 5 * 1024 * 1024  # menu image uploads larger than this are rejected with 413
+    IMAGE_UPLOAD_CHUNK_BYTES: int = 64 * 1024
+    MENU_IMPORT_MAX_BYTES: int = 2 * 1024 * 1024  # largest CSV/JSON file accepted by the bulk menu import
+    MENU_IMPORT_MAX_ROWS: int = 5000
+    MENU_IMPORT_BATCH_SIZE: int = 500  # rows per multi-row insert during an import
+    MENU_EXPORT_BATCH_SIZE: int = 1000
+    IMAGE_VARIANT_WORKERS: int = 2  # processes that render thumb/card/full menu image variants
     DATABASE_SSL: bool = True
     APP_NAME: str = "Yummy API"
     DEBUG: bool = True
@@ -34,6 +63,8 @@ class Settings(BaseSettings):
     AWS_S3_REGION: str | None = None
     AWS_S3_ENDPOINT_URL: str | None = None
     AWS_S3_PUBLIC_URL_PREFIX: str | None = None
+    AWS_S3_MAX_POOL_CONNECTIONS: int = 20  # connections in the shared S3 client's pool
+    AWS_S3_MULTIPART_THRESHOLD_BYTES: int = 8 * 1024 * 1024  # larger uploads are sent as multipart
 
     class Config:
         env_file = ".env"
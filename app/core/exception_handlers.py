@@ -7,12 +7,19 @@ from app.schema.base_response import ErrorResponse, ErrorDetail
 
 # Handle HTTPException
 async def http_exception_handler(request: Request, exc: HTTPException):
+    if isinstance(exc.detail, dict):
+        # Structured detail: {"message": ..., "errors": [{"field": ..., "error": ...}]}
+        message = exc.detail.get("message", "An error occurred")
+        errors = [ErrorDetail(**e).dict() for e in exc.detail.get("errors", [])]
+    else:
+        message = exc.detail if isinstance(exc.detail, str) else "An error occurred"
+        errors = []
     return JSONResponse(
         status_code=exc.status_code,
         content={
             "status": "error",
-            "message": exc.detail if isinstance(exc.detail, str) else "An error occurred",
-            "errors": []
+            "message": message,
+            "errors": errors
         }
     )
 
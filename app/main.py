@@ -3,7 +3,6 @@ import time
 from pathlib import Path
 from fastapi import FastAPI, HTTPException, Request, status, Depends
 from fastapi.exceptions import RequestValidationError
-from fastapi.staticfiles import StaticFiles
 
 from app.controller import user_controller
 from app.controller import auth_controller
@@ -13,9 +12,19 @@ from app.controller import restaurant_table_controller
 from app.controller import item_category_controller
 from app.controller import menu_controller
 from app.controller import order_controller
+from app.controller import report_controller
+from app.controller import kitchen_controller
+
+from sqlalchemy import text
 
 from app.core.database import engine, Base
 from app.core.config import settings
+from app.models import order_archive_model, sales_rollup_model, kitchen_model  # noqa: F401  registers tables for create_all
+from app.services.order_archive_service import run_order_archiver
+from app.services.kitchen_service import rebuild_kitchen_queues
+from app.services.menu_service import warm_menu_cache
+from app.utils.image_variants import shutdown_variant_pool
+from app.utils.static_files import ImmutableStaticFiles
 from app.utils.role_checker import RoleChecker
 import asyncio
 
@@ -26,7 +35,7 @@ app = FastAPI(title="Yummy API", version="1.0")
 BASE_DIR = Path(__file__).resolve().parents[0]
 UPLOAD_ROOT = BASE_DIR / "uploads"
 UPLOAD_ROOT.mkdir(parents=True, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=UPLOAD_ROOT), name="uploads")
+app.mount("/uploads", ImmutableStaticFiles(directory=UPLOAD_ROOT), name="uploads")
 
 logger = logging.getLogger("yummy.middleware")
 
@@ -86,6 +95,8 @@ app.include_router(restaurant_table_type_controller.router)
 app.include_router(item_category_controller.router)
 app.include_router(menu_controller.router)
 app.include_router(order_controller.router)
+app.include_router(report_controller.router)
+app.include_router(kitchen_controller.router)
 
 
 @app.get("/health", tags=["Monitoring"])
@@ -105,5 +116,22 @@ async def basic_metrics():
 @app.on_event("startup")
 async def startup():
     async with engine.begin() as conn:
+        # Trigram indexes on orders need pg_trgm
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
-
+    await rebuild_kitchen_queues()
+    # Warm in the background; requests that arrive first just render on demand
+    app.state.menu_warmup = asyncio.create_task(warm_menu_cache())
+    if settings.ORDER_ARCHIVE_ENABLED:
+        app.state.order_archiver = asyncio.create_task(run_order_archiver())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Stop background work before the pool goes away so no query runs against a closing engine
+    tasks = [getattr(app.state, name, None) for name in ("menu_warmup", "order_archiver")]
+    tasks = [task for task in tasks if task is not None]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    shutdown_variant_pool()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Index, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -14,3 +14,7 @@ class ItemCategory(Base):
 
     restaurant = relationship("Restaurant", back_populates="categories")
     menu_items = relationship("Menu", back_populates="category")
+
+    __table_args__ = (
+        Index("ix_item_categories_restaurant", "restaurant_id"),
+    )
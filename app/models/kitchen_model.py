@@ -0,0 +1,66 @@
+import enum
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Boolean, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.order_model import OrderChannel
+
+
+class TicketStatus(enum.Enum):
+    queued = "queued"
+    firing = "firing"
+    done = "done"
+
+
+class KitchenStation(Base):
+    __tablename__ = "kitchen_stations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurant_info.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    # Receives items whose category is not mapped to any station
+    is_default = Column(Boolean, nullable=False, default=False, server_default="false")
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    categories = relationship("KitchenStationCategory", back_populates="station", cascade="all, delete-orphan", lazy="selectin")
+
+    __table_args__ = (
+        UniqueConstraint("restaurant_id", "name", name="uq_kitchen_stations_restaurant_name"),
+    )
+
+    @property
+    def category_ids(self):
+        return [c.category_id for c in self.categories]
+
+
+class KitchenStationCategory(Base):
+    __tablename__ = "kitchen_station_categories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    station_id = Column(Integer, ForeignKey("kitchen_stations.id", ondelete="CASCADE"), nullable=False)
+    # A category routes to exactly one station
+    category_id = Column(Integer, ForeignKey("item_categories.id", ondelete="CASCADE"), nullable=False, unique=True)
+
+    station = relationship("KitchenStation", back_populates="categories")
+
+
+class KitchenTicket(Base):
+    __tablename__ = "kitchen_tickets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurant_info.id", ondelete="CASCADE"), nullable=False)
+    station_id = Column(Integer, ForeignKey("kitchen_stations.id", ondelete="CASCADE"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
+    channel = Column(Enum(OrderChannel), nullable=False)
+    table_name = Column(String, nullable=True)
+    # [{"order_item_id", "name", "qty", "notes"}] as routed; the order can change later without touching the ticket
+    items = Column(JSON, nullable=False)
+    status = Column(Enum(TicketStatus), nullable=False, default=TicketStatus.queued)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    fired_at = Column(DateTime(timezone=True), nullable=True)
+    done_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_kitchen_tickets_station_status", "station_id", "status"),
+        Index("ix_kitchen_tickets_order", "order_id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, func
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Float, JSON, Boolean, Index, func, true
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -11,11 +11,24 @@ class Menu(Base):
     price = Column(Float, nullable=False)
     description = Column(String, nullable=True)
     image = Column(String, nullable=True)
+    image_variants = Column(JSON, nullable=True)  # variant name -> path, set once rendering finishes
     restaurant_id = Column(Integer, ForeignKey("restaurant_info.id", ondelete="CASCADE"))
     item_category_id = Column(Integer, ForeignKey("item_categories.id", ondelete="SET NULL"))
 
+    # Availability ("86 list"): switched off, sold out until a time, or capped per business day
+    is_available = Column(Boolean, nullable=False, default=True, server_default=true())
+    sold_out_until = Column(DateTime(timezone=True), nullable=True)
+    daily_quantity_cap = Column(Integer, nullable=True)
+    daily_quantity_remaining = Column(Integer, nullable=True)
+    quantity_business_date = Column(Date, nullable=True)  # day daily_quantity_remaining counts for
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     restaurant = relationship("Restaurant", back_populates="menu_items", passive_deletes=True)
     category = relationship("ItemCategory", back_populates="menu_items")
+
+    __table_args__ = (
+        Index("ix_menu_items_restaurant_category", "restaurant_id", "item_category_id"),
+        Index("ix_menu_items_category", "item_category_id"),
+    )
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Index, Table
+from app.core.database import Base
+from app.models.order_model import Order, OrderItem, OrderPayment, OrderEvent
+
+
+def _archive_table(source: Table) -> Table:
+    """Column-for-column copy of a live order table.
+
+    Built from the live definition so new columns are picked up
+    automatically. Foreign keys are left out because archived rows must
+    not point back into the hot tables, and ids are kept as they were.
+    """
+    return Table(
+        f"{source.name}_archive",
+        Base.metadata,
+        *(
+            Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable, autoincrement=False)
+            for c in source.columns
+        ),
+    )
+
+
+orders_archive = _archive_table(Order.__table__)
+order_items_archive = _archive_table(OrderItem.__table__)
+order_payments_archive = _archive_table(OrderPayment.__table__)
+order_events_archive = _archive_table(OrderEvent.__table__)
+
+Index("ix_orders_archive_restaurant_created", orders_archive.c.restaurant_id, orders_archive.c.created_at, orders_archive.c.id)
+Index("ix_order_items_archive_order", order_items_archive.c.order_id)
+Index("ix_order_payments_archive_order", order_payments_archive.c.order_id)
+Index("ix_order_events_archive_order", order_events_archive.c.order_id)
+
+# Live table -> archive table, children before their order
+ARCHIVE_TABLES = (
+    (OrderItem.__table__, order_items_archive),
+    (OrderPayment.__table__, order_payments_archive),
+    (OrderEvent.__table__, order_events_archive),
+    (Order.__table__, orders_archive),
+)
@@ -1,8 +1,9 @@
 import enum
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Numeric, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, JSON, Numeric, Index, text
+from sqlalchemy.orm import relationship, validates
 from app.core.database import Base
+from app.utils.search import normalize_name, phone_digits
 
 
 class OrderStatus(enum.Enum):
@@ -33,12 +34,18 @@ class Order(Base):
     group_id = Column(Integer, nullable=True)
     customer_name = Column(String, nullable=True)
     customer_phone = Column(String, nullable=True)
+    # Search keys kept in sync with customer_name/customer_phone by the validators below
+    customer_name_norm = Column(String, nullable=True)
+    customer_phone_digits = Column(String, nullable=True)
     status = Column(Enum(OrderStatus), nullable=False, default=OrderStatus.pending)
     subtotal = Column(Numeric(12, 2), nullable=False, default=0)
     tax_total = Column(Numeric(12, 2), nullable=False, default=0)
     service_charge = Column(Numeric(12, 2), nullable=False, default=0)
     discount_total = Column(Numeric(12, 2), nullable=False, default=0)
     grand_total = Column(Numeric(12, 2), nullable=False, default=0)
+    # Sum of successful payments and what is still owed; kept current by OrderService in the same transaction
+    paid_total = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    balance_due = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
     notes = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -46,19 +53,41 @@ class Order(Base):
     completed_at = Column(DateTime(timezone=True), nullable=True)
     canceled_at = Column(DateTime(timezone=True), nullable=True)
     cancel_reason = Column(String, nullable=True)
+    # Bumped by every OrderService mutation; updates are compare-and-swap on it
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", lazy="selectin")
     payments = relationship("OrderPayment", back_populates="order", cascade="all, delete-orphan", lazy="selectin")
-    events = relationship("OrderEvent", back_populates="order", cascade="all, delete-orphan", lazy="selectin")
+    # Never part of an order read; fetched on their own via OrderRepository.get_events.
+    # Rows go with the order through the FK's ON DELETE CASCADE.
+    events = relationship("OrderEvent", back_populates="order", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
     table = relationship("RestaurantTable", back_populates="orders", lazy="selectin")
 
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
     __table_args__ = (
         Index("ix_orders_restaurant_status_created", "restaurant_id", "status", "created_at"),
+        Index("ix_orders_restaurant_created_id", "restaurant_id", "created_at", "id"),
+        Index("ix_orders_status_created", "status", "created_at"),
+        Index("ix_orders_restaurant_unpaid", "restaurant_id", "created_at", "id", postgresql_where=text("balance_due > 0")),
         Index("ix_orders_restaurant_channel", "restaurant_id", "channel"),
         Index("ix_orders_table", "table_id"),
         Index("ix_orders_group", "group_id"),
+        Index("ix_orders_restaurant_phone_digits", "restaurant_id", "customer_phone_digits", postgresql_ops={"customer_phone_digits": "text_pattern_ops"}),
+        Index("ix_orders_customer_name_trgm", "customer_name_norm", postgresql_using="gin", postgresql_ops={"customer_name_norm": "gin_trgm_ops"}),
+        Index("ix_orders_customer_phone_trgm", "customer_phone_digits", postgresql_using="gin", postgresql_ops={"customer_phone_digits": "gin_trgm_ops"}),
     )
 
+    @validates("customer_name")
+    def _sync_customer_name_norm(self, key, value):
+        self.customer_name_norm = normalize_name(value)
+        return value
+
+    @validates("customer_phone")
+    def _sync_customer_phone_digits(self, key, value):
+        self.customer_phone_digits = phone_digits(value)
+        return value
+
     @property
     def table_name(self):
         return self.table.table_name if self.table else None
@@ -79,6 +108,10 @@ class OrderItem(Base):
 
     order = relationship("Order", back_populates="items")
 
+    __table_args__ = (
+        Index("ix_order_items_order", "order_id"),
+    )
+
 
 class PaymentStatus(enum.Enum):
     success = "success"
@@ -107,6 +140,10 @@ class OrderPayment(Base):
 
     order = relationship("Order", back_populates="payments")
 
+    __table_args__ = (
+        Index("ix_order_payments_order", "order_id"),
+    )
+
 
 class OrderEvent(Base):
     __tablename__ = "order_events"
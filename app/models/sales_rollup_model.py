@@ -0,0 +1,53 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Enum, Numeric, UniqueConstraint
+from app.core.database import Base
+from app.models.order_model import OrderChannel
+
+
+UNCATEGORIZED = "Uncategorized"
+
+
+class SalesDailyTotal(Base):
+    """Per restaurant, business day and channel order totals, maintained as orders complete or cancel."""
+
+    __tablename__ = "sales_daily_totals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurant_info.id", ondelete="CASCADE"), nullable=False)
+    business_date = Column(Date, nullable=False)
+    channel = Column(Enum(OrderChannel), nullable=False)
+    completed_orders = Column(Integer, nullable=False, default=0)
+    canceled_orders = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Numeric(14, 2), nullable=False, default=0)
+    tax_total = Column(Numeric(14, 2), nullable=False, default=0)
+    service_charge = Column(Numeric(14, 2), nullable=False, default=0)
+    discount_total = Column(Numeric(14, 2), nullable=False, default=0)
+    grand_total = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("restaurant_id", "business_date", "channel", name="uq_sales_daily_totals_key"),
+    )
+
+
+class SalesDailyItem(Base):
+    """Per menu item quantities and line totals for completed orders, on the same day/channel grain."""
+
+    __tablename__ = "sales_daily_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurant_info.id", ondelete="CASCADE"), nullable=False)
+    business_date = Column(Date, nullable=False)
+    channel = Column(Enum(OrderChannel), nullable=False)
+    # From OrderItem.category_name_snapshot; NULLs are stored as UNCATEGORIZED so they stay in the unique key
+    category_name = Column(String, nullable=False, default=UNCATEGORIZED)
+    # 0 for items whose menu row has since been deleted
+    menu_item_id = Column(Integer, nullable=False, default=0)
+    item_name = Column(String, nullable=False)
+    qty = Column(Integer, nullable=False, default=0)
+    sales = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "restaurant_id", "business_date", "channel", "category_name", "menu_item_id",
+            name="uq_sales_daily_items_key",
+        ),
+    )
@@ -0,0 +1,81 @@
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete
+
+from app.models.kitchen_model import KitchenStation, KitchenStationCategory, KitchenTicket, TicketStatus
+from app.models.item_category_model import ItemCategory
+
+
+OPEN_TICKET_STATUSES = (TicketStatus.queued, TicketStatus.firing)
+
+
+class KitchenRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_station(self, station: KitchenStation):
+        self.db.add(station)
+        await self.db.commit()
+        await self.db.refresh(station)
+        return station
+
+    async def get_station(self, station_id: int) -> Optional[KitchenStation]:
+        result = await self.db.execute(select(KitchenStation).where(KitchenStation.id == station_id))
+        return result.scalars().first()
+
+    async def get_stations(self, restaurant_id: int):
+        result = await self.db.execute(
+            select(KitchenStation).where(KitchenStation.restaurant_id == restaurant_id).order_by(KitchenStation.name)
+        )
+        return result.scalars().all()
+
+    async def get_categories(self, restaurant_id: int, category_ids: List[int]):
+        result = await self.db.execute(
+            select(ItemCategory.id).where(ItemCategory.restaurant_id == restaurant_id, ItemCategory.id.in_(category_ids))
+        )
+        return set(result.scalars().all())
+
+    async def replace_station_categories(self, station: KitchenStation, category_ids: List[int]):
+        # A category belongs to one station, so take it away from wherever it was routed before
+        await self.db.execute(delete(KitchenStationCategory).where(KitchenStationCategory.category_id.in_(category_ids)))
+        station.categories = [KitchenStationCategory(category_id=category_id) for category_id in category_ids]
+
+    async def clear_default_station(self, restaurant_id: int):
+        for station in await self.get_stations(restaurant_id):
+            station.is_default = False
+
+    async def get_routes(self, restaurant_id: int):
+        """(station_id, is_default, category_name) for every station, one row per mapped category."""
+        result = await self.db.execute(
+            select(KitchenStation.id, KitchenStation.is_default, ItemCategory.name)
+            .outerjoin(KitchenStationCategory, KitchenStationCategory.station_id == KitchenStation.id)
+            .outerjoin(ItemCategory, ItemCategory.id == KitchenStationCategory.category_id)
+            .where(KitchenStation.restaurant_id == restaurant_id)
+        )
+        return result.all()
+
+    def add_tickets(self, tickets: List[KitchenTicket]):
+        self.db.add_all(tickets)
+
+    async def get_ticket(self, ticket_id: int) -> Optional[KitchenTicket]:
+        result = await self.db.execute(select(KitchenTicket).where(KitchenTicket.id == ticket_id))
+        return result.scalars().first()
+
+    async def get_open_tickets(self, station_id: Optional[int] = None):
+        query = select(KitchenTicket).where(KitchenTicket.status.in_(OPEN_TICKET_STATUSES))
+        if station_id is not None:
+            query = query.where(KitchenTicket.station_id == station_id)
+        result = await self.db.execute(query)
+        return result.scalars().all()
+
+    async def delete_open_tickets(self, order_id: int):
+        await self.db.execute(
+            delete(KitchenTicket).where(KitchenTicket.order_id == order_id, KitchenTicket.status.in_(OPEN_TICKET_STATUSES))
+        )
+
+    async def commit(self):
+        await self.db.commit()
+
+    async def refresh(self, obj):
+        await self.db.refresh(obj)
@@ -1,10 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func, update, insert, null, union_all
+from sqlalchemy.orm import aliased
+from datetime import datetime
 from fastapi import HTTPException, status
 
 from app.models.menu_model import Menu
 from app.models.restaurant_model import Restaurant
 from app.models.item_category_model import ItemCategory
+from app.models.order_model import Order
+from app.core.database import AsyncSessionLocal
 
 
 class MenuRepository:
@@ -42,12 +47,160 @@ class MenuRepository:
         result = await self.db.execute(query)
         return result.scalars().all()
 
+    async def get_grouped_menu_rows(self, restaurant_id: int):
+        """(category_id, category_name, Menu | None) rows in display order.
+
+        The restaurant's categories left-joined to their items keep empty
+        categories (Menu is None); items without a category are appended with
+        UNION ALL and sort last. Each branch filters on its own restaurant_id,
+        so both are index scans rather than a join over every restaurant.
+        """
+        menus = Menu.__table__
+        categorized = (
+            select(ItemCategory.id.label("category_id"), ItemCategory.name.label("category_name"), *menus.c)
+            .select_from(ItemCategory)
+            .outerjoin(menus, menus.c.item_category_id == ItemCategory.id)
+            .where(ItemCategory.restaurant_id == restaurant_id)
+        )
+        uncategorized = (
+            select(null().label("category_id"), null().label("category_name"), *menus.c)
+            .where(menus.c.restaurant_id == restaurant_id, menus.c.item_category_id.is_(None))
+        )
+        rows = union_all(categorized, uncategorized).subquery()
+        menu = aliased(Menu, rows)
+        query = (
+            select(rows.c.category_id, rows.c.category_name, menu)
+            .order_by(rows.c.category_id.is_(None), rows.c.category_id, rows.c.id)
+        )
+        result = await self.db.execute(query)
+        return result.all()
+
+    async def get_search_rows(self, restaurant_id: int):
+        """Everything the search index needs: category names and items with their category name."""
+        categories = await self.db.execute(
+            select(ItemCategory.id, ItemCategory.name).where(ItemCategory.restaurant_id == restaurant_id)
+        )
+        items = await self.db.execute(
+            select(
+                Menu.id,
+                Menu.name,
+                Menu.price,
+                Menu.image,
+                Menu.item_category_id,
+                ItemCategory.name.label("category_name"),
+            )
+            .outerjoin(ItemCategory, Menu.item_category_id == ItemCategory.id)
+            .where(Menu.restaurant_id == restaurant_id)
+        )
+        return dict(categories.all()), items.mappings().all()
+
+    async def get_category_ids_by_name(self, restaurant_id: int) -> dict[str, int]:
+        """Lower-cased category name -> id; the oldest wins if names repeat."""
+        result = await self.db.execute(
+            select(ItemCategory.id, ItemCategory.name)
+            .where(ItemCategory.restaurant_id == restaurant_id)
+            .order_by(ItemCategory.id.desc())
+        )
+        return {name.lower(): category_id for category_id, name in result.all()}
+
+    async def get_menu_ids_by_name(self, restaurant_id: int) -> dict[str, int]:
+        """Lower-cased menu item name -> id; the oldest wins if names repeat."""
+        result = await self.db.execute(
+            select(Menu.id, Menu.name).where(Menu.restaurant_id == restaurant_id).order_by(Menu.id.desc())
+        )
+        return {name.lower(): menu_id for menu_id, name in result.all()}
+
+    async def import_menu_rows(
+        self,
+        restaurant_id: int,
+        category_ids: dict[str, int],
+        new_categories: list[str],
+        inserts: list[dict],
+        updates: list[dict],
+        batch_size: int,
+    ):
+        """Write a validated import in one transaction.
+
+        Rows may carry a lower-cased "category" key that is resolved to an id
+        here, once the missing categories exist; update rows without one keep
+        their current category.
+        """
+        try:
+            category_ids = dict(category_ids)
+            if new_categories:
+                result = await self.db.execute(
+                    insert(ItemCategory).returning(ItemCategory.id, ItemCategory.name),
+                    [{"name": name, "restaurant_id": restaurant_id} for name in new_categories],
+                )
+                category_ids.update({name.lower(): category_id for category_id, name in result.all()})
+
+            def resolve(row: dict) -> dict:
+                values = {key: value for key, value in row.items() if key != "category"}
+                if "category" in row:
+                    values["item_category_id"] = category_ids.get(row["category"]) if row["category"] else None
+                return values
+
+            for start in range(0, len(inserts), batch_size):
+                batch = [resolve(row) | {"restaurant_id": restaurant_id} for row in inserts[start:start + batch_size]]
+                await self.db.execute(insert(Menu), batch)
+            for start in range(0, len(updates), batch_size):
+                # Bulk update by primary key; rows may differ in which columns they set
+                await self.db.execute(update(Menu), [resolve(row) for row in updates[start:start + batch_size]])
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+    async def stream_menu_rows(self, restaurant_id: int, batch_size: int):
+        """Yield export rows in batches from a server-side cursor, on a session of their own."""
+        query = (
+            select(
+                Menu.name,
+                Menu.price,
+                ItemCategory.name.label("category"),
+                Menu.description,
+                Menu.image,
+            )
+            .outerjoin(ItemCategory, Menu.item_category_id == ItemCategory.id)
+            .where(Menu.restaurant_id == restaurant_id)
+            .order_by(ItemCategory.name, Menu.id)
+        )
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            async for partition in result.mappings().partitions():
+                yield partition
+
     async def update_menu(self, menu: Menu):
         await self.db.commit()
         await self.db.refresh(menu)
         return menu
 
+    async def count_image_references(self, image_path: str) -> int:
+        result = await self.db.execute(select(func.count(Menu.id)).where(Menu.image == image_path))
+        return result.scalar_one()
+
+    async def set_image_variants(self, menu_id: int, image_path: str, variants: dict[str, str]) -> bool:
+        """Record rendered variants, unless the item's image was replaced or removed meanwhile."""
+        result = await self.db.execute(
+            update(Menu)
+            .where(Menu.id == menu_id, Menu.image == image_path)
+            .values(image_variants=variants)
+        )
+        await self.db.commit()
+        return result.rowcount > 0
+
     async def delete_menu(self, menu: Menu):
         await self.db.delete(menu)
         await self.db.commit()
         return True
+
+    async def get_active_restaurant_ids(self, since: datetime, limit: int):
+        """Restaurants with the most orders since the given time, busiest first."""
+        result = await self.db.execute(
+            select(Order.restaurant_id)
+            .where(Order.created_at >= since)
+            .group_by(Order.restaurant_id)
+            .order_by(func.count(Order.id).desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, insert, tuple_, union_all
+
+from app.models.order_model import Order, OrderItem, OrderStatus
+from app.models.order_archive_model import ARCHIVE_TABLES, orders_archive, order_items_archive
+from app.repositories.order_repository import order_summary_select
+
+
+CLOSED_STATUSES = (OrderStatus.completed, OrderStatus.canceled)
+
+
+class OrderArchiveRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def lock_archivable_ids(self, cutoff: datetime, batch_size: int) -> List[int]:
+        # SKIP LOCKED lets a second archiver (or a slow payment write) pass without waiting
+        result = await self.db.execute(
+            select(Order.id)
+            .where(Order.status.in_(CLOSED_STATUSES), Order.created_at < cutoff)
+            .order_by(Order.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
+
+    async def move_orders(self, order_ids: List[int]):
+        """Copy orders and their children into the archive tables, then delete them from the hot set."""
+        for live, archive in ARCHIVE_TABLES:
+            key = live.c.id if live is Order.__table__ else live.c.order_id
+            columns = [c.name for c in live.columns]
+            await self.db.execute(
+                insert(archive).from_select(columns, select(*live.columns).where(key.in_(order_ids)))
+            )
+        for live, _ in ARCHIVE_TABLES:
+            key = live.c.id if live is Order.__table__ else live.c.order_id
+            await self.db.execute(delete(live).where(key.in_(order_ids)))
+
+    async def get_history(self, restaurant_id: int, date_from: Optional[datetime], date_to: Optional[datetime], status_filter: Optional[List[OrderStatus]], channel: Optional[str], include_archive: bool, limit: int, after: Optional[tuple[datetime, int]] = None):
+        def scoped(orders, items):
+            query = order_summary_select(orders, items).where(orders.c.restaurant_id == restaurant_id)
+            if date_from is not None:
+                query = query.where(orders.c.created_at >= date_from)
+            if date_to is not None:
+                query = query.where(orders.c.created_at < date_to)
+            if status_filter:
+                query = query.where(orders.c.status.in_(status_filter))
+            if channel:
+                query = query.where(orders.c.channel == channel)
+            if after is not None:
+                query = query.where(tuple_(orders.c.created_at, orders.c.id) < tuple_(*after))
+            # Each branch is limited on its own index before the merge
+            return query.order_by(orders.c.created_at.desc(), orders.c.id.desc()).limit(limit + 1)
+
+        query = scoped(Order.__table__, OrderItem.__table__)
+        if include_archive:
+            merged = union_all(
+                query,
+                scoped(orders_archive, order_items_archive),
+            ).subquery()
+            query = select(merged).order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(limit + 1)
+
+        result = await self.db.execute(query)
+        rows = result.mappings().all()
+        return rows[:limit], len(rows) > limit
+
+    async def commit(self):
+        await self.db.commit()
+
+    async def rollback(self):
+        await self.db.rollback()
@@ -1,58 +1,182 @@
+import asyncio
+from datetime import date, datetime, timedelta
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import case, cast, func, literal, null, text, tuple_, union_all, update
 from sqlalchemy.orm import selectinload
 
-from app.models.order_model import Order, OrderItem, OrderPayment, OrderEvent, OrderStatus
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+from app.models.order_model import Order, OrderItem, OrderPayment, OrderEvent, OrderStatus, OrderChannel, PaymentStatus
+from app.models.order_archive_model import orders_archive, order_items_archive, order_payments_archive
 from app.models.menu_model import Menu
 from app.models.item_category_model import ItemCategory
 from app.models.table_model import RestaurantTable
+from app.models.restaurant_model import Restaurant
+from app.utils.catalog_cache import CatalogItem, ItemAvailability, is_restricted
+from app.utils.search import normalize_name, phone_digits
+
+
+def order_summary_select(orders, items):
+    """Order header columns plus item aggregates, without loading any relationships.
+
+    Takes the tables explicitly so the same projection serves the live and archived order sets.
+    """
+    item_count = (
+        select(func.count(items.c.id))
+        .where(items.c.order_id == orders.c.id)
+        .correlate(orders)
+        .scalar_subquery()
+    )
+    qty_total = (
+        select(func.coalesce(func.sum(items.c.qty), 0))
+        .where(items.c.order_id == orders.c.id)
+        .correlate(orders)
+        .scalar_subquery()
+    )
+    tables = RestaurantTable.__table__
+    return select(
+        orders.c.id,
+        orders.c.restaurant_id,
+        orders.c.channel,
+        orders.c.table_id,
+        tables.c.table_name,
+        orders.c.group_id,
+        orders.c.customer_name,
+        orders.c.customer_phone,
+        orders.c.status,
+        orders.c.grand_total,
+        item_count.label("item_count"),
+        qty_total.label("qty_total"),
+        orders.c.paid_total,
+        orders.c.balance_due,
+        orders.c.version,
+        orders.c.created_at,
+        orders.c.updated_at,
+    ).select_from(orders.outerjoin(tables, tables.c.id == orders.c.table_id))
+
+
+def _typed_null(column, name: str):
+    # Typed so both halves of the export union agree on column types
+    return cast(null(), column.type).label(name)
+
+
+def order_export_selects(orders, items, payments, *criteria):
+    """Export rows for one order set: one per order line and one per payment.
+
+    Orders without items still get a single row. Each row carries
+    record_type ("item", "order" or "payment"); the columns of the other
+    kind are null, so the two selects can be combined with UNION ALL.
+    """
+    refunded_total = (
+        select(func.coalesce(func.sum(payments.c.amount), 0))
+        .where(payments.c.order_id == orders.c.id, payments.c.status == PaymentStatus.refunded)
+        .correlate(orders)
+        .scalar_subquery()
+    )
+
+    tables = RestaurantTable.__table__
+    order_columns = (
+        orders.c.id.label("order_id"),
+        orders.c.restaurant_id,
+        orders.c.channel,
+        orders.c.status,
+        tables.c.table_name,
+        orders.c.customer_name,
+        orders.c.customer_phone,
+        orders.c.subtotal,
+        orders.c.tax_total,
+        orders.c.service_charge,
+        orders.c.discount_total,
+        orders.c.grand_total,
+        orders.c.paid_total,
+        orders.c.balance_due,
+        refunded_total.label("refunded_total"),
+        orders.c.created_at,
+        orders.c.completed_at,
+        orders.c.canceled_at,
+    )
+    item_rows = select(
+        *order_columns,
+        case((items.c.id.is_(None), "order"), else_="item").label("record_type"),
+        items.c.id.label("item_id"),
+        items.c.menu_item_id,
+        items.c.name_snapshot.label("item_name"),
+        items.c.category_name_snapshot.label("category_name"),
+        items.c.unit_price,
+        items.c.qty,
+        items.c.line_total,
+        _typed_null(payments.c.id, "payment_id"),
+        _typed_null(payments.c.method, "payment_method"),
+        _typed_null(payments.c.amount, "payment_amount"),
+        _typed_null(payments.c.status, "payment_status"),
+        _typed_null(payments.c.reference, "payment_reference"),
+    ).select_from(
+        orders
+        .outerjoin(tables, tables.c.id == orders.c.table_id)
+        .outerjoin(items, items.c.order_id == orders.c.id)
+    ).where(*criteria)
+    payment_rows = select(
+        *order_columns,
+        literal("payment").label("record_type"),
+        _typed_null(items.c.id, "item_id"),
+        _typed_null(items.c.menu_item_id, "menu_item_id"),
+        _typed_null(items.c.name_snapshot, "item_name"),
+        _typed_null(items.c.category_name_snapshot, "category_name"),
+        _typed_null(items.c.unit_price, "unit_price"),
+        _typed_null(items.c.qty, "qty"),
+        _typed_null(items.c.line_total, "line_total"),
+        payments.c.id.label("payment_id"),
+        payments.c.method.label("payment_method"),
+        payments.c.amount.label("payment_amount"),
+        payments.c.status.label("payment_status"),
+        payments.c.reference.label("payment_reference"),
+    ).select_from(
+        orders
+        .outerjoin(tables, tables.c.id == orders.c.table_id)
+        .join(payments, payments.c.order_id == orders.c.id)
+    ).where(*criteria)
+    return item_rows, payment_rows
 
 
 class OrderRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def create_order(self, order: Order):
+    def add_order(self, order: Order):
         self.db.add(order)
-        await self.db.commit()
-        await self.db.refresh(order)
         return order
 
-    async def get_order(self, order_id: int):
+    def add_orders(self, orders: List[Order]):
+        self.db.add_all(orders)
+        return orders
+
+    async def get_order_header(self, order_id: int):
         result = await self.db.execute(
-            select(Order)
-            .options(
-                selectinload(Order.items),
-                selectinload(Order.payments),
-                selectinload(Order.events),
-                selectinload(Order.table),
-            )
+            select(Order.id, Order.version, RestaurantTable.table_name)
+            .outerjoin(RestaurantTable, RestaurantTable.id == Order.table_id)
             .where(Order.id == order_id)
         )
-        return result.scalars().first()
+        return result.first()
 
-    async def get_order_for_update(self, order_id: int):
+    async def get_order(self, order_id: int):
         result = await self.db.execute(
             select(Order)
             .options(
                 selectinload(Order.items),
                 selectinload(Order.payments),
-                selectinload(Order.events),
                 selectinload(Order.table),
             )
             .where(Order.id == order_id)
-            .with_for_update()
+            # Conflict retries must see the committed row, not the identity map copy
+            .execution_options(populate_existing=True)
         )
         return result.scalars().first()
 
-    async def list_orders(self, restaurant_id: int, status_filter: Optional[List[OrderStatus]] = None, channel: Optional[str] = None, table_id: Optional[int] = None, search: Optional[str] = None, skip: int = 0, limit: int = 50):
-        query = select(Order).options(
-            selectinload(Order.items),
-            selectinload(Order.payments),
-            selectinload(Order.table),
-        ).where(Order.restaurant_id == restaurant_id)
+    def _filter_orders(self, query, restaurant_id: int, status_filter: Optional[List[OrderStatus]], channel: Optional[str], table_id: Optional[int], search: Optional[str], unpaid_only: bool = False):
+        query = query.where(Order.restaurant_id == restaurant_id)
         if status_filter:
             query = query.where(Order.status.in_(status_filter))
         if channel:
@@ -60,48 +184,338 @@ class OrderRepository:
         if table_id:
             query = query.where(Order.table_id == table_id)
         if search:
-            like = f"%{search}%"
-            query = query.where((Order.customer_name.ilike(like)) | (Order.customer_phone.ilike(like)))
-        total_result = await self.db.execute(query.with_only_columns(func.count()))
-        total = total_result.scalar_one()
-        result = await self.db.execute(query.order_by(Order.created_at.desc()).offset(skip).limit(limit))
-        return result.scalars().all(), total
-
-    async def add_event(self, order_id: int, event: str, payload: dict | None, actor_id: int | None):
+            query = query.where(self._search_clause(search))
+        if unpaid_only:
+            # Matches the partial index ix_orders_restaurant_unpaid
+            query = query.where(Order.balance_due > 0, Order.status != OrderStatus.canceled)
+        return query
+
+    def _search_clause(self, search: str):
+        # Substring match on the normalized columns; served by the trigram indexes
+        name = normalize_name(search)
+        digits = phone_digits(search)
+        clause = Order.customer_name_norm.contains(name or "", autoescape=True)
+        if digits:
+            clause = clause | Order.customer_phone_digits.contains(digits, autoescape=True)
+        return clause
+
+    def _page(self, query, skip: int, limit: int, after: Optional[tuple[datetime, int]]):
+        # Keyset on (created_at, id) when a cursor is given; offset paging is kept for old clients
+        if after is not None:
+            query = query.where(tuple_(Order.created_at, Order.id) < tuple_(*after))
+        elif skip:
+            query = query.offset(skip)
+        # One extra row tells whether another page exists
+        return query.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1)
+
+    async def _count_orders(self, query, mode: str) -> tuple[int, bool]:
+        """Count matching orders on a separate session so it can overlap the page fetch.
+
+        Returns the total and whether it is exact.
+        """
+        async with AsyncSessionLocal() as session:
+            if mode == "estimate":
+                compiled = query.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+                result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+                plan = result.scalar_one()
+                return int(plan[0]["Plan"]["Plan Rows"]), False
+            if mode == "capped":
+                cap = settings.ORDER_COUNT_CAP
+                result = await session.execute(select(func.count()).select_from(query.limit(cap + 1).subquery()))
+                total = result.scalar_one()
+                return min(total, cap), total <= cap
+            result = await session.execute(select(func.count()).select_from(query.subquery()))
+            return result.scalar_one(), True
+
+    async def _fetch_page(self, page_query, count_query, count_mode: str):
+        total, total_is_exact = None, True
+        if count_mode == "none":
+            result = await self.db.execute(page_query)
+        else:
+            result, (total, total_is_exact) = await asyncio.gather(
+                self.db.execute(page_query),
+                self._count_orders(count_query, count_mode),
+            )
+        return result, total, total_is_exact
+
+    async def list_orders(self, restaurant_id: int, status_filter: Optional[List[OrderStatus]] = None, channel: Optional[str] = None, table_id: Optional[int] = None, search: Optional[str] = None, skip: int = 0, limit: int = 50, after: Optional[tuple[datetime, int]] = None, count_mode: str = "exact", unpaid_only: bool = False):
+        filters = (restaurant_id, status_filter, channel, table_id, search, unpaid_only)
+        page_query = self._page(
+            self._filter_orders(
+                select(Order).options(
+                    selectinload(Order.items),
+                    selectinload(Order.payments),
+                    selectinload(Order.table),
+                ),
+                *filters,
+            ),
+            skip,
+            limit,
+            after,
+        )
+        count_query = self._filter_orders(select(Order.id), *filters)
+        result, total, total_is_exact = await self._fetch_page(page_query, count_query, count_mode)
+        orders = result.scalars().all()
+        has_more = len(orders) > limit
+        return orders[:limit], total, total_is_exact, has_more
+
+    def _summary_select(self):
+        return order_summary_select(Order.__table__, OrderItem.__table__)
+
+    async def list_order_summaries(self, restaurant_id: int, status_filter: Optional[List[OrderStatus]] = None, channel: Optional[str] = None, table_id: Optional[int] = None, search: Optional[str] = None, skip: int = 0, limit: int = 50, after: Optional[tuple[datetime, int]] = None, count_mode: str = "exact", unpaid_only: bool = False):
+        filters = (restaurant_id, status_filter, channel, table_id, search, unpaid_only)
+        page_query = self._page(self._filter_orders(self._summary_select(), *filters), skip, limit, after)
+        count_query = self._filter_orders(select(Order.id), *filters)
+        result, total, total_is_exact = await self._fetch_page(page_query, count_query, count_mode)
+        rows = result.mappings().all()
+        has_more = len(rows) > limit
+        return rows[:limit], total, total_is_exact, has_more
+
+    async def get_group_bill_rows(self, restaurant_id: int, group_id: int):
+        """One row per line of every non-canceled order in the group, order columns repeated."""
+        result = await self.db.execute(
+            select(
+                Order.id.label("order_id"),
+                Order.status,
+                Order.table_id,
+                RestaurantTable.table_name,
+                Order.subtotal,
+                Order.tax_total,
+                Order.service_charge,
+                Order.discount_total,
+                Order.grand_total,
+                Order.paid_total,
+                Order.balance_due,
+                Order.version,
+                OrderItem.menu_item_id,
+                OrderItem.name_snapshot,
+                OrderItem.category_name_snapshot,
+                OrderItem.unit_price,
+                OrderItem.qty,
+                OrderItem.line_total,
+            )
+            .outerjoin(RestaurantTable, RestaurantTable.id == Order.table_id)
+            .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+            .where(
+                Order.restaurant_id == restaurant_id,
+                Order.group_id == group_id,
+                Order.status != OrderStatus.canceled,
+            )
+            .order_by(Order.created_at, Order.id, OrderItem.id)
+        )
+        return result.all()
+
+    async def get_group_orders(self, restaurant_id: int, group_id: int):
+        result = await self.db.execute(
+            select(Order)
+            .options(
+                selectinload(Order.items),
+                selectinload(Order.payments),
+                selectinload(Order.table),
+            )
+            .where(
+                Order.restaurant_id == restaurant_id,
+                Order.group_id == group_id,
+                Order.status != OrderStatus.canceled,
+            )
+            .order_by(Order.created_at, Order.id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().all()
+
+    async def stream_export_rows(self, restaurant_id: int, date_from: Optional[datetime], date_to: Optional[datetime], channel: Optional[OrderChannel], include_archive: bool, batch_size: int):
+        """Yield export rows in batches from a server-side cursor.
+
+        Runs on its own session because the response streams after the
+        request's session has been released.
+        """
+        def scoped(orders, items, payments):
+            criteria = [orders.c.restaurant_id == restaurant_id]
+            if date_from is not None:
+                criteria.append(orders.c.created_at >= date_from)
+            if date_to is not None:
+                criteria.append(orders.c.created_at < date_to)
+            if channel is not None:
+                criteria.append(orders.c.channel == channel)
+            return order_export_selects(orders, items, payments, *criteria)
+
+        selects = scoped(Order.__table__, OrderItem.__table__, OrderPayment.__table__)
+        if include_archive:
+            selects += scoped(orders_archive, order_items_archive, order_payments_archive)
+        rows = union_all(*selects).subquery()
+        # Group each order's rows together: its lines, then its payments
+        query = select(rows).order_by(rows.c.created_at, rows.c.order_id, rows.c.record_type, rows.c.item_id, rows.c.payment_id)
+
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            async for partition in result.mappings().partitions():
+                yield partition
+
+    async def search_orders(self, restaurant_id: int, search: str, window_days: int, limit: int):
+        """Rank orders in a recent time window by how well the customer matches.
+
+        Exact phone > phone prefix / exact name > name prefix > substring,
+        then trigram similarity and recency.
+        """
+        name = normalize_name(search) or ""
+        digits = phone_digits(search)
+        rank_cases = []
+        if digits:
+            rank_cases += [
+                (Order.customer_phone_digits == digits, 4),
+                (Order.customer_phone_digits.startswith(digits, autoescape=True), 3),
+            ]
+        rank_cases += [
+            (Order.customer_name_norm == name, 3),
+            (Order.customer_name_norm.startswith(name, autoescape=True), 2),
+        ]
+        rank = case(*rank_cases, else_=1)
+        similarity = func.coalesce(func.similarity(Order.customer_name_norm, name), 0)
+        since = datetime.utcnow() - timedelta(days=window_days)
+        query = (
+            self._summary_select()
+            .where(
+                Order.restaurant_id == restaurant_id,
+                Order.created_at >= since,
+                self._search_clause(search),
+            )
+            .order_by(rank.desc(), similarity.desc(), Order.created_at.desc())
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+        return result.mappings().all()
+
+    def stage_event(self, order_id: int, event: str, payload: dict | None, actor_id: int | None):
+        # Staged only; written with the rest of the unit of work on commit
         ev = OrderEvent(order_id=order_id, event=event, payload=payload, actor_id=actor_id)
         self.db.add(ev)
-        await self.db.commit()
-        await self.db.refresh(ev)
         return ev
 
     async def get_events(self, order_id: int):
         result = await self.db.execute(select(OrderEvent).where(OrderEvent.order_id == order_id).order_by(OrderEvent.created_at.desc()))
         return result.scalars().all()
 
-    async def add_payment(self, payment: OrderPayment):
+    async def get_restaurant_events_since(self, restaurant_id: int, after_id: int, limit: int, grace_seconds: int):
+        """Up to limit events after after_id, preceded by any written shortly before it.
+
+        Ids are assigned at flush, so an event with a smaller id can commit
+        after the client's last one; the grace window picks those up at the
+        cost of re-sending some the client already has. Returns the events
+        and whether the newer ones were cut off at limit.
+        """
+        def scoped(*criteria):
+            return (
+                select(OrderEvent)
+                .join(Order, Order.id == OrderEvent.order_id)
+                .where(Order.restaurant_id == restaurant_id, *criteria)
+                .order_by(OrderEvent.id)
+                .limit(limit)
+            )
+
+        earlier = []
+        anchor = await self.db.scalar(select(OrderEvent.created_at).where(OrderEvent.id == after_id))
+        if anchor is not None:
+            result = await self.db.execute(
+                scoped(OrderEvent.id < after_id, OrderEvent.created_at >= anchor - timedelta(seconds=grace_seconds))
+            )
+            earlier = result.scalars().all()
+        newer = (await self.db.execute(scoped(OrderEvent.id > after_id))).scalars().all()
+        return [*earlier, *newer], len(newer) >= limit
+
+    def add_payment(self, payment: OrderPayment):
         self.db.add(payment)
-        await self.db.commit()
-        await self.db.refresh(payment)
         return payment
 
-    async def update_order(self, order: Order):
+    async def flush(self):
+        await self.db.flush()
+
+    async def commit(self):
         await self.db.commit()
-        await self.db.refresh(order)
-        return order
+
+    async def rollback(self):
+        await self.db.rollback()
 
     async def delete_order(self, order: Order):
         await self.db.delete(order)
         await self.db.commit()
 
-    async def get_menu_items(self, ids: List[int]):
-        result = await self.db.execute(select(Menu).where(Menu.id.in_(ids)))
-        return result.scalars().all()
+    async def get_catalog_items(self, restaurant_id: int) -> tuple[List[CatalogItem], dict[int, ItemAvailability]]:
+        """Priced catalog items plus availability state for the items that are restricted."""
+        result = await self.db.execute(
+            select(
+                Menu.id,
+                Menu.restaurant_id,
+                Menu.name,
+                Menu.price,
+                Menu.item_category_id,
+                ItemCategory.name,
+                Menu.is_available,
+                Menu.sold_out_until,
+                Menu.daily_quantity_cap,
+                Menu.daily_quantity_remaining,
+                Menu.quantity_business_date,
+            )
+            .outerjoin(ItemCategory, ItemCategory.id == Menu.item_category_id)
+            .where(Menu.restaurant_id == restaurant_id)
+        )
+        items = []
+        availability = {}
+        for (
+            menu_id, menu_restaurant_id, name, price, category_id, category_name,
+            is_available, sold_out_until, daily_cap, remaining, quantity_date,
+        ) in result.all():
+            items.append(
+                CatalogItem(
+                    menu_id=menu_id,
+                    restaurant_id=menu_restaurant_id,
+                    name=name,
+                    price=price,
+                    category_id=category_id,
+                    category_name=category_name,
+                )
+            )
+            if is_restricted(is_available, sold_out_until, daily_cap):
+                availability[menu_id] = ItemAvailability(
+                    is_available=is_available,
+                    sold_out_until=sold_out_until,
+                    daily_cap=daily_cap,
+                    remaining=remaining,
+                    quantity_date=quantity_date,
+                )
+        return items, availability
 
-    async def get_category_name(self, category_id: Optional[int]):
-        if category_id is None:
-            return None
-        category = await self.db.get(ItemCategory, category_id)
-        return category.name if category else None
+    async def consume_daily_quantities(self, quantities: dict[int, int], day: date) -> dict[int, int]:
+        """Take quantities off capped items in one conditional UPDATE; returns what is left per item.
+
+        A row is only touched when enough units remain, so concurrent orders
+        cannot oversell; items missing from the result were short. The first
+        decrement of a business day starts again from the cap.
+        """
+        qty = case(quantities, value=Menu.id)
+        available = case(
+            (Menu.quantity_business_date == day, Menu.daily_quantity_remaining),
+            else_=Menu.daily_quantity_cap,
+        )
+        result = await self.db.execute(
+            update(Menu)
+            .where(Menu.id.in_(list(quantities)), Menu.daily_quantity_cap.is_not(None), available >= qty)
+            .values(daily_quantity_remaining=available - qty, quantity_business_date=day)
+            .returning(Menu.id, Menu.daily_quantity_remaining)
+            .execution_options(synchronize_session=False)
+        )
+        return dict(result.all())
 
     async def get_table_by_id(self, table_id: int):
         return await self.db.get(RestaurantTable, table_id)
+
+    async def get_tables_by_ids(self, table_ids: set[int]) -> dict[int, RestaurantTable]:
+        if not table_ids:
+            return {}
+        result = await self.db.execute(select(RestaurantTable).where(RestaurantTable.id.in_(table_ids)))
+        return {table.id: table for table in result.scalars().all()}
+
+    async def get_existing_restaurant_ids(self, restaurant_ids: set[int]) -> set[int]:
+        if not restaurant_ids:
+            return set()
+        result = await self.db.execute(select(Restaurant.id).where(Restaurant.id.in_(restaurant_ids)))
+        return set(result.scalars().all())
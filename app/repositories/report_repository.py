@@ -0,0 +1,147 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.order_model import Order, OrderChannel
+from app.models.sales_rollup_model import SalesDailyTotal, SalesDailyItem, UNCATEGORIZED
+
+
+ORDER_MONEY_COLUMNS = ("subtotal", "tax_total", "service_charge", "discount_total", "grand_total")
+
+
+def business_date(value: Optional[datetime]) -> date:
+    """UTC calendar day an order is reported under; matches the backfill's SQL."""
+    if value is None:
+        return datetime.utcnow().date()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def additive_upsert(table, rows: list[dict], key: tuple[str, ...], counters: tuple[str, ...], replace: tuple[str, ...] = ()):
+    stmt = insert(table).values(rows)
+    set_ = {name: table.c[name] + stmt.excluded[name] for name in counters}
+    set_.update({name: stmt.excluded[name] for name in replace})
+    return stmt.on_conflict_do_update(index_elements=list(key), set_=set_)
+
+
+class ReportRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply_order(self, order: Order, completed: int, canceled: int):
+        """Add (or with negative deltas, take back) one order's contribution to the daily rollups.
+
+        Runs inside the caller's transaction so the rollups move together
+        with the status change that caused them.
+        """
+        day = business_date(order.created_at)
+        totals = {
+            "restaurant_id": order.restaurant_id,
+            "business_date": day,
+            "channel": order.channel,
+            "completed_orders": completed,
+            "canceled_orders": canceled,
+        }
+        for name in ORDER_MONEY_COLUMNS:
+            totals[name] = Decimal(str(getattr(order, name) or 0)) * completed
+        await self.db.execute(additive_upsert(
+            SalesDailyTotal.__table__,
+            [totals],
+            key=("restaurant_id", "business_date", "channel"),
+            counters=("completed_orders", "canceled_orders") + ORDER_MONEY_COLUMNS,
+        ))
+
+        if not completed or not order.items:
+            return
+        # ON CONFLICT cannot touch the same row twice in one statement, so merge repeated menu items first
+        lines: dict[tuple[str, int], dict] = {}
+        for item in order.items:
+            key = (item.category_name_snapshot or UNCATEGORIZED, item.menu_item_id or 0)
+            line = lines.setdefault(key, {
+                "restaurant_id": order.restaurant_id,
+                "business_date": day,
+                "channel": order.channel,
+                "category_name": key[0],
+                "menu_item_id": key[1],
+                "item_name": item.name_snapshot,
+                "qty": 0,
+                "sales": Decimal("0"),
+            })
+            line["qty"] += item.qty * completed
+            line["sales"] += Decimal(str(item.line_total or 0)) * completed
+        await self.db.execute(additive_upsert(
+            SalesDailyItem.__table__,
+            list(lines.values()),
+            key=("restaurant_id", "business_date", "channel", "category_name", "menu_item_id"),
+            counters=("qty", "sales"),
+            replace=("item_name",),
+        ))
+
+    async def get_daily_totals(self, restaurant_id: int, date_from: date, date_to: date, channel: Optional[OrderChannel]):
+        query = (
+            select(
+                SalesDailyTotal.business_date,
+                func.sum(SalesDailyTotal.completed_orders).label("completed_orders"),
+                func.sum(SalesDailyTotal.canceled_orders).label("canceled_orders"),
+                *(func.sum(getattr(SalesDailyTotal, name)).label(name) for name in ORDER_MONEY_COLUMNS),
+            )
+            .where(
+                SalesDailyTotal.restaurant_id == restaurant_id,
+                SalesDailyTotal.business_date >= date_from,
+                SalesDailyTotal.business_date <= date_to,
+            )
+            .group_by(SalesDailyTotal.business_date)
+            .order_by(SalesDailyTotal.business_date)
+        )
+        if channel:
+            query = query.where(SalesDailyTotal.channel == channel)
+        result = await self.db.execute(query)
+        return result.mappings().all()
+
+    async def get_channel_totals(self, restaurant_id: int, date_from: date, date_to: date):
+        result = await self.db.execute(
+            select(
+                SalesDailyTotal.channel,
+                func.sum(SalesDailyTotal.completed_orders).label("completed_orders"),
+                func.sum(SalesDailyTotal.canceled_orders).label("canceled_orders"),
+                func.sum(SalesDailyTotal.grand_total).label("grand_total"),
+            )
+            .where(
+                SalesDailyTotal.restaurant_id == restaurant_id,
+                SalesDailyTotal.business_date >= date_from,
+                SalesDailyTotal.business_date <= date_to,
+            )
+            .group_by(SalesDailyTotal.channel)
+            .order_by(SalesDailyTotal.channel)
+        )
+        return result.mappings().all()
+
+    async def get_item_sales(self, restaurant_id: int, date_from: date, date_to: date, channel: Optional[OrderChannel], by_category: bool, limit: int):
+        group_cols = [SalesDailyItem.category_name]
+        if not by_category:
+            group_cols.append(SalesDailyItem.menu_item_id)
+        query = (
+            select(
+                *group_cols,
+                *(() if by_category else (func.max(SalesDailyItem.item_name).label("item_name"),)),
+                func.sum(SalesDailyItem.qty).label("qty"),
+                func.sum(SalesDailyItem.sales).label("sales"),
+            )
+            .where(
+                SalesDailyItem.restaurant_id == restaurant_id,
+                SalesDailyItem.business_date >= date_from,
+                SalesDailyItem.business_date <= date_to,
+            )
+            .group_by(*group_cols)
+            .order_by(func.sum(SalesDailyItem.sales).desc())
+            .limit(limit)
+        )
+        if channel:
+            query = query.where(SalesDailyItem.channel == channel)
+        result = await self.db.execute(query)
+        return result.mappings().all()
@@ -1,9 +1,13 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from app.models.table_model import RestaurantTable
 from app.models.restaurant_model import Restaurant
 from app.models.table_type_model import TableType
+from app.models.order_model import Order
+from app.utils.floor_state import OPEN_ORDER_STATUSES
 
 class RestaurantTablesRepository:
     def __init__(self, session: AsyncSession):
@@ -58,11 +62,26 @@ class RestaurantTablesRepository:
         await self.session.commit()
         return table
 
-
-    
-  
-    
-    
-    
-    
-    
+    async def get_floor_rows(self, restaurant_id: int):
+        """Every table of the restaurant with its open orders folded into arrays, in one grouped query."""
+        open_order = Order.id.isnot(None)
+        result = await self.session.execute(
+            select(
+                RestaurantTable.id,
+                RestaurantTable.table_name,
+                RestaurantTable.capacity,
+                RestaurantTable.table_type_id,
+                RestaurantTable.status,
+                func.array_agg(aggregate_order_by(Order.id, Order.id)).filter(open_order).label("open_order_ids"),
+                func.array_agg(aggregate_order_by(Order.grand_total, Order.id)).filter(open_order).label("open_order_totals"),
+                func.array_agg(aggregate_order_by(Order.created_at, Order.id)).filter(open_order).label("open_order_created"),
+            )
+            .outerjoin(
+                Order,
+                (Order.table_id == RestaurantTable.id) & Order.status.in_(OPEN_ORDER_STATUSES),
+            )
+            .where(RestaurantTable.restaurant_id == restaurant_id)
+            .group_by(RestaurantTable.id)
+            .order_by(RestaurantTable.table_name, RestaurantTable.id)
+        )
+        return result.all()
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from enum import Enum
+
+from app.schema.order_schema import OrderChannelEnum
+
+
+class TicketStatusEnum(str, Enum):
+    queued = "queued"
+    firing = "firing"
+    done = "done"
+
+
+class KitchenStationCreate(BaseModel):
+    name: str
+    is_default: bool = False
+    category_ids: List[int] = Field(default_factory=list)
+
+
+class KitchenStationCategoriesUpdate(BaseModel):
+    category_ids: List[int]
+
+
+class KitchenStationRead(BaseModel):
+    id: int
+    restaurant_id: int
+    name: str
+    is_default: bool
+    category_ids: List[int]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class KitchenTicketItemRead(BaseModel):
+    order_item_id: int
+    name: str
+    qty: int
+    notes: Optional[str] = None
+
+
+class KitchenTicketRead(BaseModel):
+    id: int
+    station_id: int
+    order_id: int
+    channel: OrderChannelEnum
+    table_name: Optional[str] = None
+    items: List[KitchenTicketItemRead]
+    status: TicketStatusEnum
+    created_at: datetime
+    fired_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class KitchenQueueRead(BaseModel):
+    station_id: int
+    total: int
+    tickets: List[KitchenTicketRead]
+
+
+class KitchenTicketStatusUpdate(BaseModel):
+    status: TicketStatusEnum
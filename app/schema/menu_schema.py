@@ -1,6 +1,10 @@
-from pydantic import BaseModel
+from datetime import datetime
+from enum import Enum
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional, List
 
+from app.utils.image_variants import IMAGE_VARIANT_WIDTHS
+
 
 class MenuCreate(BaseModel):
     name: str
@@ -22,15 +26,88 @@ class MenuRead(BaseModel):
     price: float
     description: Optional[str]
     image: Optional[str]
+    image_variants: Optional[dict[str, str]] = None
     restaurant_id: int
     item_category_id: Optional[int]
+    is_available: bool = True
+    sold_out_until: Optional[datetime] = None
+    daily_quantity_cap: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+    @model_validator(mode="after")
+    def fill_image_variants(self):
+        # Serve the original for every size until the variants have been rendered
+        if self.image and not self.image_variants:
+            self.image_variants = {name: self.image for name in IMAGE_VARIANT_WIDTHS}
+        return self
+
+
+class MenuAvailabilityUpdate(BaseModel):
+    """Only the fields sent are changed; send null to clear sold_out_until or the cap."""
+    is_available: Optional[bool] = None
+    sold_out_until: Optional[datetime] = None
+    daily_quantity_cap: Optional[int] = Field(None, ge=0)
+
+
+class MenuAvailabilityRead(BaseModel):
+    id: int
+    is_available: bool
+    sold_out_until: Optional[datetime]
+    daily_quantity_cap: Optional[int]
+    daily_quantity_remaining: Optional[int]  # for the current business day
+    available_now: bool
+
+
+class MenuSearchHitRead(BaseModel):
+    id: int
+    name: str
+    price: float
+    image: Optional[str]
+    item_category_id: Optional[int]
+    category_name: Optional[str]
 
     class Config:
         from_attributes = True
 
 
 class MenuCategoryGroup(BaseModel):
-    category_id: int
+    category_id: Optional[int]  # None for the "Uncategorized" bucket
     category_name: str
     items: List[MenuRead]
+    item_count: Optional[int] = None
+
+
+class MenuTransferFormatEnum(str, Enum):
+    csv = "csv"
+    json = "json"
+
+
+class MenuImportModeEnum(str, Enum):
+    create = "create"  # every name must be new
+    upsert = "upsert"  # items whose name already exists are updated
+
+
+class MenuImportRow(BaseModel):
+    name: str = Field(min_length=1)
+    price: float = Field(ge=0)
+    category: Optional[str] = None  # created when missing; empty leaves a new item uncategorized and an existing one unchanged
+    description: Optional[str] = None
+
+    @field_validator("name", "category", "description", mode="before")
+    @classmethod
+    def strip_text(cls, value):
+        if isinstance(value, str):
+            value = value.strip()
+            return value or None
+        return value
+
+
+class MenuImportResultRead(BaseModel):
+    dry_run: bool
+    total_rows: int
+    created: int
+    updated: int
+    categories_created: List[str]
 
@@ -36,6 +36,23 @@ class PaymentMethodEnum(str, Enum):
     other = "other"
 
 
+class OrderExportFormatEnum(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class OrderCountModeEnum(str, Enum):
+    exact = "exact"
+    estimate = "estimate"
+    capped = "capped"
+    none = "none"
+
+
+class OrderViewEnum(str, Enum):
+    full = "full"
+    summary = "summary"
+
+
 class OrderItemCreate(BaseModel):
     menu_item_id: int
     qty: int = Field(gt=0)
@@ -102,12 +119,15 @@ class OrderRead(BaseModel):
     service_charge: float
     discount_total: float
     grand_total: float
+    paid_total: float
+    balance_due: float
     notes: Optional[str]
     created_at: datetime
     updated_at: datetime
     completed_at: Optional[datetime]
     canceled_at: Optional[datetime]
     cancel_reason: Optional[str]
+    version: int
     items: List[OrderItemRead]
     payments: List[OrderPaymentRead]
 
@@ -117,7 +137,52 @@ class OrderRead(BaseModel):
 
 class OrderListRead(BaseModel):
     orders: List[OrderRead]
-    total: int
+    total: Optional[int] = None
+    total_is_exact: bool = True
+    next_cursor: Optional[str] = None
+
+
+class OrderBulkCreateResult(BaseModel):
+    index: int
+    status: str
+    order: Optional[OrderRead] = None
+    error: Optional[str] = None
+
+
+class OrderBulkCreateRead(BaseModel):
+    created: int
+    failed: int
+    results: List[OrderBulkCreateResult]
+
+
+class OrderSummaryRead(BaseModel):
+    id: int
+    restaurant_id: int
+    channel: OrderChannelEnum
+    table_id: Optional[int]
+    table_name: Optional[str] = None
+    group_id: Optional[int]
+    customer_name: Optional[str]
+    customer_phone: Optional[str]
+    status: OrderStatusEnum
+    grand_total: float
+    item_count: int
+    qty_total: int
+    paid_total: float
+    balance_due: float
+    version: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class OrderSummaryListRead(BaseModel):
+    orders: List[OrderSummaryRead]
+    total: Optional[int] = None
+    total_is_exact: bool = True
+    next_cursor: Optional[str] = None
 
 
 class OrderStatusUpdate(BaseModel):
@@ -168,6 +233,15 @@ class OrderAddPayment(BaseModel):
     payment: OrderPaymentCreate
 
 
+class OrderPaymentStatusUpdate(BaseModel):
+    status: PaymentStatusEnum
+
+
+class OrderSettle(BaseModel):
+    # Final payment taken at the counter, recorded in the same transaction as the completion
+    payment: Optional[OrderPaymentCreate] = None
+
+
 class OrderCancel(BaseModel):
     reason: str
 
@@ -181,3 +255,59 @@ class OrderEventRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class GroupBillLineRead(BaseModel):
+    menu_item_id: Optional[int] = None
+    name: str
+    category_name: Optional[str] = None
+    unit_price: Optional[float] = None
+    qty: int
+    line_total: float
+
+
+class GroupBillOrderRead(BaseModel):
+    order_id: int
+    status: OrderStatusEnum
+    table_id: Optional[int] = None
+    table_name: Optional[str] = None
+    subtotal: float
+    grand_total: float
+    paid_total: float
+    balance_due: float
+    version: int
+
+
+class GroupBillRead(BaseModel):
+    restaurant_id: int
+    group_id: int
+    # "paid" when nothing is owed, "partial" once any payment landed, otherwise "unpaid"
+    payment_status: str
+    subtotal: float
+    tax_total: float
+    service_charge: float
+    discount_total: float
+    grand_total: float
+    paid_total: float
+    balance_due: float
+    lines: List[GroupBillLineRead]
+    orders: List[GroupBillOrderRead]
+
+
+class OrderGroupPay(BaseModel):
+    restaurant_id: int
+    payment: OrderPaymentCreate
+
+
+class GroupPaymentAllocationRead(BaseModel):
+    order_id: int
+    payment_id: int
+    amount: float
+    balance_due: float
+
+
+class OrderGroupPayRead(BaseModel):
+    group_id: int
+    amount: float
+    balance_due: float
+    allocations: List[GroupPaymentAllocationRead]
@@ -0,0 +1,66 @@
+from datetime import date
+from typing import List, Optional
+from pydantic import BaseModel
+from enum import Enum
+
+from app.schema.order_schema import OrderChannelEnum
+
+
+class SalesItemGroupEnum(str, Enum):
+    item = "item"
+    category = "category"
+
+
+class SalesDayRead(BaseModel):
+    business_date: date
+    completed_orders: int
+    canceled_orders: int
+    subtotal: float
+    tax_total: float
+    service_charge: float
+    discount_total: float
+    grand_total: float
+
+    class Config:
+        from_attributes = True
+
+
+class SalesChannelRead(BaseModel):
+    channel: OrderChannelEnum
+    completed_orders: int
+    canceled_orders: int
+    grand_total: float
+
+    class Config:
+        from_attributes = True
+
+
+class SalesSummaryRead(BaseModel):
+    restaurant_id: int
+    date_from: date
+    date_to: date
+    completed_orders: int
+    canceled_orders: int
+    grand_total: float
+    average_order_value: float
+    days: List[SalesDayRead]
+    channels: List[SalesChannelRead]
+
+
+class SalesItemRead(BaseModel):
+    category_name: str
+    menu_item_id: Optional[int] = None
+    item_name: Optional[str] = None
+    qty: int
+    sales: float
+
+    class Config:
+        from_attributes = True
+
+
+class SalesItemListRead(BaseModel):
+    restaurant_id: int
+    date_from: date
+    date_to: date
+    group_by: SalesItemGroupEnum
+    items: List[SalesItemRead]
@@ -1,3 +1,5 @@
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel
 
 class RestaurantTableCreate(BaseModel):
@@ -29,6 +31,23 @@ class RestaurantTableUpdate(BaseModel):
     class Config:
         from_attributes = True
 
-        
+
+class FloorTableRead(BaseModel):
+    id: int
+    table_name: str
+    capacity: int
+    table_type_id: Optional[int] = None
+    # Staff-set label such as "reserved"; occupancy is derived from open orders
+    status: Optional[str] = None
+    occupancy: str
+    open_order_ids: List[int]
+    running_total: float
+    seated_since: Optional[datetime] = None
+    seated_minutes: Optional[int] = None
 
 
+class FloorPlanRead(BaseModel):
+    restaurant_id: int
+    occupied_count: int
+    free_count: int
+    tables: List[FloorTableRead]
@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.item_category_model import ItemCategory
 from app.repositories.item_category_repository import ItemCategoryRepository
+from app.utils.catalog_cache import invalidate_catalog
 
 
 class ItemCategoryService:
@@ -24,7 +25,9 @@ class ItemCategoryService:
     
     async def create_item_category(self, data, restaurant_id: int):
         category = ItemCategory(name=data.name, restaurant_id=restaurant_id)
-        return await self.repository.create_item_category(category)
+        category = await self.repository.create_item_category(category)
+        invalidate_catalog(restaurant_id)
+        return category
     
     async def  update_item_category(self, data, item_category_id: int):
         category = await self.repository.get_item_category_by_id(item_category_id)
@@ -32,13 +35,18 @@ class ItemCategoryService:
             raise HTTPException(status_code=404, detail="Item category not found")
         if data.name is not None:
             category.name = data.name
-        return await self.repository.update_item_category(category)
+        category = await self.repository.update_item_category(category)
+        invalidate_catalog(category.restaurant_id)
+        return category
     
     async def delete_item_category(self, item_category_id: int):
         category = await self.repository.get_item_category_by_id(item_category_id)
         if not category:
             raise HTTPException(status_code=404, detail="Item category not found")
-        return await self.repository.delete_item_category(category)
+        restaurant_id = category.restaurant_id
+        category = await self.repository.delete_item_category(category)
+        invalidate_catalog(restaurant_id)
+        return category
         
         
     
@@ -0,0 +1,156 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.kitchen_model import KitchenStation, KitchenTicket, TicketStatus
+from app.models.order_model import Order, OrderItem
+from app.repositories.kitchen_repository import KitchenRepository
+from app.repositories.restaurant_repository import RestaurantRepository
+from app.schema.kitchen_schema import KitchenStationCreate, KitchenStationCategoriesUpdate, TicketStatusEnum
+from app.utils import kitchen_queue
+from app.utils.kitchen_queue import QueuedTicket
+
+logger = logging.getLogger("yummy.kitchen")
+
+
+TICKET_STATUS_FLOW = {
+    TicketStatus.queued: [TicketStatus.firing, TicketStatus.done],
+    TicketStatus.firing: [TicketStatus.done],
+    TicketStatus.done: [],
+}
+
+
+def queued_ticket(ticket: KitchenTicket) -> QueuedTicket:
+    return QueuedTicket(
+        ticket_id=ticket.id,
+        station_id=ticket.station_id,
+        order_id=ticket.order_id,
+        channel=ticket.channel,
+        table_name=ticket.table_name,
+        items=ticket.items,
+        status=ticket.status.value,
+        created_at=ticket.created_at,
+        fired_at=ticket.fired_at,
+    )
+
+
+async def build_tickets(
+    repo: KitchenRepository,
+    order: Order,
+    items: List[OrderItem],
+    quantities: Optional[dict[int, int]] = None,
+) -> List[KitchenTicket]:
+    """Split order lines into one ticket per station using the restaurant's category mapping.
+
+    Lines whose category is not mapped go to the default station; with no
+    default station they are not sent to the kitchen. quantities maps an
+    order item id to the units to fire when only part of a line is new.
+    """
+    routes = await repo.get_routes(order.restaurant_id)
+    by_category = {name.lower(): station_id for station_id, _, name in routes if name}
+    default_station = next((station_id for station_id, is_default, _ in routes if is_default), None)
+
+    quantities = quantities or {}
+    lines = defaultdict(list)
+    for item in items:
+        category = (item.category_name_snapshot or "").lower()
+        station_id = by_category.get(category, default_station)
+        if station_id is None:
+            continue
+        lines[station_id].append({"order_item_id": item.id, "name": item.name_snapshot, "qty": quantities.get(item.id, item.qty), "notes": item.notes})
+
+    now = datetime.utcnow()
+    return [
+        KitchenTicket(
+            restaurant_id=order.restaurant_id,
+            station_id=station_id,
+            order_id=order.id,
+            channel=order.channel,
+            table_name=order.table_name,
+            items=station_lines,
+            status=TicketStatus.queued,
+            created_at=now,
+        )
+        for station_id, station_lines in lines.items()
+    ]
+
+
+class KitchenService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = KitchenRepository(db)
+        self.restaurant_repo = RestaurantRepository(db)
+
+    async def _get_station(self, station_id: int) -> KitchenStation:
+        station = await self.repo.get_station(station_id)
+        if not station:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Kitchen station not found")
+        return station
+
+    async def _check_categories(self, restaurant_id: int, category_ids: List[int]):
+        found = await self.repo.get_categories(restaurant_id, category_ids) if category_ids else set()
+        missing = set(category_ids) - found
+        if missing:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown item categories: {sorted(missing)}")
+
+    async def create_station(self, restaurant_id: int, data: KitchenStationCreate):
+        restaurant = await self.restaurant_repo.get_by_id(restaurant_id)
+        if not restaurant:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Restaurant not found")
+        await self._check_categories(restaurant_id, data.category_ids)
+        if data.is_default:
+            await self.repo.clear_default_station(restaurant_id)
+        station = KitchenStation(restaurant_id=restaurant_id, name=data.name, is_default=data.is_default)
+        await self.repo.replace_station_categories(station, data.category_ids)
+        return await self.repo.create_station(station)
+
+    async def get_stations(self, restaurant_id: int):
+        return await self.repo.get_stations(restaurant_id)
+
+    async def update_station_categories(self, station_id: int, data: KitchenStationCategoriesUpdate):
+        station = await self._get_station(station_id)
+        await self._check_categories(station.restaurant_id, data.category_ids)
+        await self.repo.replace_station_categories(station, data.category_ids)
+        await self.repo.commit()
+        await self.repo.refresh(station)
+        return station
+
+    async def get_station_queue(self, station_id: int, limit: int):
+        queue = kitchen_queue.get_station_queue(station_id)
+        if queue is None:
+            await self._get_station(station_id)
+            tickets = await self.repo.get_open_tickets(station_id)
+            queue = kitchen_queue.load_station_queue(station_id, (queued_ticket(t) for t in tickets))
+        return {"station_id": station_id, "total": len(queue), "tickets": queue.head(limit)}
+
+    async def update_ticket_status(self, ticket_id: int, new_status: TicketStatusEnum):
+        ticket = await self.repo.get_ticket(ticket_id)
+        if not ticket:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+        target = TicketStatus(new_status.value)
+        if target not in TICKET_STATUS_FLOW.get(ticket.status, []):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ticket status transition")
+        ticket.status = target
+        now = datetime.utcnow()
+        if target == TicketStatus.firing:
+            ticket.fired_at = now
+        if target == TicketStatus.done:
+            ticket.done_at = now
+        await self.repo.commit()
+        if target == TicketStatus.done:
+            kitchen_queue.remove_ticket(ticket.station_id, ticket.id)
+        else:
+            kitchen_queue.push_ticket(queued_ticket(ticket))
+        return ticket
+
+
+async def rebuild_kitchen_queues():
+    """Load every open ticket into the station queues; run at startup."""
+    async with AsyncSessionLocal() as session:
+        tickets = await KitchenRepository(session).get_open_tickets()
+        kitchen_queue.rebuild(queued_ticket(t) for t in tickets)
+    logger.info("Kitchen queues rebuilt with %s open tickets", len(tickets))
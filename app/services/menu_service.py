@@ -1,100 +1,81 @@
-import os
-from pathlib import Path
-from uuid import uuid4
-from urllib.parse import urlparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
 from fastapi import HTTPException, UploadFile, status
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
 
 from app.models.menu_model import Menu
-from app.models.item_category_model import ItemCategory
 from app.repositories.menu_repository import MenuRepository
+from app.repositories.report_repository import business_date
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.schema.base_response import BaseResponse
+from app.schema.menu_schema import (
+    MenuAvailabilityUpdate,
+    MenuRead,
+    MenuCategoryGroup,
+    MenuImportModeEnum,
+    MenuImportRow,
+    MenuTransferFormatEnum,
+)
+from app.utils import menu_cache
+from app.utils.catalog_cache import ItemAvailability, catalog_version, invalidate_catalog
+from app.utils.image_storage import BASE_DIR, UPLOAD_DIR, get_image_storage
+from app.utils.image_upload import stage_image_upload
+from app.utils.image_variants import remove_image_variants, render_image_variants
+from app.utils.menu_cache import MenuCacheEntry
+from app.utils.menu_search import (
+    MenuSearchItem,
+    advance_search_index,
+    get_search_index,
+    index_menu_item,
+    store_search_index,
+    unindex_menu_item,
+)
+from app.utils.menu_transfer import encode_menu_csv, encode_menu_json, parse_menu_csv, parse_menu_json
 
+logger = logging.getLogger("yummy.menu")
 
-# Keep uploads under the app directory to align with the StaticFiles mount in main.py (local fallback)
-BASE_DIR = Path(__file__).resolve().parents[1]
-UPLOAD_DIR = BASE_DIR / "uploads" / "menu"
+# Bucket for items whose category was deleted (item_category_id is SET NULL)
+UNCATEGORIZED_NAME = "Uncategorized"
+
+# Variant rendering tasks in flight, held so they are not garbage collected mid-run
+_VARIANT_TASKS: set[asyncio.Task] = set()
 
 
 class MenuService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.repo = MenuRepository(db)
-        # Force local storage for now; flip to True with config when ready to use S3 again
-        self.use_s3 = False
-        self.s3_client = None
-        if self.use_s3:
-            try:
-                import boto3  # Lazy import so local-only setups don't require boto3
-            except ImportError:
-                raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="boto3 not installed")
-
-            self.s3_client = boto3.client(
-                "s3",
-                region_name=settings.AWS_S3_REGION,
-                endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-            )
+        self.storage = get_image_storage()
 
     async def _save_image(self, image: UploadFile | None) -> str | None:
         if not image:
             return None
-        ext = Path(image.filename).suffix or ""
-        filename = f"{uuid4().hex}{ext}"
-        content = await image.read()
-
-        if self.use_s3 and self.s3_client:
-            key = f"menu/{filename}"
-            self.s3_client.put_object(
-                Bucket=settings.AWS_S3_BUCKET,
-                Key=key,
-                Body=content,
-                ContentType=image.content_type or "application/octet-stream",
-                ACL="public-read",
-            )
-            return self._build_public_url(key)
-        else:
-            UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-            file_path = UPLOAD_DIR / filename
-            file_path.write_bytes(content)
-            return str(Path("uploads") / "menu" / filename)
+        # Streamed to a temp file off the event loop and named by content hash,
+        # so the same photo uploaded for several items or branches is stored once
+        staged = await stage_image_upload(image, UPLOAD_DIR)
+        filename = f"{staged.digest}{staged.extension}"
+        return await self.storage.save(staged, filename)
 
     async def _remove_image(self, path: str | None):
+        """Delete a stored image once no menu item refers to it. Call after the referencing change is committed."""
         if not path:
             return
-        # If using S3 and the path is a URL or key
-        if self.use_s3 and self.s3_client:
-            key = self._extract_key(path)
-            if key:
-                try:
-                    self.s3_client.delete_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
-                except Exception:
-                    pass
+        if await self.repo.count_image_references(path):
             return
+        await self.storage.delete(path)
 
-        # Local removal
-        absolute_path = (BASE_DIR / path).resolve()
-        if absolute_path.exists():
-            try:
-                os.remove(absolute_path)
-            except OSError:
-                pass
-
-    def _build_public_url(self, key: str) -> str:
-        if settings.AWS_S3_PUBLIC_URL_PREFIX:
-            return f"{settings.AWS_S3_PUBLIC_URL_PREFIX.rstrip('/')}/{key}"
-        if settings.AWS_S3_ENDPOINT_URL:
-            return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{key}"
-        if settings.AWS_S3_REGION:
-            return f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_S3_REGION}.amazonaws.com/{key}"
-        return f"https://{settings.AWS_S3_BUCKET}.s3.amazonaws.com/{key}"
-
-    def _extract_key(self, path: str) -> str | None:
-        # If already looks like a key (no scheme), return as-is
-        if not path.startswith("http"):
-            return path.lstrip("/")
-        parsed = urlparse(path)
-        return parsed.path.lstrip("/") if parsed.path else None
+    def _schedule_image_variants(self, menu: Menu):
+        # Only local files are rendered; S3 images keep serving the original
+        if not menu.image or not self.storage.renders_variants:
+            return
+        task = asyncio.create_task(derive_image_variants(menu.id, menu.restaurant_id, menu.image))
+        _VARIANT_TASKS.add(task)
+        task.add_done_callback(_VARIANT_TASKS.discard)
 
     async def create_menu(self, restaurant_id: int, data, image: UploadFile | None = None):
         await self.repo.ensure_restaurant(restaurant_id)
@@ -110,7 +91,12 @@ class MenuService:
             restaurant_id=restaurant_id,
             item_category_id=data.item_category_id,
         )
-        return await self.repo.create_menu(menu)
+        menu = await self.repo.create_menu(menu)
+        previous_version = catalog_version(restaurant_id)
+        invalidate_catalog(restaurant_id)
+        index_menu_item(previous_version, menu)
+        self._schedule_image_variants(menu)
+        return menu
 
     async def update_menu(self, menu_id: int, data, image: UploadFile | None = None):
         menu = await self.repo.get_menu_by_id(menu_id)
@@ -127,21 +113,94 @@ class MenuService:
             await self.repo.ensure_category(data.item_category_id, menu.restaurant_id)
             menu.item_category_id = data.item_category_id
 
+        old_image = None
         if image is not None:
             new_path = await self._save_image(image)
-            await self._remove_image(menu.image)
-            menu.image = new_path
+            if new_path != menu.image:
+                old_image = menu.image
+                menu.image = new_path
+                menu.image_variants = None
 
-        return await self.repo.update_menu(menu)
+        menu = await self.repo.update_menu(menu)
+        previous_version = catalog_version(menu.restaurant_id)
+        invalidate_catalog(menu.restaurant_id)
+        index_menu_item(previous_version, menu)
+        if old_image is not None:
+            await self._remove_image(old_image)
+        if image is not None:
+            self._schedule_image_variants(menu)
+        return menu
 
     async def delete_menu(self, menu_id: int):
         menu = await self.repo.get_menu_by_id(menu_id)
         if not menu:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Menu item not found")
-        await self._remove_image(menu.image)
+        restaurant_id = menu.restaurant_id
+        image = menu.image
         await self.repo.delete_menu(menu)
+        previous_version = catalog_version(restaurant_id)
+        invalidate_catalog(restaurant_id)
+        unindex_menu_item(previous_version, restaurant_id, menu_id)
+        await self._remove_image(image)
         return {"message": "Menu item deleted successfully"}
 
+    async def update_availability(self, menu_id: int, data: MenuAvailabilityUpdate):
+        menu = await self.repo.get_menu_by_id(menu_id)
+        if not menu:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Menu item not found")
+
+        fields = data.model_fields_set
+        if data.is_available is not None:
+            menu.is_available = data.is_available
+        if "sold_out_until" in fields:
+            menu.sold_out_until = data.sold_out_until
+        today = business_date(datetime.now(timezone.utc))
+        if "daily_quantity_cap" in fields:
+            # Units already sold today still count against a changed cap
+            sold = 0
+            if menu.daily_quantity_cap is not None and menu.quantity_business_date == today:
+                sold = menu.daily_quantity_cap - (menu.daily_quantity_remaining or 0)
+            menu.daily_quantity_cap = data.daily_quantity_cap
+            if data.daily_quantity_cap is None:
+                menu.daily_quantity_remaining = None
+                menu.quantity_business_date = None
+            else:
+                menu.daily_quantity_remaining = max(data.daily_quantity_cap - sold, 0)
+                menu.quantity_business_date = today
+
+        menu = await self.repo.update_menu(menu)
+        previous_version = catalog_version(menu.restaurant_id)
+        invalidate_catalog(menu.restaurant_id)
+        # Availability is not searchable; the index stays valid
+        advance_search_index(menu.restaurant_id, previous_version)
+        return self._availability_read(menu, today)
+
+    def _availability_read(self, menu: Menu, today) -> dict:
+        state = ItemAvailability(
+            is_available=menu.is_available,
+            sold_out_until=menu.sold_out_until,
+            daily_cap=menu.daily_quantity_cap,
+            remaining=menu.daily_quantity_remaining,
+            quantity_date=menu.quantity_business_date,
+        )
+        remaining = state.remaining_on(today)
+        sold_out_until = state.sold_out_until
+        if sold_out_until is not None and sold_out_until.tzinfo is None:
+            sold_out_until = sold_out_until.replace(tzinfo=timezone.utc)
+        available_now = (
+            state.is_available
+            and (sold_out_until is None or sold_out_until <= datetime.now(timezone.utc))
+            and (remaining is None or remaining > 0)
+        )
+        return {
+            "id": menu.id,
+            "is_available": menu.is_available,
+            "sold_out_until": menu.sold_out_until,
+            "daily_quantity_cap": menu.daily_quantity_cap,
+            "daily_quantity_remaining": remaining,
+            "available_now": available_now,
+        }
+
     async def get_menu_by_id(self, menu_id: int):
         menu = await self.repo.get_menu_by_id(menu_id)
         if not menu:
@@ -154,19 +213,210 @@ class MenuService:
             await self.repo.ensure_category(category_id, restaurant_id)
         return await self.repo.get_menus_by_restaurant(restaurant_id, category_id)
 
-    async def get_menus_grouped_by_category(self, restaurant_id: int):
+    async def get_menus_grouped_by_category(self, restaurant_id: int, with_counts: bool = False):
         await self.repo.ensure_restaurant(restaurant_id)
-        categories_result = await self.db.execute(
-            select(ItemCategory).where(ItemCategory.restaurant_id == restaurant_id)
-        )
-        categories = categories_result.scalars().all()
+        rows = await self.repo.get_grouped_menu_rows(restaurant_id)
 
+        # Rows arrive ordered by category, so each group is closed as soon as the next one starts
         groups = []
-        for category in categories:
-            menus = await self.repo.get_menus_by_restaurant(restaurant_id, category.id)
-            groups.append({
-                "category_id": category.id,
-                "category_name": category.name,
-                "items": menus
-            })
+        current = None
+        for category_id, category_name, menu in rows:
+            if current is None or current["category_id"] != category_id:
+                current = {
+                    "category_id": category_id,
+                    "category_name": category_name if category_id is not None else UNCATEGORIZED_NAME,
+                    "items": [],
+                }
+                groups.append(current)
+            if menu is not None:
+                current["items"].append(menu)
+        if with_counts:
+            for group in groups:
+                group["item_count"] = len(group["items"])
         return groups
+
+    async def search_menu(self, restaurant_id: int, query: str, limit: int):
+        if not (query or "").strip():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query is required")
+        index = get_search_index(restaurant_id)
+        if index is None:
+            version = catalog_version(restaurant_id)
+            await self.repo.ensure_restaurant(restaurant_id)
+            categories, rows = await self.repo.get_search_rows(restaurant_id)
+            index = store_search_index(restaurant_id, version, categories, (MenuSearchItem(**row) for row in rows))
+        return index.search(query, limit)
+
+    async def import_menu(
+        self,
+        restaurant_id: int,
+        upload: UploadFile,
+        import_format: Optional[MenuTransferFormatEnum],
+        mode: MenuImportModeEnum,
+        dry_run: bool,
+    ):
+        """Validate every row first, then write the whole file in one transaction.
+
+        Any invalid row rejects the import with a 422 that lists all problems,
+        so nothing is half-applied. A dry run stops after validation.
+        """
+        await self.repo.ensure_restaurant(restaurant_id)
+        content = await upload.read(settings.MENU_IMPORT_MAX_BYTES + 1)
+        if len(content) > settings.MENU_IMPORT_MAX_BYTES:
+            raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="Import file is too large")
+        if import_format is None:
+            is_json = (upload.filename or "").lower().endswith(".json") or "json" in (upload.content_type or "")
+            import_format = MenuTransferFormatEnum.json if is_json else MenuTransferFormatEnum.csv
+        try:
+            if import_format == MenuTransferFormatEnum.json:
+                raw_rows = parse_menu_json(content)
+            else:
+                raw_rows = parse_menu_csv(content)
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Could not read the file as {import_format.value}")
+        if not raw_rows:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Import file has no rows")
+        if len(raw_rows) > settings.MENU_IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Import is limited to {settings.MENU_IMPORT_MAX_ROWS} rows")
+
+        # Report CSV rows by file line (after the header) and JSON rows by position
+        first_line = 2 if import_format == MenuTransferFormatEnum.csv else 1
+        existing = await self.repo.get_menu_ids_by_name(restaurant_id)
+        errors = []
+        rows = []
+        seen = {}
+        for index, raw in enumerate(raw_rows):
+            line = index + first_line
+            try:
+                row = MenuImportRow.model_validate(raw)
+            except ValidationError as exc:
+                for error in exc.errors():
+                    field = ".".join(str(part) for part in error["loc"])
+                    errors.append({"field": f"row {line}: {field}", "error": error["msg"]})
+                continue
+            key = row.name.lower()
+            if key in seen:
+                errors.append({"field": f"row {line}: name", "error": f"Duplicate of row {seen[key]}"})
+                continue
+            if mode == MenuImportModeEnum.create and key in existing:
+                errors.append({"field": f"row {line}: name", "error": "A menu item with this name already exists"})
+                continue
+            seen[key] = line
+            rows.append(row)
+        if errors:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+                detail={"message": f"Import rejected: {len(errors)} invalid rows", "errors": errors[:100]},
+            )
+
+        category_ids = await self.repo.get_category_ids_by_name(restaurant_id)
+        new_categories = {}
+        inserts = []
+        updates = []
+        for row in rows:
+            category = row.category.lower() if row.category else None
+            if category and category not in category_ids:
+                new_categories.setdefault(category, row.category)
+            # Blank optional fields leave an existing item's value alone
+            values = {"name": row.name, "price": row.price}
+            if category is not None:
+                values["category"] = category
+            if row.description is not None:
+                values["description"] = row.description
+            menu_id = existing.get(row.name.lower())
+            if menu_id is None:
+                inserts.append({"category": None, "description": None} | values)
+            else:
+                updates.append({"id": menu_id} | values)
+
+        result = {
+            "dry_run": dry_run,
+            "total_rows": len(rows),
+            "created": len(inserts),
+            "updated": len(updates),
+            "categories_created": list(new_categories.values()),
+        }
+        if dry_run:
+            return result
+        await self.repo.import_menu_rows(
+            restaurant_id,
+            category_ids,
+            list(new_categories.values()),
+            inserts,
+            updates,
+            settings.MENU_IMPORT_BATCH_SIZE,
+        )
+        invalidate_catalog(restaurant_id)
+        return result
+
+    async def export_menu(self, restaurant_id: int, export_format: MenuTransferFormatEnum):
+        await self.repo.ensure_restaurant(restaurant_id)
+        partitions = self.repo.stream_menu_rows(restaurant_id, settings.MENU_EXPORT_BATCH_SIZE)
+        if export_format == MenuTransferFormatEnum.json:
+            return encode_menu_json(partitions)
+        return encode_menu_csv(partitions)
+
+    async def _cached_response(self, restaurant_id: int, view: str, category_id: Optional[int], render: Callable[[], Awaitable[bytes]]) -> MenuCacheEntry:
+        entry = menu_cache.get_menu_response(restaurant_id, view, category_id)
+        if entry is not None:
+            return entry
+        # Read the version before the rows so a concurrent write can only make the entry look older
+        version = catalog_version(restaurant_id)
+        body = await render()
+        return menu_cache.store_menu_response(restaurant_id, view, category_id, version, body)
+
+    async def get_public_menu(self, restaurant_id: int, category_id: int | None = None) -> MenuCacheEntry:
+        async def render() -> bytes:
+            menus = await self.get_menus_by_restaurant(restaurant_id, category_id)
+            response = BaseResponse[list[MenuRead]](status="success", message=f"{len(menus)} menu items fetched", data=menus)
+            return response.model_dump_json().encode()
+
+        return await self._cached_response(restaurant_id, "list", category_id, render)
+
+    async def get_public_grouped_menu(self, restaurant_id: int, with_counts: bool = False) -> MenuCacheEntry:
+        async def render() -> bytes:
+            groups = await self.get_menus_grouped_by_category(restaurant_id, with_counts)
+            response = BaseResponse[list[MenuCategoryGroup]](
+                status="success",
+                message="Menu items grouped by category fetched successfully",
+                data=groups,
+            )
+            return response.model_dump_json().encode()
+
+        view = "grouped_counts" if with_counts else "grouped"
+        return await self._cached_response(restaurant_id, view, None, render)
+
+
+async def derive_image_variants(menu_id: int, restaurant_id: int, image_path: str):
+    """Render the thumb/card/full variants of a menu image and record them on the item."""
+    try:
+        variants = await render_image_variants(BASE_DIR, image_path)
+        async with AsyncSessionLocal() as session:
+            repo = MenuRepository(session)
+            applied = await repo.set_image_variants(menu_id, image_path, variants)
+            # The image changed while rendering; drop the files unless another item shares them
+            orphaned = not applied and not await repo.count_image_references(image_path)
+    except Exception:
+        logger.exception("Rendering image variants failed for menu item %s", menu_id)
+        return
+    if applied:
+        previous_version = catalog_version(restaurant_id)
+        invalidate_catalog(restaurant_id)
+        # Variants are not searchable; the index stays valid
+        advance_search_index(restaurant_id, previous_version)
+    elif orphaned:
+        await run_in_threadpool(remove_image_variants, BASE_DIR, image_path)
+
+
+async def warm_menu_cache():
+    """Render the public menus of the busiest restaurants so the first QR scans after a deploy hit the cache."""
+    since = datetime.utcnow() - timedelta(days=settings.MENU_CACHE_WARM_DAYS)
+    try:
+        async with AsyncSessionLocal() as session:
+            service = MenuService(session)
+            restaurant_ids = await service.repo.get_active_restaurant_ids(since, settings.MENU_CACHE_WARM_LIMIT)
+            for restaurant_id in restaurant_ids:
+                await service.get_public_menu(restaurant_id)
+                await service.get_public_grouped_menu(restaurant_id)
+        logger.info("Warmed public menu cache for %s restaurants", len(restaurant_ids))
+    except Exception:
+        logger.exception("Menu cache warm-up failed")
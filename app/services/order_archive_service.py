@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.repositories.order_archive_repository import OrderArchiveRepository
+from app.models.order_model import OrderStatus, OrderChannel
+from app.schema.order_schema import OrderStatusEnum
+from app.utils.pagination import encode_cursor, decode_cursor
+
+logger = logging.getLogger("yummy.archive")
+
+
+def archive_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(days=settings.ORDER_ARCHIVE_AFTER_DAYS)
+
+
+class OrderArchiveService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = OrderArchiveRepository(db)
+
+    async def archive_closed_orders(self, max_batches: Optional[int] = None) -> int:
+        """Move completed/canceled orders older than the cutoff to the archive tables, one batch per transaction."""
+        cutoff = archive_cutoff()
+        moved = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            try:
+                order_ids = await self.repo.lock_archivable_ids(cutoff, settings.ORDER_ARCHIVE_BATCH_SIZE)
+                if not order_ids:
+                    await self.repo.rollback()
+                    break
+                await self.repo.move_orders(order_ids)
+                await self.repo.commit()
+            except Exception:
+                await self.repo.rollback()
+                raise
+            moved += len(order_ids)
+            batches += 1
+        return moved
+
+    async def get_history(self, restaurant_id: int, date_from: Optional[datetime], date_to: Optional[datetime], status_filter: Optional[List[OrderStatusEnum]], channel: Optional[str], limit: int, cursor: Optional[str] = None):
+        if date_from and date_to and date_from >= date_to:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must be before date_to")
+        status_values = [OrderStatus(s.value) for s in status_filter] if status_filter else None
+        channel_value = None
+        if channel:
+            try:
+                channel_value = OrderChannel(channel)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid channel")
+        # Only reach into the archive when the requested range starts before the cutoff
+        include_archive = date_from is None or date_from < archive_cutoff()
+        after = decode_cursor(cursor) if cursor else None
+        orders, has_more = await self.repo.get_history(
+            restaurant_id, date_from, date_to, status_values, channel_value, include_archive, limit, after
+        )
+        next_cursor = None
+        if has_more and orders:
+            next_cursor = encode_cursor(orders[-1]["created_at"], orders[-1]["id"])
+        return {"orders": orders, "total": None, "total_is_exact": False, "next_cursor": next_cursor}
+
+
+async def run_order_archiver():
+    """Background loop started from app startup when ORDER_ARCHIVE_ENABLED is set."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                moved = await OrderArchiveService(session).archive_closed_orders()
+            if moved:
+                logger.info("Archived %s closed orders", moved)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Order archiving failed")
+        await asyncio.sleep(settings.ORDER_ARCHIVE_INTERVAL_SECONDS)
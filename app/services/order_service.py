@@ -1,11 +1,26 @@
-from datetime import datetime
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from functools import wraps
 from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Optional
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 
+from app.core.config import settings
 from app.repositories.order_repository import OrderRepository
 from app.repositories.restaurant_repository import RestaurantRepository
+from app.repositories.report_repository import ReportRepository, business_date
+from app.repositories.kitchen_repository import KitchenRepository
+from app.services.kitchen_service import build_tickets, queued_ticket
+from app.utils import catalog_cache
+from app.utils.catalog_cache import CatalogItem
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.order_feed import ORDER_FEED, build_delta
+from app.utils.order_export import encode_csv, encode_ndjson
+from app.utils import floor_state, kitchen_queue, order_read_cache
+from app.utils.etag import order_etag, etag_matches
+from app.services.order_archive_service import archive_cutoff
 from app.models.order_model import (
     Order,
     OrderItem,
@@ -13,12 +28,17 @@ from app.models.order_model import (
     OrderEvent,
     OrderStatus,
     OrderChannel,
+    PaymentMethod,
     PaymentStatus,
 )
+from app.models.kitchen_model import KitchenTicket
 from app.schema.order_schema import (
     OrderCreate,
     OrderStatusEnum,
     OrderChannelEnum,
+    OrderCountModeEnum,
+    OrderExportFormatEnum,
+    OrderViewEnum,
     PaymentStatusEnum,
     PaymentMethodEnum,
     OrderUpdate,
@@ -32,6 +52,10 @@ from app.schema.order_schema import (
     OrderAddPayment,
     OrderCancel,
     OrderItemCreate,
+    OrderPaymentCreate,
+    OrderSettle,
+    OrderGroupPay,
+    OrderRead,
 )
 
 
@@ -44,12 +68,108 @@ STATUS_FLOW = {
     OrderStatus.canceled: [],
 }
 
+# Payments are recorded as pending or success; failures and refunds are follow-up transitions
+INITIAL_PAYMENT_STATUSES = (PaymentStatus.pending, PaymentStatus.success)
+PAYMENT_STATUS_FLOW = {
+    PaymentStatus.pending: [PaymentStatus.success, PaymentStatus.failed],
+    PaymentStatus.success: [PaymentStatus.refunded],
+    PaymentStatus.failed: [],
+    PaymentStatus.refunded: [],
+}
+
+
+def retry_on_conflict(method):
+    """Re-run an order mutation when its version compare-and-swap loses to a concurrent edit."""
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        attempts = settings.ORDER_CONFLICT_RETRIES + 1
+        for attempt in range(attempts):
+            try:
+                return await method(self, *args, **kwargs)
+            except StaleDataError:
+                if attempt + 1 == attempts:
+                    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order was modified concurrently, please retry")
+    return wrapper
+
 
 class OrderService:
     def __init__(self, db: AsyncSession):
         self.db = db
         self.repo = OrderRepository(db)
         self.restaurant_repo = RestaurantRepository(db)
+        self.report_repo = ReportRepository(db)
+        self.kitchen_repo = KitchenRepository(db)
+        self._staged_events: List[tuple[int, OrderEvent]] = []
+        self._touched_orders: dict[int, Order] = {}
+        self._staged_tickets: List[KitchenTicket] = []
+        self._staged_stock: List[tuple[int, date, dict[int, int]]] = []
+
+    @asynccontextmanager
+    async def _unit_of_work(self, *orders: Order):
+        """Stage order changes and events, then write them in a single transaction.
+
+        Nothing inside the block commits; rows are flushed together on exit so
+        events land in one batched insert and loaded objects stay usable
+        without a refresh round trip. Each existing order passed in gets its
+        version bumped, which makes the commit a compare-and-swap against the
+        version that was loaded. Post-commit side effects run only once the
+        transaction has succeeded.
+        """
+        self._staged_events = []
+        self._touched_orders = {order.id: order for order in orders}
+        self._staged_tickets = []
+        self._staged_stock = []
+        try:
+            for order in orders:
+                order.version += 1
+            yield
+            await self.repo.commit()
+        except Exception:
+            await self.repo.rollback()
+            raise
+        await self._after_commit()
+
+    def _stage_event(self, order: Order, event: str, payload: dict | None, actor_id: Optional[int]):
+        ev = self.repo.stage_event(order.id, event, payload, actor_id)
+        self._staged_events.append((order.restaurant_id, ev))
+        self._touched_orders[order.id] = order
+        return ev
+
+    async def _record_sales(self, order: Order, previous_status: OrderStatus):
+        """Keep the daily sales rollups in step with a completed/canceled transition."""
+        if order.status == OrderStatus.completed and previous_status != OrderStatus.completed:
+            await self.report_repo.apply_order(order, completed=1, canceled=0)
+        elif order.status == OrderStatus.canceled and previous_status != OrderStatus.canceled:
+            # Canceling an already completed order takes its sales back out
+            completed = -1 if previous_status == OrderStatus.completed else 0
+            await self.report_repo.apply_order(order, completed=completed, canceled=1)
+
+    async def _send_to_kitchen(self, order: Order, items: List[OrderItem], quantities: Optional[dict[int, int]] = None):
+        """Route lines of an accepted order to station tickets; items must already have ids.
+
+        quantities maps an item id to the units to fire when a line only grew.
+        """
+        if not items:
+            return
+        tickets = await build_tickets(self.kitchen_repo, order, items, quantities)
+        self.kitchen_repo.add_tickets(tickets)
+        self._staged_tickets.extend(tickets)
+
+    async def _after_commit(self):
+        stock, self._staged_stock = self._staged_stock, []
+        for restaurant_id, day, remaining in stock:
+            catalog_cache.record_remaining(restaurant_id, day, remaining)
+        staged, self._staged_events = self._staged_events, []
+        touched, self._touched_orders = self._touched_orders, {}
+        order_read_cache.invalidate_orders(touched)
+        for order in touched.values():
+            floor_state.apply_order(order)
+            if order.status == OrderStatus.canceled:
+                kitchen_queue.drop_order(order.id)
+        tickets, self._staged_tickets = self._staged_tickets, []
+        for ticket in tickets:
+            kitchen_queue.push_ticket(queued_ticket(ticket))
+        await ORDER_FEED.publish(build_delta(restaurant_id, ev) for restaurant_id, ev in staged)
 
     def _dec(self, value) -> Decimal:
         return Decimal(str(value or 0))
@@ -70,31 +190,77 @@ class OrderService:
     def _find_item(self, order: Order, item_id: int) -> OrderItem | None:
         return next((i for i in order.items if i.id == item_id), None)
 
-    async def _get_order_for_update(self, order_id: int):
-        order = await self.repo.get_order_for_update(order_id)
-        if not order:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    async def _get_order_for_mutation(self, order_id: int, expected_version: Optional[int]):
+        order = await self.get_order(order_id)
+        if expected_version is not None and order.version != expected_version:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Order has been modified since it was read")
         return order
 
-    async def _get_menu_lookup(self, restaurant_id: int, menu_ids: List[int]):
+    async def _load_catalog(self, restaurant_id: int):
+        version = catalog_cache.catalog_version(restaurant_id)
+        items, availability = await self.repo.get_catalog_items(restaurant_id)
+        return catalog_cache.store_snapshot(restaurant_id, version, items, availability)
+
+    async def _get_menu_lookup(self, restaurant_id: int, menu_ids: List[int], quantities: Optional[dict[int, int]] = None) -> dict[int, CatalogItem]:
+        """Resolve menu ids against the restaurant's cached catalog snapshot.
+
+        A fresh snapshot answers without touching the database; an unknown id
+        forces one reload in case the item was created after the snapshot.
+        When quantities are given, each is checked against the item's
+        availability in the same snapshot.
+        """
         if not menu_ids:
             return {}
-        menu_models = await self.repo.get_menu_items(menu_ids)
-        menu_map = {m.id: m for m in menu_models}
-        if len(menu_map) != len(set(menu_ids)):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid menu item")
-        category_cache: dict[int | None, Optional[str]] = {}
-        lookup = {}
-        for menu_id, menu in menu_map.items():
-            if menu.restaurant_id != restaurant_id:
+        snapshot = catalog_cache.get_snapshot(restaurant_id)
+        if snapshot is None:
+            snapshot = await self._load_catalog(restaurant_id)
+        wanted = set(menu_ids)
+        if not wanted.issubset(snapshot.items):
+            snapshot = await self._load_catalog(restaurant_id)
+            if not wanted.issubset(snapshot.items):
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Menu item not found for restaurant")
-            if menu.item_category_id not in category_cache:
-                category_cache[menu.item_category_id] = await self.repo.get_category_name(menu.item_category_id)
-            lookup[menu_id] = {
-                "menu": menu,
-                "category_name": category_cache[menu.item_category_id],
-            }
-        return lookup
+        if quantities:
+            self._ensure_available(snapshot, quantities)
+        return {menu_id: snapshot.items[menu_id] for menu_id in wanted}
+
+    def _ensure_available(self, snapshot: catalog_cache.CatalogSnapshot, quantities: dict[int, int]):
+        now = datetime.now(timezone.utc)
+        day = business_date(now)
+        for menu_id, qty in quantities.items():
+            reason = catalog_cache.unavailable_reason(snapshot, menu_id, qty, now, day)
+            if reason is not None:
+                name = snapshot.items[menu_id].name
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"{name} {reason}")
+
+    def _item_quantities(self, items: List[OrderItem]) -> dict[int, int]:
+        quantities: dict[int, int] = {}
+        for itm in items:
+            if itm.menu_item_id is not None:
+                quantities[itm.menu_item_id] = quantities.get(itm.menu_item_id, 0) + itm.qty
+        return quantities
+
+    async def _consume_stock(self, restaurant_id: int, quantities: dict[int, int]):
+        """Decrement daily caps for everything ordered in this unit of work with one UPDATE.
+
+        Only capped items are sent, so uncapped menus cost no query. A cap
+        exhausted by a concurrent order since the availability check fails the
+        whole unit of work.
+        """
+        if not quantities:
+            return
+        snapshot = catalog_cache.get_snapshot(restaurant_id)
+        if snapshot is None:
+            snapshot = await self._load_catalog(restaurant_id)
+        capped = snapshot.capped_ids
+        wanted = {menu_id: qty for menu_id, qty in quantities.items() if qty > 0 and menu_id in capped}
+        if not wanted:
+            return
+        day = business_date(datetime.now(timezone.utc))
+        remaining = await self.repo.consume_daily_quantities(wanted, day)
+        short = [snapshot.items[menu_id].name for menu_id in wanted if menu_id not in remaining]
+        if short:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Sold out for today: {', '.join(short)}")
+        self._staged_stock.append((restaurant_id, day, remaining))
 
     def _merge_items_payload(self, items_payload: List[OrderItemUpsert] | List[OrderItemCreate]):
         merged: dict[int, dict[str, Optional[str] | int]] = {}
@@ -108,23 +274,19 @@ class OrderService:
         return merged
 
     async def _validate_menu_items(self, restaurant_id: int, items_payload) -> List[OrderItem]:
-        menu_ids = [i.menu_item_id for i in items_payload]
-        menu_models = await self.repo.get_menu_items(menu_ids)
-        menu_map = {m.id: m for m in menu_models}
-        if len(menu_map) != len(menu_ids):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid menu item")
+        quantities: dict[int, int] = {}
+        for itm in items_payload:
+            quantities[itm.menu_item_id] = quantities.get(itm.menu_item_id, 0) + itm.qty
+        menu_map = await self._get_menu_lookup(restaurant_id, list(quantities), quantities)
 
         order_items: List[OrderItem] = []
         for itm in items_payload:
-            menu = menu_map.get(itm.menu_item_id)
-            if not menu or menu.restaurant_id != restaurant_id:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Menu item not found for restaurant")
+            menu = menu_map[itm.menu_item_id]
             line_total = float(menu.price) * itm.qty
-            category_name = await self.repo.get_category_name(menu.item_category_id)
             order_items.append(OrderItem(
-                menu_item_id=menu.id,
+                menu_item_id=menu.menu_id,
                 name_snapshot=menu.name,
-                category_name_snapshot=category_name,
+                category_name_snapshot=menu.category_name,
                 unit_price=menu.price,
                 qty=itm.qty,
                 line_total=line_total,
@@ -151,28 +313,71 @@ class OrderService:
         order.service_charge = self._money(service_charge)
         order.discount_total = self._money(discount_total)
         order.grand_total = self._money(order.subtotal + order.tax_total + order.service_charge - order.discount_total)
+        self._refresh_balance(order)
+
+    def _refresh_balance(self, order: Order):
+        # Runs under the order's version check, so concurrent payments cannot both read the old total
+        paid = sum((self._dec(p.amount) for p in order.payments if p.status == PaymentStatus.success), Decimal("0"))
+        order.paid_total = self._money(paid)
+        order.balance_due = self._money(self._dec(order.grand_total) - paid)
+
+    def _new_payment(self, p: OrderPaymentCreate) -> OrderPayment:
+        initial = PaymentStatus(p.status.value)
+        if initial not in INITIAL_PAYMENT_STATUSES:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="New payments must be pending or success")
+        return OrderPayment(
+            method=PaymentMethod(p.method.value),
+            amount=p.amount,
+            reference=p.reference,
+            status=initial,
+        )
 
     async def _add_items_to_order(self, order: Order, items: List[OrderItem], actor_id: Optional[int], metadata: Optional[dict] = None):
         if not items:
             return order
 
-        order.items.extend(items)
-        await self._recalculate_order_totals(order)
-        await self.repo.update_order(order)
+        async with self._unit_of_work(order):
+            await self._consume_stock(order.restaurant_id, self._item_quantities(items))
+            order.items.extend(items)
+            await self._recalculate_order_totals(order)
+            # Assign item ids so the event payloads can reference them
+            await self.repo.flush()
+            if order.status == OrderStatus.accepted:
+                # The kitchen already has this order's tickets; the new lines get their own
+                await self._send_to_kitchen(order, items)
 
-        meta = {k: v for k, v in (metadata or {}).items() if v is not None}
-        for itm in items:
-            payload = {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty, "notes": itm.notes}
-            payload.update(meta)
-            await self.repo.add_event(order.id, "item_added", payload, actor_id)
+            meta = {k: v for k, v in (metadata or {}).items() if v is not None}
+            for itm in items:
+                payload = {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty, "notes": itm.notes}
+                payload.update(meta)
+                self._stage_event(order, "item_added", payload, actor_id)
 
-        if meta:
-            await self.repo.add_event(order.id, "items_updated_by_channel", meta, actor_id)
+            if meta:
+                self._stage_event(order, "items_updated_by_channel", meta, actor_id)
 
         return order
 
-    async def create_order(self, payload: OrderCreate, actor_id: Optional[int]):
-        await self.restaurant_repo.get_by_id(payload.restaurant_id)
+    async def _claim_stock(self, restaurant_id: int, quantities: dict[int, int], claimed: dict[int, int]):
+        """Check capped items against what earlier orders in the same batch already claimed.
+
+        Raises 409 like the per-order availability check, without touching
+        the claims, so a batch can fail one order and keep the rest.
+        """
+        snapshot = catalog_cache.get_snapshot(restaurant_id)
+        if snapshot is None:
+            snapshot = await self._load_catalog(restaurant_id)
+        day = business_date(datetime.now(timezone.utc))
+        wanted = {menu_id: qty for menu_id, qty in quantities.items() if qty > 0 and menu_id in snapshot.capped_ids}
+        for menu_id, qty in wanted.items():
+            left = snapshot.availability[menu_id].remaining_on(day) - claimed.get(menu_id, 0)
+            if left < qty:
+                name = snapshot.items[menu_id].name
+                reason = "is sold out for today" if left <= 0 else f"has only {left} left today"
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"{name} {reason}")
+        for menu_id, qty in wanted.items():
+            claimed[menu_id] = claimed.get(menu_id, 0) + qty
+
+    async def _build_order(self, payload: OrderCreate, actor_id: Optional[int]) -> Order:
         order_items = await self._validate_menu_items(payload.restaurant_id, payload.items)
         subtotal, tax_total, service_charge, discount_total, grand_total = self._calc_totals(order_items)
 
@@ -181,7 +386,7 @@ class OrderService:
 
         order = Order(
             restaurant_id=payload.restaurant_id,
-            channel=payload.channel.value,
+            channel=OrderChannel(payload.channel.value),
             table_id=table_id,
             group_id=group_id,
             customer_name=payload.customer_name,
@@ -197,20 +402,82 @@ class OrderService:
         )
         order.items = order_items
 
-        payments = []
-        if payload.payments:
-            for p in payload.payments:
-                payments.append(OrderPayment(
-                    method=p.method.value,
-                    amount=p.amount,
-                    reference=p.reference,
-                    status=p.status.value,
-                ))
-        order.payments = payments
-
-        created = await self.repo.create_order(order)
-        await self.repo.add_event(created.id, "order_created", {"status": order.status.value}, actor_id)
-        return await self.get_order(created.id)
+        order.payments = [self._new_payment(p) for p in payload.payments or []]
+        self._refresh_balance(order)
+        return order
+
+    async def create_order(self, payload: OrderCreate, actor_id: Optional[int]):
+        await self.restaurant_repo.get_by_id(payload.restaurant_id)
+        table = None
+        if payload.table_id not in (None, 0):
+            table = await self.repo.get_table_by_id(payload.table_id)
+            # Another restaurant's table is treated as missing
+            if not table or table.restaurant_id != payload.restaurant_id:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table not found")
+        order = await self._build_order(payload, actor_id)
+
+        async with self._unit_of_work():
+            await self._consume_stock(order.restaurant_id, self._item_quantities(order.items))
+            self.repo.add_order(order)
+            # Attach the loaded table so table_name resolves without reloading the order
+            order.table = table
+            await self.repo.flush()
+            self._stage_event(order, "order_created", {"status": order.status.value}, actor_id)
+        return order
+
+    async def bulk_create_orders(self, payloads: List[OrderCreate], actor_id: Optional[int]):
+        """Create a burst of counter orders in one transaction.
+
+        Restaurants and tables are checked with one query each and items are
+        priced from the catalog snapshot. Payloads that fail validation, or
+        that would take a capped item past what is left today once the earlier
+        payloads are counted, are reported per index; the rest are inserted
+        together.
+        """
+        restaurant_ids = await self.repo.get_existing_restaurant_ids({p.restaurant_id for p in payloads})
+        tables = await self.repo.get_tables_by_ids({p.table_id for p in payloads if p.table_id not in (None, 0)})
+
+        results: List[dict] = []
+        orders: List[tuple[Order, object]] = []
+        claimed: dict[int, dict[int, int]] = {}
+        for index, payload in enumerate(payloads):
+            try:
+                if payload.restaurant_id not in restaurant_ids:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Restaurant not found")
+                table = None
+                if payload.table_id not in (None, 0):
+                    table = tables.get(payload.table_id)
+                    if table is None or table.restaurant_id != payload.restaurant_id:
+                        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table not found")
+                order = await self._build_order(payload, actor_id)
+                await self._claim_stock(
+                    order.restaurant_id,
+                    self._item_quantities(order.items),
+                    claimed.setdefault(order.restaurant_id, {}),
+                )
+            except HTTPException as exc:
+                results.append({"index": index, "status": "failed", "error": exc.detail})
+                continue
+            orders.append((order, table))
+            results.append({"index": index, "status": "created", "order": order})
+
+        if orders:
+            async with self._unit_of_work():
+                # One decrement per restaurant covers every order in the burst; the
+                # claims above keep it within the caps unless a concurrent order won
+                by_restaurant: dict[int, List[OrderItem]] = {}
+                for order, _ in orders:
+                    by_restaurant.setdefault(order.restaurant_id, []).extend(order.items)
+                for restaurant_id, items in by_restaurant.items():
+                    await self._consume_stock(restaurant_id, self._item_quantities(items))
+                self.repo.add_orders([order for order, _ in orders])
+                for order, table in orders:
+                    order.table = table
+                await self.repo.flush()
+                for order, _ in orders:
+                    self._stage_event(order, "order_created", {"status": order.status.value}, actor_id)
+
+        return {"created": len(orders), "failed": len(payloads) - len(orders), "results": results}
 
     async def get_order(self, order_id: int):
         order = await self.repo.get_order(order_id)
@@ -218,13 +485,35 @@ class OrderService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
         return order
 
-    async def get_orders_by_table(self, table_id: int, status_filter: Optional[List[OrderStatusEnum]], channel: Optional[str], search: Optional[str], skip: int, limit: int):
+    async def get_order_read(self, order_id: int, if_none_match: Optional[str] = None) -> tuple[str, Optional[dict]]:
+        """ETag and serialized order for a conditional read; data is None when the client copy is current.
+
+        A header-only query (order version plus the joined table's name)
+        settles If-None-Match and cache hits; the full order is loaded and
+        serialized only when neither applies.
+        """
+        header = await self.repo.get_order_header(order_id)
+        if not header:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        etag = order_etag(order_id, header.version, header.table_name)
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        data = order_read_cache.get_cached_order(order_id, etag)
+        if data is not None:
+            return etag, data
+        order = await self.get_order(order_id)
+        data = OrderRead.model_validate(order).model_dump(mode="json")
+        etag = order_etag(order.id, order.version, order.table_name)
+        order_read_cache.store_cached_order(order.id, etag, data)
+        return etag, data
+
+    async def get_orders_by_table(self, table_id: int, status_filter: Optional[List[OrderStatusEnum]], channel: Optional[str], search: Optional[str], skip: int, limit: int, cursor: Optional[str] = None, count_mode: OrderCountModeEnum = OrderCountModeEnum.exact, view: OrderViewEnum = OrderViewEnum.full, unpaid_only: bool = False):
         table = await self.repo.get_table_by_id(table_id)
         if not table:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table not found")
-        return await self.list_orders(table.restaurant_id, status_filter, channel, table_id, search, skip, limit)
+        return await self.list_orders(table.restaurant_id, status_filter, channel, table_id, search, skip, limit, cursor, count_mode, view, unpaid_only)
 
-    async def list_orders(self, restaurant_id: int, status_filter: Optional[List[OrderStatusEnum]], channel: Optional[str], table_id: Optional[int], search: Optional[str], skip: int, limit: int):
+    async def list_orders(self, restaurant_id: int, status_filter: Optional[List[OrderStatusEnum]], channel: Optional[str], table_id: Optional[int], search: Optional[str], skip: int, limit: int, cursor: Optional[str] = None, count_mode: OrderCountModeEnum = OrderCountModeEnum.exact, view: OrderViewEnum = OrderViewEnum.full, unpaid_only: bool = False):
         status_values = [OrderStatus(s.value) for s in status_filter] if status_filter else None
         channel_value = None
         if channel:
@@ -232,109 +521,173 @@ class OrderService:
                 channel_value = OrderChannel(channel)
             except ValueError:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid channel")
-        orders, total = await self.repo.list_orders(restaurant_id, status_values, channel_value, table_id, search, skip, limit)
-        return orders, total
+        after = decode_cursor(cursor) if cursor else None
+        list_fn = self.repo.list_order_summaries if view == OrderViewEnum.summary else self.repo.list_orders
+        orders, total, total_is_exact, has_more = await list_fn(
+            restaurant_id, status_values, channel_value, table_id, search, skip, limit, after, count_mode.value, unpaid_only
+        )
+        next_cursor = None
+        if has_more and orders:
+            last = orders[-1]
+            if view == OrderViewEnum.summary:
+                next_cursor = encode_cursor(last["created_at"], last["id"])
+            else:
+                next_cursor = encode_cursor(last.created_at, last.id)
+        return {"orders": orders, "total": total, "total_is_exact": total_is_exact, "next_cursor": next_cursor}
 
-    async def update_status(self, order_id: int, new_status: OrderStatusEnum, actor_id: Optional[int]):
-        order = await self.get_order(order_id)
+    async def export_orders(self, restaurant_id: int, date_from: Optional[datetime], date_to: Optional[datetime], channel: Optional[str], export_format: OrderExportFormatEnum):
+        """Validate up front, then hand back an encoder over a server-side cursor; nothing is buffered per export."""
+        await self._get_restaurant(restaurant_id)
+        if date_from and date_to and date_from >= date_to:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must be before date_to")
+        channel_value = None
+        if channel:
+            try:
+                channel_value = OrderChannel(channel)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid channel")
+        include_archive = date_from is None or date_from < archive_cutoff()
+        partitions = self.repo.stream_export_rows(
+            restaurant_id, date_from, date_to, channel_value, include_archive, settings.ORDER_EXPORT_BATCH_SIZE
+        )
+        if export_format == OrderExportFormatEnum.ndjson:
+            return encode_ndjson(partitions)
+        return encode_csv(partitions)
+
+    async def search_orders(self, restaurant_id: int, query: str, window_days: Optional[int], limit: int):
+        if not (query or "").strip():
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query is required")
+        days = window_days or settings.ORDER_SEARCH_WINDOW_DAYS
+        return await self.repo.search_orders(restaurant_id, query, days, limit)
+
+    @retry_on_conflict
+    async def update_status(self, order_id: int, new_status: OrderStatusEnum, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
         allowed = STATUS_FLOW.get(order.status, [])
         if OrderStatus(new_status.value) not in allowed:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status transition")
-        order.status = OrderStatus(new_status.value)
-        now = datetime.utcnow()
-        if new_status == OrderStatusEnum.completed:
-            order.completed_at = now
-        if new_status == OrderStatusEnum.canceled:
-            order.canceled_at = now
-        await self.repo.update_order(order)
-        await self.repo.add_event(order.id, "status_changed", {"status": new_status.value}, actor_id)
+        previous_status = order.status
+        async with self._unit_of_work(order):
+            order.status = OrderStatus(new_status.value)
+            now = datetime.utcnow()
+            if new_status == OrderStatusEnum.completed:
+                order.completed_at = now
+            if new_status == OrderStatusEnum.canceled:
+                order.canceled_at = now
+            await self._record_sales(order, previous_status)
+            if order.status == OrderStatus.accepted:
+                await self._send_to_kitchen(order, order.items)
+            if order.status == OrderStatus.canceled:
+                await self.kitchen_repo.delete_open_tickets(order.id)
+            self._stage_event(order, "status_changed", {"status": new_status.value}, actor_id)
         return order
 
-    async def update_order(self, order_id: int, data: OrderUpdate, actor_id: Optional[int]):
-        order = await self.get_order(order_id)
-        if data.notes is not None:
-            order.notes = data.notes
-        if data.customer_name is not None:
-            order.customer_name = data.customer_name
-        if data.customer_phone is not None:
-            order.customer_phone = data.customer_phone
-        if data.table_id is not None:
-            order.table_id = data.table_id if data.table_id not in (0,) else None
-        if data.group_id is not None:
-            order.group_id = data.group_id if data.group_id not in (0,) else None
-        await self.repo.update_order(order)
-        await self.repo.add_event(order.id, "order_updated", data.dict(exclude_none=True), actor_id)
+    @retry_on_conflict
+    async def update_order(self, order_id: int, data: OrderUpdate, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
+        table = order.table
+        if data.table_id not in (None, 0) and data.table_id != order.table_id:
+            table = await self.repo.get_table_by_id(data.table_id)
+            # Moving onto another restaurant's table would take the order off its own floor view
+            if not table or table.restaurant_id != order.restaurant_id:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Table not found")
+        async with self._unit_of_work(order):
+            if data.notes is not None:
+                order.notes = data.notes
+            if data.customer_name is not None:
+                order.customer_name = data.customer_name
+            if data.customer_phone is not None:
+                order.customer_phone = data.customer_phone
+            if data.table_id is not None:
+                order.table = table if data.table_id not in (0,) else None
+            if data.group_id is not None:
+                order.group_id = data.group_id if data.group_id not in (0,) else None
+            self._stage_event(order, "order_updated", data.dict(exclude_none=True), actor_id)
         return order
 
-    async def add_items(self, order_id: int, payload: OrderAddItems, actor_id: Optional[int]):
-        order = await self.get_order(order_id)
+    @retry_on_conflict
+    async def add_items(self, order_id: int, payload: OrderAddItems, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
         if order.status not in [OrderStatus.pending, OrderStatus.accepted]:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot modify items in current status")
         new_items = await self._validate_menu_items(order.restaurant_id, payload.items)
         return await self._add_items_to_order(order, new_items, actor_id)
 
-    async def bulk_add_items(self, order_id: int, payload: OrderBulkAddItems, actor_id: Optional[int]):
-        order = await self._get_order_for_update(order_id)
+    @retry_on_conflict
+    async def bulk_add_items(self, order_id: int, payload: OrderBulkAddItems, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
         self._ensure_items_mutable(order)
         merged_payload = self._merge_items_payload(payload.items)
         if not merged_payload:
             return order
 
-        menu_lookup = await self._get_menu_lookup(order.restaurant_id, list(merged_payload.keys()))
-        added_existing: List[tuple[OrderItem, int]] = []
-        added_new: List[OrderItem] = []
-        for menu_id, incoming in merged_payload.items():
-            qty = int(incoming["qty"] or 0)
-            notes = incoming.get("notes")
-            if qty <= 0:
-                continue
-            existing = next((i for i in order.items if i.menu_item_id == menu_id), None)
-            if existing:
-                added_existing.append((existing, qty))
-                existing.qty += qty
-                if notes is not None:
-                    existing.notes = notes
-                existing.unit_price = self._money(self._dec(existing.unit_price))
-                existing.line_total = self._money(self._dec(existing.unit_price) * existing.qty)
-                continue
-            menu = menu_lookup[menu_id]["menu"]
-            unit_price = self._money(menu.price)
-            line_total = self._money(unit_price * qty)
-            order_item = OrderItem(
-                menu_item_id=menu_id,
-                name_snapshot=menu.name,
-                category_name_snapshot=menu_lookup[menu_id]["category_name"],
-                unit_price=unit_price,
-                qty=qty,
-                line_total=line_total,
-                notes=notes,
-            )
-            order.items.append(order_item)
-            added_new.append(order_item)
+        quantities = {menu_id: int(incoming["qty"] or 0) for menu_id, incoming in merged_payload.items()}
+        quantities = {menu_id: qty for menu_id, qty in quantities.items() if qty > 0}
+        menu_lookup = await self._get_menu_lookup(order.restaurant_id, list(merged_payload.keys()), quantities)
+        async with self._unit_of_work(order):
+            await self._consume_stock(order.restaurant_id, quantities)
+            added_existing: List[tuple[OrderItem, int]] = []
+            added_new: List[OrderItem] = []
+            for menu_id, incoming in merged_payload.items():
+                qty = int(incoming["qty"] or 0)
+                notes = incoming.get("notes")
+                if qty <= 0:
+                    continue
+                existing = next((i for i in order.items if i.menu_item_id == menu_id), None)
+                if existing:
+                    added_existing.append((existing, qty))
+                    existing.qty += qty
+                    if notes is not None:
+                        existing.notes = notes
+                    existing.unit_price = self._money(self._dec(existing.unit_price))
+                    existing.line_total = self._money(self._dec(existing.unit_price) * existing.qty)
+                    continue
+                menu = menu_lookup[menu_id]
+                unit_price = self._money(menu.price)
+                line_total = self._money(unit_price * qty)
+                order_item = OrderItem(
+                    menu_item_id=menu_id,
+                    name_snapshot=menu.name,
+                    category_name_snapshot=menu.category_name,
+                    unit_price=unit_price,
+                    qty=qty,
+                    line_total=line_total,
+                    notes=notes,
+                )
+                order.items.append(order_item)
+                added_new.append(order_item)
 
-        await self._recalculate_order_totals(order)
-        await self.repo.update_order(order)
+            await self._recalculate_order_totals(order)
+            if added_new:
+                await self.repo.flush()
+            if order.status == OrderStatus.accepted:
+                await self._send_to_kitchen(
+                    order,
+                    [itm for itm, _ in added_existing] + added_new,
+                    {itm.id: delta for itm, delta in added_existing},
+                )
 
-        for itm, delta in added_existing:
-            await self.repo.add_event(
-                order.id,
-                "item_added",
-                {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty, "delta_qty": delta},
-                actor_id,
-            )
-        for itm in added_new:
-            await self.repo.add_event(
-                order.id,
-                "item_added",
-                {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty},
-                actor_id,
-            )
+            for itm, delta in added_existing:
+                self._stage_event(
+                    order,
+                    "item_added",
+                    {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty, "delta_qty": delta},
+                    actor_id,
+                )
+            for itm in added_new:
+                self._stage_event(
+                    order,
+                    "item_added",
+                    {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty},
+                    actor_id,
+                )
         return order
 
-    async def update_items_by_channel(self, order_id: int, payload: OrderItemsChannelUpdate, actor_id: Optional[int]):
+    @retry_on_conflict
+    async def update_items_by_channel(self, order_id: int, payload: OrderItemsChannelUpdate, actor_id: Optional[int], expected_version: Optional[int] = None):
         if payload.table_id is None and payload.group_id is None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="table_id or group_id is required")
-        order = await self.get_order(order_id)
+        order = await self._get_order_for_mutation(order_id, expected_version)
         if order.status not in [OrderStatus.pending, OrderStatus.accepted]:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot modify items in current status")
 
@@ -353,138 +706,374 @@ class OrderService:
             {"table_id": payload.table_id, "group_id": payload.group_id},
         )
 
-    async def add_item(self, order_id: int, payload: OrderAddSingleItem, actor_id: Optional[int]):
-        order = await self.get_order(order_id)
+    @retry_on_conflict
+    async def add_item(self, order_id: int, payload: OrderAddSingleItem, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
         self._ensure_items_mutable(order)
         items = await self._validate_menu_items(order.restaurant_id, [payload.item])
         return await self._add_items_to_order(order, items, actor_id)
 
-    async def bulk_update_items(self, order_id: int, payload: OrderBulkUpdateItems, actor_id: Optional[int]):
-        order = await self._get_order_for_update(order_id)
+    @retry_on_conflict
+    async def bulk_update_items(self, order_id: int, payload: OrderBulkUpdateItems, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
         self._ensure_items_mutable(order)
         merged_payload = self._merge_items_payload(payload.items)
         payload_menu_ids = set(merged_payload.keys())
-        menu_lookup = await self._get_menu_lookup(order.restaurant_id, list(payload_menu_ids))
-
-        added_items: List[OrderItem] = []
-        updated_items: List[OrderItem] = []
-        removed_items: List[dict] = []
-
-        existing_map = {itm.menu_item_id: itm for itm in order.items if itm.menu_item_id is not None}
-
-        for menu_id, incoming in merged_payload.items():
-            qty = int(incoming["qty"] or 0)
-            notes = incoming.get("notes")
-            menu_info = menu_lookup.get(menu_id)
-            if menu_info is None:
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid menu item")
-
-            if qty <= 0:
-                item_to_remove = existing_map.get(menu_id)
-                if item_to_remove and item_to_remove in order.items:
-                    removed_items.append({"item_id": item_to_remove.id, "menu_item_id": item_to_remove.menu_item_id})
-                    order.items.remove(item_to_remove)
-                continue
+        # Only quantity increases draw on availability; reductions and removals always go through
+        current = self._item_quantities(order.items)
+        increases = {
+            menu_id: int(incoming["qty"] or 0) - current.get(menu_id, 0)
+            for menu_id, incoming in merged_payload.items()
+            if int(incoming["qty"] or 0) > current.get(menu_id, 0)
+        }
+        menu_lookup = await self._get_menu_lookup(order.restaurant_id, list(payload_menu_ids), increases)
 
-            if menu_id in existing_map:
-                item = existing_map[menu_id]
-                item.qty = qty
-                if notes is not None:
-                    item.notes = notes
-                item.unit_price = self._money(self._dec(item.unit_price))
-                item.line_total = self._money(self._dec(item.unit_price) * item.qty)
-                updated_items.append(item)
-            else:
-                unit_price = self._money(menu_info["menu"].price)
-                line_total = self._money(unit_price * qty)
-                new_item = OrderItem(
-                    menu_item_id=menu_id,
-                    name_snapshot=menu_info["menu"].name,
-                    category_name_snapshot=menu_info["category_name"],
-                    unit_price=unit_price,
-                    qty=qty,
-                    line_total=line_total,
-                    notes=notes,
-                )
-                order.items.append(new_item)
-                added_items.append(new_item)
+        async with self._unit_of_work(order):
+            await self._consume_stock(order.restaurant_id, increases)
+            added_items: List[OrderItem] = []
+            updated_items: List[OrderItem] = []
+            removed_items: List[dict] = []
+            increased: dict[int, int] = {}
 
-        for item in list(order.items):
-            if item.menu_item_id in payload_menu_ids:
-                continue
-            removed_items.append({"item_id": item.id, "menu_item_id": item.menu_item_id})
-            order.items.remove(item)
+            existing_map = {itm.menu_item_id: itm for itm in order.items if itm.menu_item_id is not None}
 
-        await self._recalculate_order_totals(order)
-        await self.repo.update_order(order)
+            for menu_id, incoming in merged_payload.items():
+                qty = int(incoming["qty"] or 0)
+                notes = incoming.get("notes")
+                menu_info = menu_lookup.get(menu_id)
+                if menu_info is None:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid menu item")
 
-        for itm in added_items:
-            await self.repo.add_event(
-                order.id,
-                "item_added",
-                {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty},
-                actor_id,
-            )
-        for itm in updated_items:
-            await self.repo.add_event(
-                order.id,
-                "item_updated",
-                {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty, "notes": itm.notes},
-                actor_id,
-            )
-        for itm in removed_items:
-            await self.repo.add_event(order.id, "item_removed", itm, actor_id)
+                if qty <= 0:
+                    item_to_remove = existing_map.get(menu_id)
+                    if item_to_remove and item_to_remove in order.items:
+                        removed_items.append({"item_id": item_to_remove.id, "menu_item_id": item_to_remove.menu_item_id})
+                        order.items.remove(item_to_remove)
+                    continue
+
+                if menu_id in existing_map:
+                    item = existing_map[menu_id]
+                    if qty > item.qty:
+                        increased[item.id] = qty - item.qty
+                    item.qty = qty
+                    if notes is not None:
+                        item.notes = notes
+                    item.unit_price = self._money(self._dec(item.unit_price))
+                    item.line_total = self._money(self._dec(item.unit_price) * item.qty)
+                    updated_items.append(item)
+                else:
+                    unit_price = self._money(menu_info.price)
+                    line_total = self._money(unit_price * qty)
+                    new_item = OrderItem(
+                        menu_item_id=menu_id,
+                        name_snapshot=menu_info.name,
+                        category_name_snapshot=menu_info.category_name,
+                        unit_price=unit_price,
+                        qty=qty,
+                        line_total=line_total,
+                        notes=notes,
+                    )
+                    order.items.append(new_item)
+                    added_items.append(new_item)
+
+            for item in list(order.items):
+                if item.menu_item_id in payload_menu_ids:
+                    continue
+                removed_items.append({"item_id": item.id, "menu_item_id": item.menu_item_id})
+                order.items.remove(item)
+
+            await self._recalculate_order_totals(order)
+            if added_items:
+                await self.repo.flush()
+            if order.status == OrderStatus.accepted:
+                grown = [itm for itm in updated_items if itm.id in increased]
+                await self._send_to_kitchen(order, grown + added_items, increased)
+
+            for itm in added_items:
+                self._stage_event(
+                    order,
+                    "item_added",
+                    {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty},
+                    actor_id,
+                )
+            for itm in updated_items:
+                self._stage_event(
+                    order,
+                    "item_updated",
+                    {"item_id": itm.id, "menu_item_id": itm.menu_item_id, "qty": itm.qty, "notes": itm.notes},
+                    actor_id,
+                )
+            for itm in removed_items:
+                self._stage_event(order, "item_removed", itm, actor_id)
 
         return order
 
-    async def update_item_quantity(self, order_id: int, item_id: int, payload: OrderItemQuantityUpdate, actor_id: Optional[int]):
-        order = await self.get_order(order_id)
+    @retry_on_conflict
+    async def update_item_quantity(self, order_id: int, item_id: int, payload: OrderItemQuantityUpdate, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
         self._ensure_items_mutable(order)
         item = self._find_item(order, item_id)
         if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
-        item.qty = payload.qty
-        item.line_total = self._money(self._dec(item.unit_price) * payload.qty)
-        await self._recalculate_order_totals(order)
-        await self.repo.update_order(order)
-        await self.repo.add_event(
-            order.id,
-            "item_quantity_updated",
-            {"item_id": item.id, "menu_item_id": item.menu_item_id, "qty": item.qty},
-            actor_id,
-        )
+        increase = {}
+        if item.menu_item_id is not None and payload.qty > item.qty:
+            increase = {item.menu_item_id: payload.qty - item.qty}
+            await self._get_menu_lookup(order.restaurant_id, list(increase), increase)
+        async with self._unit_of_work(order):
+            await self._consume_stock(order.restaurant_id, increase)
+            delta = payload.qty - item.qty
+            item.qty = payload.qty
+            item.line_total = self._money(self._dec(item.unit_price) * payload.qty)
+            await self._recalculate_order_totals(order)
+            if order.status == OrderStatus.accepted and delta > 0:
+                await self._send_to_kitchen(order, [item], {item.id: delta})
+            self._stage_event(
+                order,
+                "item_quantity_updated",
+                {"item_id": item.id, "menu_item_id": item.menu_item_id, "qty": item.qty},
+                actor_id,
+            )
         return order
 
-    async def add_payment(self, order_id: int, payload: OrderAddPayment, actor_id: Optional[int]):
-        order = await self.get_order(order_id)
+    @retry_on_conflict
+    async def add_payment(self, order_id: int, payload: OrderAddPayment, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
         p = payload.payment
-        payment = OrderPayment(
-            order_id=order.id,
-            method=p.method.value,
-            amount=p.amount,
-            reference=p.reference,
-            status=p.status.value,
-        )
-        await self.repo.add_payment(payment)
-        await self.repo.add_event(order.id, "payment_added", {"amount": p.amount, "method": p.method.value}, actor_id)
+        payment = self._new_payment(p)
+        async with self._unit_of_work(order):
+            order.payments.append(payment)
+            self.repo.add_payment(payment)
+            self._refresh_balance(order)
+            self._stage_event(order, "payment_added", {"amount": p.amount, "method": p.method.value}, actor_id)
         return payment
 
-    async def cancel_order(self, order_id: int, payload: OrderCancel, actor_id: Optional[int]):
-        order = await self.get_order(order_id)
+    @retry_on_conflict
+    async def update_payment_status(self, order_id: int, payment_id: int, new_status: PaymentStatusEnum, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
+        payment = next((p for p in order.payments if p.id == payment_id), None)
+        if not payment:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment not found")
+        target = PaymentStatus(new_status.value)
+        if target not in PAYMENT_STATUS_FLOW.get(payment.status, []):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid payment status transition")
+        previous = payment.status
+        async with self._unit_of_work(order):
+            payment.status = target
+            self._refresh_balance(order)
+            self._stage_event(
+                order,
+                "payment_status_changed",
+                {"payment_id": payment.id, "from": previous.value, "status": target.value, "amount": float(payment.amount)},
+                actor_id,
+            )
+        return payment
+
+    @retry_on_conflict
+    async def settle_order(self, order_id: int, payload: OrderSettle, actor_id: Optional[int], expected_version: Optional[int] = None):
+        """Complete an order once nothing is owed, optionally recording the final payment in the same transaction."""
+        order = await self._get_order_for_mutation(order_id, expected_version)
+        if OrderStatus.completed not in STATUS_FLOW.get(order.status, []):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Order cannot be settled in its current status")
+        payment = self._new_payment(payload.payment) if payload.payment is not None else None
+        outstanding = self._dec(order.balance_due)
+        if payment is not None and payment.status == PaymentStatus.success:
+            outstanding -= self._dec(payment.amount)
+        if outstanding > 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Order has an outstanding balance of {self._money(outstanding)}",
+            )
+        previous_status = order.status
+        async with self._unit_of_work(order):
+            if payment is not None:
+                order.payments.append(payment)
+                self.repo.add_payment(payment)
+                self._stage_event(order, "payment_added", {"amount": payload.payment.amount, "method": payload.payment.method.value}, actor_id)
+            self._refresh_balance(order)
+            order.status = OrderStatus.completed
+            order.completed_at = datetime.utcnow()
+            await self._record_sales(order, previous_status)
+            self._stage_event(order, "status_changed", {"status": OrderStatus.completed.value, "settled": True}, actor_id)
+        return order
+
+    async def get_group_bill(self, restaurant_id: int, group_id: int):
+        """Merged lines, per-order figures and combined totals for a group, built from one flat query."""
+        rows = await self.repo.get_group_bill_rows(restaurant_id, group_id)
+        if not rows:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+
+        orders: dict[int, dict] = {}
+        lines: dict = {}
+        for row in rows:
+            if row.order_id not in orders:
+                orders[row.order_id] = {
+                    "order_id": row.order_id,
+                    "status": row.status.value,
+                    "table_id": row.table_id,
+                    "table_name": row.table_name,
+                    "subtotal": row.subtotal,
+                    "tax_total": row.tax_total,
+                    "service_charge": row.service_charge,
+                    "discount_total": row.discount_total,
+                    "grand_total": row.grand_total,
+                    "paid_total": row.paid_total,
+                    "balance_due": row.balance_due,
+                    "version": row.version,
+                }
+            if row.name_snapshot is None:
+                continue
+            # Same dish ordered on several tickets becomes one line; deleted menu items fall back to their name
+            key = row.menu_item_id if row.menu_item_id is not None else row.name_snapshot
+            line = lines.get(key)
+            if line is None:
+                line = lines[key] = {
+                    "menu_item_id": row.menu_item_id,
+                    "name": row.name_snapshot,
+                    "category_name": row.category_name_snapshot,
+                    "unit_price": row.unit_price,
+                    "qty": 0,
+                    "line_total": Decimal("0"),
+                }
+            elif line["unit_price"] != row.unit_price:
+                # Price changed between orders; the merged line only carries the total
+                line["unit_price"] = None
+            line["qty"] += row.qty
+            line["line_total"] += self._dec(row.line_total)
+
+        def total(name: str) -> Decimal:
+            return self._money(sum((self._dec(o[name]) for o in orders.values()), Decimal("0")))
+
+        balance_due = total("balance_due")
+        paid_total = total("paid_total")
+        if balance_due <= 0:
+            payment_status = "paid"
+        elif paid_total > 0:
+            payment_status = "partial"
+        else:
+            payment_status = "unpaid"
+        return {
+            "restaurant_id": restaurant_id,
+            "group_id": group_id,
+            "payment_status": payment_status,
+            "subtotal": total("subtotal"),
+            "tax_total": total("tax_total"),
+            "service_charge": total("service_charge"),
+            "discount_total": total("discount_total"),
+            "grand_total": total("grand_total"),
+            "paid_total": paid_total,
+            "balance_due": balance_due,
+            "lines": list(lines.values()),
+            "orders": list(orders.values()),
+        }
+
+    @retry_on_conflict
+    async def pay_group(self, group_id: int, payload: OrderGroupPay, actor_id: Optional[int]):
+        """Split one payment across the group's orders, oldest first, in a single transaction."""
+        orders = await self.repo.get_group_orders(payload.restaurant_id, group_id)
+        if not orders:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+        if payload.payment.status != PaymentStatusEnum.success:
+            # Only a settled payment takes balances down, so nothing else can be split across the group
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Group payments must have status success")
+        amount = self._money(payload.payment.amount)
+        if amount <= 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Payment amount must be positive")
+        owing = [o for o in orders if self._dec(o.balance_due) > 0]
+        outstanding = self._money(sum((self._dec(o.balance_due) for o in owing), Decimal("0")))
+        if amount > outstanding:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Payment exceeds the group's outstanding balance of {outstanding}",
+            )
+
+        allocations: List[tuple[Order, Decimal]] = []
+        remaining = amount
+        for order in owing:
+            if remaining <= 0:
+                break
+            share = min(remaining, self._dec(order.balance_due))
+            allocations.append((order, share))
+            remaining -= share
+
+        payments = []
+        async with self._unit_of_work(*(order for order, _ in allocations)):
+            for order, share in allocations:
+                payment = self._new_payment(payload.payment)
+                payment.amount = share
+                order.payments.append(payment)
+                self.repo.add_payment(payment)
+                self._refresh_balance(order)
+                self._stage_event(
+                    order,
+                    "payment_added",
+                    {"amount": float(share), "method": payload.payment.method.value, "group_id": group_id},
+                    actor_id,
+                )
+                payments.append((order, payment))
+
+        return {
+            "group_id": group_id,
+            "amount": amount,
+            "balance_due": self._money(sum((self._dec(o.balance_due) for o in orders), Decimal("0"))),
+            "allocations": [
+                {"order_id": order.id, "payment_id": payment.id, "amount": payment.amount, "balance_due": order.balance_due}
+                for order, payment in payments
+            ],
+        }
+
+    @retry_on_conflict
+    async def cancel_order(self, order_id: int, payload: OrderCancel, actor_id: Optional[int], expected_version: Optional[int] = None):
+        order = await self._get_order_for_mutation(order_id, expected_version)
         if order.status == OrderStatus.canceled:
             return order
-        order.status = OrderStatus.canceled
-        order.canceled_at = datetime.utcnow()
-        order.cancel_reason = payload.reason
-        await self.repo.update_order(order)
-        await self.repo.add_event(order.id, "order_canceled", {"reason": payload.reason}, actor_id)
+        previous_status = order.status
+        async with self._unit_of_work(order):
+            order.status = OrderStatus.canceled
+            order.canceled_at = datetime.utcnow()
+            order.cancel_reason = payload.reason
+            await self._record_sales(order, previous_status)
+            await self.kitchen_repo.delete_open_tickets(order.id)
+            self._stage_event(order, "order_canceled", {"reason": payload.reason}, actor_id)
         return order
 
     async def delete_order(self, order_id: int):
         order = await self.get_order(order_id)
         await self.repo.delete_order(order)
+        order_read_cache.invalidate_orders([order_id])
+        floor_state.invalidate_floor(order.restaurant_id)
+        kitchen_queue.drop_order(order_id)
         return {"message": "Order deleted"}
 
+    async def open_feed(self, restaurant_id: int, last_event_id: Optional[int]):
+        """Subscribe to a restaurant's live deltas and collect what the client missed.
+
+        The subscription is taken before the backlog is read so nothing falls
+        in between; the stream skips queued deltas the backlog already covered.
+        A backlog read from the database may repeat deltas the client already
+        has (clients dedupe by id) and comes back flagged when it was cut off,
+        so the client is told to resync from its end.
+        """
+        await self._get_restaurant(restaurant_id)
+        subscription = ORDER_FEED.subscribe(restaurant_id)
+        backlog: List[dict] = []
+        truncated = False
+        if last_event_id is not None:
+            try:
+                buffered = ORDER_FEED.replay(restaurant_id, last_event_id)
+                if buffered is None:
+                    events, truncated = await self.repo.get_restaurant_events_since(
+                        restaurant_id,
+                        last_event_id,
+                        settings.ORDER_FEED_BUFFER_SIZE,
+                        settings.ORDER_FEED_RESUME_GRACE_SECONDS,
+                    )
+                    buffered = [build_delta(restaurant_id, ev) for ev in events]
+            except Exception:
+                ORDER_FEED.unsubscribe(subscription)
+                raise
+            backlog = buffered
+        return subscription, backlog, truncated
+
     async def get_events(self, order_id: int):
         await self.get_order(order_id)
         return await self.repo.get_events(order_id)
@@ -0,0 +1,68 @@
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.repositories.report_repository import ReportRepository
+from app.repositories.restaurant_repository import RestaurantRepository
+from app.models.order_model import OrderChannel
+from app.schema.order_schema import OrderChannelEnum
+from app.schema.report_schema import SalesItemGroupEnum
+
+
+class ReportService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repo = ReportRepository(db)
+        self.restaurant_repo = RestaurantRepository(db)
+
+    async def _check_range(self, restaurant_id: int, date_from: date, date_to: date):
+        if date_from > date_to:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must not be after date_to")
+        if (date_to - date_from).days + 1 > settings.SALES_REPORT_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Date range cannot exceed {settings.SALES_REPORT_MAX_DAYS} days",
+            )
+        restaurant = await self.restaurant_repo.get_by_id(restaurant_id)
+        if not restaurant:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Restaurant not found")
+
+    async def get_sales_summary(self, restaurant_id: int, date_from: date, date_to: date, channel: Optional[OrderChannelEnum]):
+        await self._check_range(restaurant_id, date_from, date_to)
+        channel_value = OrderChannel(channel.value) if channel else None
+        days = await self.repo.get_daily_totals(restaurant_id, date_from, date_to, channel_value)
+        channels = await self.repo.get_channel_totals(restaurant_id, date_from, date_to)
+        if channel_value:
+            channels = [row for row in channels if row["channel"] == channel_value]
+
+        completed = sum(row["completed_orders"] or 0 for row in days)
+        grand_total = sum((Decimal(str(row["grand_total"] or 0)) for row in days), Decimal("0"))
+        average = (grand_total / completed).quantize(Decimal("0.01")) if completed else Decimal("0")
+        return {
+            "restaurant_id": restaurant_id,
+            "date_from": date_from,
+            "date_to": date_to,
+            "completed_orders": completed,
+            "canceled_orders": sum(row["canceled_orders"] or 0 for row in days),
+            "grand_total": grand_total,
+            "average_order_value": average,
+            "days": days,
+            "channels": [{**row, "channel": row["channel"].value} for row in channels],
+        }
+
+    async def get_item_sales(self, restaurant_id: int, date_from: date, date_to: date, channel: Optional[OrderChannelEnum], group_by: SalesItemGroupEnum, limit: int):
+        await self._check_range(restaurant_id, date_from, date_to)
+        channel_value = OrderChannel(channel.value) if channel else None
+        items = await self.repo.get_item_sales(
+            restaurant_id, date_from, date_to, channel_value, group_by == SalesItemGroupEnum.category, limit
+        )
+        return {
+            "restaurant_id": restaurant_id,
+            "date_from": date_from,
+            "date_to": date_to,
+            "group_by": group_by,
+            "items": items,
+        }
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.table_model import RestaurantTable
 from app.repositories.restaurant_tables_repository import RestaurantTablesRepository
 from app.schema.restaurant_table_schema import RestaurantTableCreate, RestaurantTableUpdate
+from app.utils import floor_state
 class RestaurantTableService:
     def __init__(self, db: AsyncSession):
         self.db = RestaurantTablesRepository(db)
@@ -37,13 +38,16 @@ class RestaurantTableService:
             table_type_id=data.table_type_id,
             restaurant_id=restaurant_id
         )
-        return await self.db.create_restaurant_table(restaurant)
+        table = await self.db.create_restaurant_table(restaurant)
+        floor_state.invalidate_floor(restaurant_id)
+        return table
     
     async def delete_restaurant_table(self, table_id: int):
         table = await self.db.get_restaurant_table_by_id(table_id)
         if not table:
             raise HTTPException(status_code=404, detail="Table not found")
         await self.db.delete_restaurant_table(table)
+        floor_state.invalidate_floor(table.restaurant_id)
         return {"message": "Table deleted successfully"}
     
     async def update_restaurant_table(self, table_id: int, data: RestaurantTableUpdate):
@@ -61,7 +65,24 @@ class RestaurantTableService:
         if data.status is not None:
             table.status = data.status
 
-        return await self.db.update_restaurant_table(table)
+        table = await self.db.update_restaurant_table(table)
+        floor_state.invalidate_floor(table.restaurant_id)
+        return table
+
+    async def get_floor_plan(self, restaurant_id: int):
+        state = floor_state.get_floor_state(restaurant_id)
+        if state is None:
+            await self.db.ensure_restaurant_exists(restaurant_id)
+            rows = await self.db.get_floor_rows(restaurant_id)
+            state = floor_state.store_floor_state(restaurant_id, rows)
+        tables = [floor_state.describe_table(table) for table in state.tables.values()]
+        occupied = sum(1 for table in tables if table["open_order_ids"])
+        return {
+            "restaurant_id": restaurant_id,
+            "occupied_count": occupied,
+            "free_count": len(tables) - occupied,
+            "tables": tables,
+        }
 
     
     
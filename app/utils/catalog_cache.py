@@ -0,0 +1,128 @@
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class CatalogItem:
+    menu_id: int
+    restaurant_id: int
+    name: str
+    price: float
+    category_id: Optional[int]
+    category_name: Optional[str]
+
+
+@dataclass
+class ItemAvailability:
+    is_available: bool = True
+    sold_out_until: Optional[datetime] = None
+    daily_cap: Optional[int] = None
+    remaining: Optional[int] = None
+    quantity_date: Optional[date] = None
+
+    def remaining_on(self, day: date) -> Optional[int]:
+        """Units left on the given business day; a new day starts again from the cap."""
+        if self.daily_cap is None:
+            return None
+        if self.quantity_date == day and self.remaining is not None:
+            return self.remaining
+        return self.daily_cap
+
+
+@dataclass
+class CatalogSnapshot:
+    restaurant_id: int
+    version: int
+    loaded_at: float
+    items: dict[int, CatalogItem] = field(default_factory=dict)
+    # Only restricted items have an entry, so the common case is a single missed dict lookup
+    availability: dict[int, ItemAvailability] = field(default_factory=dict)
+
+    @property
+    def capped_ids(self) -> set[int]:
+        return {menu_id for menu_id, state in self.availability.items() if state.daily_cap is not None}
+
+
+# Per-restaurant catalog versions; bumped by menu and item category writes.
+# In-process only: other workers pick up changes when their snapshot TTL expires.
+CATALOG_VERSIONS: dict[int, int] = {}
+CATALOG_SNAPSHOTS: dict[int, CatalogSnapshot] = {}
+
+
+def catalog_version(restaurant_id: int) -> int:
+    return CATALOG_VERSIONS.get(restaurant_id, 0)
+
+
+def invalidate_catalog(restaurant_id: Optional[int]):
+    if restaurant_id is None:
+        return
+    CATALOG_VERSIONS[restaurant_id] = catalog_version(restaurant_id) + 1
+    CATALOG_SNAPSHOTS.pop(restaurant_id, None)
+
+
+def get_snapshot(restaurant_id: int) -> Optional[CatalogSnapshot]:
+    snapshot = CATALOG_SNAPSHOTS.get(restaurant_id)
+    if snapshot is None:
+        return None
+    if snapshot.version != catalog_version(restaurant_id):
+        return None
+    if time.monotonic() - snapshot.loaded_at > settings.CATALOG_CACHE_TTL_SECONDS:
+        return None
+    return snapshot
+
+
+def store_snapshot(
+    restaurant_id: int,
+    version: int,
+    items: Iterable[CatalogItem],
+    availability: Optional[dict[int, ItemAvailability]] = None,
+) -> CatalogSnapshot:
+    snapshot = CatalogSnapshot(
+        restaurant_id=restaurant_id,
+        version=version,
+        loaded_at=time.monotonic(),
+        items={item.menu_id: item for item in items},
+        availability=availability or {},
+    )
+    # A write that landed while the rows were loading makes this snapshot stale; hand it back without caching
+    if version == catalog_version(restaurant_id):
+        CATALOG_SNAPSHOTS[restaurant_id] = snapshot
+    return snapshot
+
+
+def is_restricted(is_available: bool, sold_out_until: Optional[datetime], daily_cap: Optional[int]) -> bool:
+    return not is_available or sold_out_until is not None or daily_cap is not None
+
+
+def unavailable_reason(snapshot: CatalogSnapshot, menu_id: int, qty: int, now: datetime, day: date) -> Optional[str]:
+    """Why qty units of an item cannot be ordered right now, or None if they can."""
+    state = snapshot.availability.get(menu_id)
+    if state is None:
+        return None
+    if not state.is_available:
+        return "is not available"
+    if state.sold_out_until is not None:
+        until = state.sold_out_until if state.sold_out_until.tzinfo else state.sold_out_until.replace(tzinfo=timezone.utc)
+        if until > now:
+            return "is sold out"
+    remaining = state.remaining_on(day)
+    if remaining is not None and remaining < qty:
+        return "is sold out for today" if remaining <= 0 else f"has only {remaining} left today"
+    return None
+
+
+def record_remaining(restaurant_id: int, day: date, remaining: dict[int, int]):
+    """Copy counts returned by a committed decrement into the cached snapshot."""
+    snapshot = CATALOG_SNAPSHOTS.get(restaurant_id)
+    if snapshot is None:
+        return
+    for menu_id, left in remaining.items():
+        state = snapshot.availability.get(menu_id)
+        if state is not None:
+            state.remaining = left
+            state.quantity_date = day
+
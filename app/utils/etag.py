@@ -0,0 +1,45 @@
+import hashlib
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+def order_etag(order_id: int, version: int, table_name: Optional[str]) -> str:
+    """Order id, a digest of the joined table's name and the version last.
+
+    The table name is part of the body but can change (rename, or the table
+    being deleted) without touching the order's version.
+    """
+    table_tag = hashlib.blake2s((table_name or "").encode(), digest_size=4).hexdigest()
+    return f'"{order_id}-{table_tag}-{version}"'
+
+
+def parse_if_match(value: Optional[str], order_id: int) -> Optional[int]:
+    """Order version from an If-Match header; accepts an order ETag or a bare version number."""
+    if value is None or value.strip() == "*":
+        return None
+    tag = value.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    parts = tag.strip('"').split("-")
+    if len(parts) > 1 and parts[0] != str(order_id):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="If-Match does not refer to this order")
+    try:
+        return int(parts[-1])
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid If-Match header")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header (which may list several tags) against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
@@ -0,0 +1,118 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.models.order_model import OrderStatus
+
+
+OPEN_ORDER_STATUSES = (OrderStatus.pending, OrderStatus.accepted, OrderStatus.preparing, OrderStatus.ready)
+
+
+@dataclass
+class OpenOrder:
+    order_id: int
+    grand_total: Decimal
+    created_at: Optional[datetime]
+
+
+@dataclass
+class FloorTable:
+    table_id: int
+    table_name: str
+    capacity: int
+    table_type_id: Optional[int]
+    status: Optional[str]
+    open_orders: dict[int, OpenOrder] = field(default_factory=dict)
+
+
+@dataclass
+class FloorState:
+    restaurant_id: int
+    loaded_at: float
+    tables: dict[int, FloorTable] = field(default_factory=dict)
+    # order_id -> table_id, so a moved or closed order can be found without scanning every table
+    order_tables: dict[int, int] = field(default_factory=dict)
+
+
+# Per-restaurant occupancy built from one aggregate query and then kept current by
+# OrderService commits in this process. Writes from other workers show up once
+# the TTL forces a rebuild.
+FLOOR_STATES: dict[int, FloorState] = {}
+
+
+def get_floor_state(restaurant_id: int) -> Optional[FloorState]:
+    state = FLOOR_STATES.get(restaurant_id)
+    if state is None:
+        return None
+    if time.monotonic() - state.loaded_at > settings.FLOOR_STATE_TTL_SECONDS:
+        FLOOR_STATES.pop(restaurant_id, None)
+        return None
+    return state
+
+
+def store_floor_state(restaurant_id: int, rows: Iterable) -> FloorState:
+    state = FloorState(restaurant_id=restaurant_id, loaded_at=time.monotonic())
+    for row in rows:
+        table = FloorTable(
+            table_id=row.id,
+            table_name=row.table_name,
+            capacity=row.capacity,
+            table_type_id=row.table_type_id,
+            status=row.status,
+        )
+        for order_id, grand_total, created_at in zip(row.open_order_ids or (), row.open_order_totals or (), row.open_order_created or ()):
+            table.open_orders[order_id] = OpenOrder(order_id, Decimal(str(grand_total or 0)), created_at)
+            state.order_tables[order_id] = table.table_id
+        state.tables[table.table_id] = table
+    FLOOR_STATES[restaurant_id] = state
+    return state
+
+
+def invalidate_floor(restaurant_id: Optional[int]):
+    if restaurant_id is not None:
+        FLOOR_STATES.pop(restaurant_id, None)
+
+
+def apply_order(order):
+    """Move a committed order onto, between or off tables in its restaurant's floor state."""
+    state = FLOOR_STATES.get(order.restaurant_id)
+    if state is None:
+        return
+    previous_table_id = state.order_tables.pop(order.id, None)
+    if previous_table_id is not None and previous_table_id in state.tables:
+        state.tables[previous_table_id].open_orders.pop(order.id, None)
+    if order.table_id is None or order.status not in OPEN_ORDER_STATUSES:
+        return
+    table = state.tables.get(order.table_id)
+    if table is None:
+        # A table this state has never seen; rebuild on the next read
+        FLOOR_STATES.pop(order.restaurant_id, None)
+        return
+    table.open_orders[order.id] = OpenOrder(order.id, Decimal(str(order.grand_total or 0)), order.created_at)
+    state.order_tables[order.id] = table.table_id
+
+
+def describe_table(table: FloorTable, now: Optional[datetime] = None) -> dict:
+    orders = sorted(table.open_orders.values(), key=lambda o: o.order_id)
+    seated_since = min((o.created_at for o in orders if o.created_at is not None), default=None)
+    seated_minutes = None
+    if seated_since is not None:
+        current = now or datetime.now(timezone.utc)
+        if seated_since.tzinfo is None:
+            current = current.replace(tzinfo=None)
+        seated_minutes = max(int((current - seated_since).total_seconds() // 60), 0)
+    return {
+        "id": table.table_id,
+        "table_name": table.table_name,
+        "capacity": table.capacity,
+        "table_type_id": table.table_type_id,
+        "status": table.status,
+        "occupancy": "occupied" if orders else "free",
+        "open_order_ids": [o.order_id for o in orders],
+        "running_total": sum((o.grand_total for o in orders), Decimal("0")),
+        "seated_since": seated_since,
+        "seated_minutes": seated_minutes,
+    }
@@ -0,0 +1,131 @@
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.utils.image_upload import StagedUpload, commit_staged_upload, discard_staged_upload
+from app.utils.image_variants import remove_image_variants
+
+
+# Keep uploads under the app directory to align with the StaticFiles mount in main.py (local fallback)
+BASE_DIR = Path(__file__).resolve().parents[1]
+UPLOAD_DIR = BASE_DIR / "uploads" / "menu"
+
+
+class ImageStorage(ABC):
+    """Where menu images live. Blocking I/O never runs on the event loop."""
+
+    # Whether thumb/card/full variants can be rendered next to stored images
+    renders_variants = False
+
+    @abstractmethod
+    async def save(self, staged: StagedUpload, filename: str) -> str:
+        """Store a staged upload under filename and return the value kept in Menu.image."""
+
+    @abstractmethod
+    async def delete(self, path: str):
+        """Remove a stored image; a missing one is not an error."""
+
+
+class LocalImageStorage(ImageStorage):
+    renders_variants = True
+
+    async def save(self, staged: StagedUpload, filename: str) -> str:
+        await commit_staged_upload(staged, UPLOAD_DIR / filename)
+        return str(Path("uploads") / "menu" / filename)
+
+    async def delete(self, path: str):
+        await run_in_threadpool(self._delete, path)
+
+    @staticmethod
+    def _delete(path: str):
+        try:
+            os.remove((BASE_DIR / path).resolve())
+        except OSError:
+            pass
+        remove_image_variants(BASE_DIR, path)
+
+
+class S3ImageStorage(ImageStorage):
+    """S3 or any S3-compatible service (MinIO, LocalStack) via AWS_S3_ENDPOINT_URL.
+
+    One client is shared by every request; boto3 clients are thread safe and
+    pool their connections. Large files go up as multipart uploads.
+    """
+
+    def __init__(self):
+        try:
+            import boto3  # Lazy import so local-only setups don't require boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="boto3 not installed")
+
+        self.bucket = settings.AWS_S3_BUCKET
+        self.client = boto3.client(
+            "s3",
+            region_name=settings.AWS_S3_REGION,
+            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+            config=Config(max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.AWS_S3_MULTIPART_THRESHOLD_BYTES,
+            multipart_chunksize=settings.AWS_S3_MULTIPART_THRESHOLD_BYTES,
+        )
+
+    async def save(self, staged: StagedUpload, filename: str) -> str:
+        key = f"menu/{filename}"
+        try:
+            await run_in_threadpool(
+                self.client.upload_file,
+                str(staged.path),
+                self.bucket,
+                key,
+                ExtraArgs={"ContentType": staged.content_type, "ACL": "public-read"},
+                Config=self.transfer_config,
+            )
+        finally:
+            await discard_staged_upload(staged)
+        return self.public_url(key)
+
+    async def delete(self, path: str):
+        key = self.extract_key(path)
+        if not key:
+            return
+        try:
+            await run_in_threadpool(self.client.delete_object, Bucket=self.bucket, Key=key)
+        except Exception:
+            pass
+
+    def public_url(self, key: str) -> str:
+        if settings.AWS_S3_PUBLIC_URL_PREFIX:
+            return f"{settings.AWS_S3_PUBLIC_URL_PREFIX.rstrip('/')}/{key}"
+        if settings.AWS_S3_ENDPOINT_URL:
+            return f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{key}"
+        if settings.AWS_S3_REGION:
+            return f"https://{self.bucket}.s3.{settings.AWS_S3_REGION}.amazonaws.com/{key}"
+        return f"https://{self.bucket}.s3.amazonaws.com/{key}"
+
+    @staticmethod
+    def extract_key(path: str) -> Optional[str]:
+        # If already looks like a key (no scheme), return as-is
+        if not path.startswith("http"):
+            return path.lstrip("/")
+        parsed = urlparse(path)
+        return parsed.path.lstrip("/") if parsed.path else None
+
+
+_STORAGE: Optional[ImageStorage] = None
+
+
+def get_image_storage() -> ImageStorage:
+    """The process-wide backend selected by USE_S3_UPLOADS."""
+    global _STORAGE
+    if _STORAGE is None:
+        _STORAGE = S3ImageStorage() if settings.USE_S3_UPLOADS else LocalImageStorage()
+    return _STORAGE
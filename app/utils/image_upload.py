@@ -0,0 +1,126 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+# Leading bytes -> (content type, extension). The client's filename and
+# Content-Type header are not trusted.
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", ".png"),
+    (b"GIF87a", "image/gif", ".gif"),
+    (b"GIF89a", "image/gif", ".gif"),
+)
+
+# Enough leading bytes to recognise every format above, including WebP's RIFF header
+SNIFF_BYTES = 12
+
+
+@dataclass(frozen=True)
+class StagedUpload:
+    path: Path
+    content_type: str
+    extension: str
+    size: int
+    digest: str  # sha256 of the content; stored files are named after it
+
+
+def sniff_image_type(head: bytes) -> Optional[tuple[str, str]]:
+    for signature, content_type, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+def _discard(path: Path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_chunk(handle, hasher, chunk: bytes):
+    handle.write(chunk)
+    hasher.update(chunk)
+
+
+def _place(temp_path: Path, destination: Path):
+    if destination.exists():
+        # Same content is already stored under this name
+        _discard(temp_path)
+    else:
+        os.replace(temp_path, destination)
+
+
+async def stage_image_upload(upload: UploadFile, directory: Path) -> StagedUpload:
+    """Stream an upload into a temporary file inside `directory`, chunk by chunk.
+
+    File I/O runs in the thread pool so large uploads never block the event
+    loop. The size limit is enforced while streaming, the type is taken
+    from the file's magic bytes and the content is hashed on the way. The
+    caller moves the result into place with `commit_staged_upload` or drops
+    it with `discard_staged_upload`.
+    """
+    max_bytes = settings.MAX_IMAGE_UPLOAD_BYTES
+    if upload.size is not None and upload.size > max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="Image is too large")
+
+    await run_in_threadpool(directory.mkdir, parents=True, exist_ok=True)
+    # Same directory as the final file so the closing rename stays on one filesystem
+    fd, temp_name = await run_in_threadpool(tempfile.mkstemp, dir=directory, prefix=".upload-")
+    temp_path = Path(temp_name)
+    handle = os.fdopen(fd, "wb")
+    hasher = hashlib.sha256()
+    size = 0
+    detected = None
+    try:
+        while True:
+            chunk = await upload.read(settings.IMAGE_UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            if detected is None:
+                detected = sniff_image_type(chunk[:SNIFF_BYTES])
+                if detected is None:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="Image must be a JPEG, PNG, GIF or WebP file",
+                    )
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="Image is too large")
+            await run_in_threadpool(_write_chunk, handle, hasher, chunk)
+        if detected is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Image file is empty")
+        await run_in_threadpool(handle.close)
+    except BaseException:
+        await run_in_threadpool(handle.close)
+        await run_in_threadpool(_discard, temp_path)
+        raise
+
+    content_type, extension = detected
+    return StagedUpload(
+        path=temp_path,
+        content_type=content_type,
+        extension=extension,
+        size=size,
+        digest=hasher.hexdigest(),
+    )
+
+
+async def commit_staged_upload(staged: StagedUpload, destination: Path):
+    # os.replace is atomic, so readers see either no file or the complete one
+    await run_in_threadpool(_place, staged.path, destination)
+
+
+async def discard_staged_upload(staged: StagedUpload):
+    await run_in_threadpool(_discard, staged.path)
@@ -0,0 +1,79 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+
+# Variant name -> target width in pixels. Images narrower than the target are not upscaled.
+IMAGE_VARIANT_WIDTHS = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1280,
+}
+
+_VARIANT_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def variant_paths(image_path: str) -> dict[str, str]:
+    """Variant paths for a stored image, next to the original: menu/abc.png -> menu/abc_thumb.webp."""
+    source = Path(image_path)
+    return {name: str(source.with_name(f"{source.stem}_{name}.webp")) for name in IMAGE_VARIANT_WIDTHS}
+
+
+def _render_variants(source: str, targets: dict[str, tuple[int, str]]):
+    # Runs in a worker process; Pillow is only needed there
+    from PIL import Image, ImageOps
+
+    if all(os.path.exists(destination) for _, destination in targets.values()):
+        # Content-addressed: another item with the same image already has them
+        return
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        for width, destination in targets.values():
+            variant = image.copy()
+            if variant.width > width:
+                # thumbnail keeps the aspect ratio, so only the width bound matters
+                variant.thumbnail((width, variant.height), Image.LANCZOS)
+            temp = f"{destination}.{os.getpid()}.tmp"
+            variant.save(temp, format="WEBP", quality=80, method=4)
+            os.replace(temp, destination)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _VARIANT_POOL
+    if _VARIANT_POOL is None:
+        # Spawned rather than forked so workers do not inherit the event loop or open connections
+        _VARIANT_POOL = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _VARIANT_POOL
+
+
+async def render_image_variants(base_dir: Path, image_path: str) -> dict[str, str]:
+    """Render every variant of a locally stored image in the process pool and return their paths."""
+    paths = variant_paths(image_path)
+    targets = {name: (IMAGE_VARIANT_WIDTHS[name], str(base_dir / path)) for name, path in paths.items()}
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_get_pool(), _render_variants, str(base_dir / image_path), targets)
+    return paths
+
+
+def remove_image_variants(base_dir: Path, image_path: str):
+    for path in variant_paths(image_path).values():
+        try:
+            os.remove(base_dir / path)
+        except OSError:
+            pass
+
+
+def shutdown_variant_pool():
+    global _VARIANT_POOL
+    if _VARIANT_POOL is not None:
+        _VARIANT_POOL.shutdown(wait=False, cancel_futures=True)
+        _VARIANT_POOL = None
@@ -0,0 +1,147 @@
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.models.order_model import OrderChannel
+
+
+# Head start a ticket gets in the queue; takeaway is ready on a promise time, dine-in is not.
+# The sort key is age minus boost, so priority never starves older dine-in tickets for long.
+CHANNEL_BOOST_SECONDS = {
+    OrderChannel.quick_billing: 300,
+    OrderChannel.pickup: 240,
+    OrderChannel.delivery: 240,
+    OrderChannel.online: 180,
+    OrderChannel.table: 0,
+    OrderChannel.group: 0,
+}
+
+
+@dataclass
+class QueuedTicket:
+    ticket_id: int
+    station_id: int
+    order_id: int
+    channel: OrderChannel
+    table_name: Optional[str]
+    items: list
+    status: str
+    created_at: datetime
+    fired_at: Optional[datetime] = None
+
+    @property
+    def id(self) -> int:
+        return self.ticket_id
+
+    @property
+    def sort_key(self) -> tuple[float, int]:
+        created = self.created_at if self.created_at.tzinfo else self.created_at.replace(tzinfo=timezone.utc)
+        return created.timestamp() - CHANNEL_BOOST_SECONDS.get(self.channel, 0), self.ticket_id
+
+
+class StationQueue:
+    """Open tickets of one station kept in priority order, so reading the first k is a slice."""
+
+    def __init__(self, station_id: int):
+        self.station_id = station_id
+        self.loaded_at = time.monotonic()
+        self._keys: list[tuple[float, int]] = []
+        self._tickets: dict[int, QueuedTicket] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def push(self, ticket: QueuedTicket):
+        self.discard(ticket.ticket_id)
+        self._tickets[ticket.ticket_id] = ticket
+        insort(self._keys, ticket.sort_key)
+
+    def discard(self, ticket_id: int) -> Optional[QueuedTicket]:
+        ticket = self._tickets.pop(ticket_id, None)
+        if ticket is not None:
+            key = ticket.sort_key
+            index = bisect_left(self._keys, key)
+            if index < len(self._keys) and self._keys[index] == key:
+                del self._keys[index]
+        return ticket
+
+    def get(self, ticket_id: int) -> Optional[QueuedTicket]:
+        return self._tickets.get(ticket_id)
+
+    def head(self, limit: int) -> list[QueuedTicket]:
+        return [self._tickets[ticket_id] for _, ticket_id in self._keys[:limit]]
+
+
+# station_id -> queue; order_id -> {(station_id, ticket_id)} so a canceled order leaves every station at once
+STATION_QUEUES: dict[int, StationQueue] = {}
+ORDER_TICKETS: dict[int, set[tuple[int, int]]] = {}
+
+
+def get_station_queue(station_id: int) -> Optional[StationQueue]:
+    queue = STATION_QUEUES.get(station_id)
+    if queue is None:
+        return None
+    if time.monotonic() - queue.loaded_at > settings.KITCHEN_QUEUE_TTL_SECONDS:
+        return None
+    return queue
+
+
+def load_station_queue(station_id: int, tickets: Iterable[QueuedTicket]) -> StationQueue:
+    old = STATION_QUEUES.get(station_id)
+    if old is not None:
+        for ticket in old.head(len(old)):
+            _forget(ticket)
+    queue = StationQueue(station_id)
+    for ticket in tickets:
+        queue.push(ticket)
+        ORDER_TICKETS.setdefault(ticket.order_id, set()).add((station_id, ticket.ticket_id))
+    STATION_QUEUES[station_id] = queue
+    return queue
+
+
+def rebuild(tickets: Iterable[QueuedTicket]):
+    """Replace every station queue with the given open tickets; used at startup."""
+    STATION_QUEUES.clear()
+    ORDER_TICKETS.clear()
+    by_station: dict[int, list[QueuedTicket]] = {}
+    for ticket in tickets:
+        by_station.setdefault(ticket.station_id, []).append(ticket)
+    for station_id, station_tickets in by_station.items():
+        load_station_queue(station_id, station_tickets)
+
+
+def push_ticket(ticket: QueuedTicket):
+    # Stations nobody has loaded yet pick the ticket up from the database on first read
+    queue = STATION_QUEUES.get(ticket.station_id)
+    if queue is None:
+        return
+    queue.push(ticket)
+    ORDER_TICKETS.setdefault(ticket.order_id, set()).add((ticket.station_id, ticket.ticket_id))
+
+
+def remove_ticket(station_id: int, ticket_id: int):
+    queue = STATION_QUEUES.get(station_id)
+    if queue is None:
+        return
+    ticket = queue.discard(ticket_id)
+    if ticket is not None:
+        _forget(ticket)
+
+
+def drop_order(order_id: int):
+    for station_id, ticket_id in ORDER_TICKETS.pop(order_id, set()):
+        queue = STATION_QUEUES.get(station_id)
+        if queue is not None:
+            queue.discard(ticket_id)
+
+
+def _forget(ticket: QueuedTicket):
+    refs = ORDER_TICKETS.get(ticket.order_id)
+    if refs is None:
+        return
+    refs.discard((ticket.station_id, ticket.ticket_id))
+    if not refs:
+        ORDER_TICKETS.pop(ticket.order_id, None)
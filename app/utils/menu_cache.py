@@ -0,0 +1,65 @@
+import gzip
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.catalog_cache import catalog_version
+
+try:
+    import brotli  # Optional; gzip alone is used when it is not installed
+except ImportError:
+    brotli = None
+
+
+@dataclass(frozen=True)
+class MenuCacheEntry:
+    version: int
+    etag: str
+    body: bytes
+    gzip_body: bytes
+    br_body: Optional[bytes]
+    stored_at: float
+
+
+# (restaurant_id, view, category_id) -> rendered public menu response.
+# Entries are keyed on the catalog version that menu and category writes bump;
+# the TTL covers writes made through other workers.
+MENU_RESPONSE_CACHE: dict[tuple[int, str, Optional[int]], MenuCacheEntry] = {}
+
+
+def get_menu_response(restaurant_id: int, view: str, category_id: Optional[int] = None) -> Optional[MenuCacheEntry]:
+    key = (restaurant_id, view, category_id)
+    entry = MENU_RESPONSE_CACHE.get(key)
+    if entry is None:
+        return None
+    if entry.version != catalog_version(restaurant_id) or time.monotonic() - entry.stored_at > settings.MENU_CACHE_TTL_SECONDS:
+        MENU_RESPONSE_CACHE.pop(key, None)
+        return None
+    return entry
+
+
+def store_menu_response(restaurant_id: int, view: str, category_id: Optional[int], version: int, body: bytes) -> MenuCacheEntry:
+    entry = MenuCacheEntry(
+        version=version,
+        # Content hash, so every worker hands out the same tag for the same menu
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        body=body,
+        gzip_body=gzip.compress(body, compresslevel=6),
+        br_body=brotli.compress(body) if brotli is not None else None,
+        stored_at=time.monotonic(),
+    )
+    # Same rule as the catalog snapshot: a write during rendering means this body is already stale
+    if version == catalog_version(restaurant_id):
+        MENU_RESPONSE_CACHE[(restaurant_id, view, category_id)] = entry
+    return entry
+
+
+def pick_encoding(entry: MenuCacheEntry, accept_encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+    accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if entry.br_body is not None and "br" in accepted:
+        return entry.br_body, "br"
+    if "gzip" in accepted:
+        return entry.gzip_body, "gzip"
+    return entry.body, None
@@ -0,0 +1,220 @@
+import heapq
+import re
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.utils.catalog_cache import catalog_version
+
+_TOKEN = re.compile(r"\w+")
+
+# Per-token weights: the dish name counts double the category name
+EXACT, PREFIX, FUZZY = 3, 2, 1
+NAME_WEIGHT, CATEGORY_WEIGHT = 2, 1
+# Extra score when the terms start the dish name in order ("chi mo" -> "Chilli Momo")
+NAME_PREFIX_BONUS = 5
+
+
+@dataclass(frozen=True)
+class MenuSearchItem:
+    id: int
+    name: str
+    price: float
+    image: Optional[str]
+    item_category_id: Optional[int]
+    category_name: Optional[str]
+
+
+def tokenize(value: Optional[str]) -> list[str]:
+    return _TOKEN.findall(value.lower()) if value else []
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """True when a and b differ by at most one insertion, deletion or substitution."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class MenuSearchIndex:
+    """Token index over one restaurant's menu items.
+
+    Tokens are kept in a sorted list, so every token sharing a prefix is a
+    contiguous slice found by bisection (the same lookup a trie gives). Posting
+    sets map each token to item ids, separately for item and category names.
+    """
+
+    def __init__(self, restaurant_id: int, version: int, categories: dict[int, str]):
+        self.restaurant_id = restaurant_id
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.categories = dict(categories)
+        self.items: dict[int, MenuSearchItem] = {}
+        self._item_tokens: dict[int, tuple[str, ...]] = {}
+        self._tokens: list[str] = []
+        self._names: dict[str, set[int]] = {}
+        self._category_names: dict[str, set[int]] = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def _add_posting(self, postings: dict[str, set[int]], token: str, item_id: int):
+        if token not in self._names and token not in self._category_names:
+            insort(self._tokens, token)
+        postings.setdefault(token, set()).add(item_id)
+
+    def _drop_posting(self, postings: dict[str, set[int]], token: str, item_id: int):
+        ids = postings.get(token)
+        if ids is None:
+            return
+        ids.discard(item_id)
+        if ids:
+            return
+        del postings[token]
+        if token not in self._names and token not in self._category_names:
+            position = bisect_left(self._tokens, token)
+            if position < len(self._tokens) and self._tokens[position] == token:
+                del self._tokens[position]
+
+    def upsert(self, item: MenuSearchItem):
+        self.remove(item.id)
+        self.items[item.id] = item
+        self._item_tokens[item.id] = tuple(tokenize(item.name))
+        for token in set(self._item_tokens[item.id]):
+            self._add_posting(self._names, token, item.id)
+        for token in set(tokenize(item.category_name)):
+            self._add_posting(self._category_names, token, item.id)
+
+    def remove(self, item_id: int):
+        item = self.items.pop(item_id, None)
+        if item is None:
+            return
+        for token in set(self._item_tokens.pop(item_id)):
+            self._drop_posting(self._names, token, item_id)
+        for token in set(tokenize(item.category_name)):
+            self._drop_posting(self._category_names, token, item_id)
+
+    def _matching_tokens(self, term: str) -> list[tuple[str, int]]:
+        start = bisect_left(self._tokens, term)
+        end = bisect_left(self._tokens, term + "\U0010ffff")
+        matches = [(token, EXACT if token == term else PREFIX) for token in self._tokens[start:end]]
+        if matches or len(term) < 3:
+            return matches
+        # No prefix hit: tolerate one typo among tokens that share the first letter
+        start = bisect_left(self._tokens, term[0])
+        end = bisect_left(self._tokens, term[0] + "\U0010ffff")
+        size = len(term)
+        return [
+            (token, FUZZY)
+            for token in self._tokens[start:end]
+            if any(within_one_edit(term, token[:length]) for length in (size - 1, size, size + 1))
+        ]
+
+    def search(self, query: str, limit: int) -> list[MenuSearchItem]:
+        """Items matching every query term (as a prefix, or within one typo), best first."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        totals: Optional[dict[int, int]] = None
+        for term in terms:
+            scores: dict[int, int] = {}
+            for token, quality in self._matching_tokens(term):
+                for item_id in self._names.get(token, ()):
+                    scores[item_id] = max(scores.get(item_id, 0), quality * NAME_WEIGHT)
+                for item_id in self._category_names.get(token, ()):
+                    scores[item_id] = max(scores.get(item_id, 0), quality * CATEGORY_WEIGHT)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {item_id: totals[item_id] + score for item_id, score in scores.items() if item_id in totals}
+            if not totals:
+                return []
+
+        ranked = []
+        for item_id, score in totals.items():
+            tokens = self._item_tokens[item_id]
+            if len(tokens) >= len(terms) and all(token.startswith(term) for token, term in zip(tokens, terms)):
+                score += NAME_PREFIX_BONUS
+            ranked.append((-score, len(tokens), item_id))
+        return [self.items[entry[2]] for entry in heapq.nsmallest(limit, ranked)]
+
+
+# Per-restaurant indexes tied to the catalog version, like catalog snapshots and menu responses.
+# MenuService writes patch the index in place; other catalog changes rebuild it on the next search.
+MENU_SEARCH_INDEXES: dict[int, MenuSearchIndex] = {}
+
+
+def get_search_index(restaurant_id: int) -> Optional[MenuSearchIndex]:
+    index = MENU_SEARCH_INDEXES.get(restaurant_id)
+    if index is None:
+        return None
+    if index.version != catalog_version(restaurant_id) or time.monotonic() - index.loaded_at > settings.MENU_SEARCH_TTL_SECONDS:
+        MENU_SEARCH_INDEXES.pop(restaurant_id, None)
+        return None
+    return index
+
+
+def store_search_index(
+    restaurant_id: int,
+    version: int,
+    categories: dict[int, str],
+    items: Iterable[MenuSearchItem],
+) -> MenuSearchIndex:
+    index = MenuSearchIndex(restaurant_id, version, categories)
+    for item in items:
+        index.upsert(item)
+    # A write that landed while the rows were loading makes this index stale; hand it back without caching
+    if version == catalog_version(restaurant_id):
+        MENU_SEARCH_INDEXES[restaurant_id] = index
+    return index
+
+
+def advance_search_index(restaurant_id: int, previous_version: int) -> Optional[MenuSearchIndex]:
+    """Carry the cached index over a catalog write that left it correct, or drop it.
+
+    Returns the index only if it was current just before the write that moved
+    the catalog off previous_version.
+    """
+    index = MENU_SEARCH_INDEXES.get(restaurant_id)
+    if index is None:
+        return None
+    if index.version != previous_version:
+        MENU_SEARCH_INDEXES.pop(restaurant_id, None)
+        return None
+    index.version = catalog_version(restaurant_id)
+    return index
+
+
+def index_menu_item(previous_version: int, menu):
+    index = advance_search_index(menu.restaurant_id, previous_version)
+    if index is None:
+        return
+    if menu.item_category_id is not None and menu.item_category_id not in index.categories:
+        # Unknown category: let the next search rebuild instead of guessing its name
+        MENU_SEARCH_INDEXES.pop(menu.restaurant_id, None)
+        return
+    index.upsert(
+        MenuSearchItem(
+            id=menu.id,
+            name=menu.name,
+            price=menu.price,
+            image=menu.image,
+            item_category_id=menu.item_category_id,
+            category_name=index.categories.get(menu.item_category_id),
+        )
+    )
+
+
+def unindex_menu_item(previous_version: int, restaurant_id: int, menu_id: int):
+    index = advance_search_index(restaurant_id, previous_version)
+    if index is not None:
+        index.remove(menu_id)
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Sequence
+
+# Column order shared by import and export, so an export can be edited and re-imported
+MENU_TRANSFER_COLUMNS = ("name", "price", "category", "description", "image")
+
+
+def parse_menu_csv(content: bytes) -> list[dict]:
+    text = content.decode("utf-8-sig")
+    return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+
+
+def parse_menu_json(content: bytes) -> list[dict]:
+    """A JSON array of items, or an object with an "items" array."""
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get("items")
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError("Expected a JSON array of menu items")
+    return data
+
+
+async def encode_menu_csv(partitions: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(MENU_TRANSFER_COLUMNS)
+    yield buffer.getvalue()
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            writer.writerow([row[name] for name in MENU_TRANSFER_COLUMNS])
+        yield buffer.getvalue()
+
+
+async def encode_menu_json(partitions: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """A JSON array written one batch at a time."""
+    yield "["
+    first = True
+    async for rows in partitions:
+        parts = []
+        for row in rows:
+            parts.append(json.dumps({name: row[name] for name in MENU_TRANSFER_COLUMNS}, separators=(",", ":")))
+        if parts:
+            yield ("" if first else ",") + ",".join(parts)
+            first = False
+    yield "]\n"
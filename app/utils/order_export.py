@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Sequence
+
+ORDER_EXPORT_COLUMNS = (
+    "order_id", "restaurant_id", "channel", "status", "table_name", "customer_name", "customer_phone",
+    "subtotal", "tax_total", "service_charge", "discount_total", "grand_total", "paid_total", "balance_due", "refunded_total",
+    "created_at", "completed_at", "canceled_at",
+)
+ITEM_EXPORT_COLUMNS = ("item_id", "menu_item_id", "item_name", "category_name", "unit_price", "qty", "line_total")
+PAYMENT_EXPORT_COLUMNS = ("payment_id", "payment_method", "payment_amount", "payment_status", "payment_reference")
+CSV_EXPORT_COLUMNS = ORDER_EXPORT_COLUMNS + ("record_type",) + ITEM_EXPORT_COLUMNS + PAYMENT_EXPORT_COLUMNS
+
+
+def _plain(value):
+    if value is None:
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):  # enums
+        return value.value
+    return value
+
+
+async def encode_csv(partitions: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """One CSV line per order line or payment, told apart by record_type; each fetched batch is written out as one chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            writer.writerow([_plain(row[name]) for name in CSV_EXPORT_COLUMNS])
+        yield buffer.getvalue()
+
+
+async def encode_ndjson(partitions: AsyncIterator[Sequence]) -> AsyncIterator[str]:
+    """One JSON object per order with its lines and payments nested.
+
+    Rows arrive ordered by order, so an order is emitted as soon as the next
+    one starts; only the order in progress is ever held in memory.
+    """
+    current = None
+    async for rows in partitions:
+        lines = []
+        for row in rows:
+            if current is None or current["order_id"] != row["order_id"]:
+                if current is not None:
+                    lines.append(json.dumps(current, default=str, separators=(",", ":")))
+                current = {name: _plain(row[name]) for name in ORDER_EXPORT_COLUMNS}
+                current["items"] = []
+                current["payments"] = []
+            if row["record_type"] == "payment":
+                current["payments"].append(
+                    {name.removeprefix("payment_"): _plain(row[name]) for name in PAYMENT_EXPORT_COLUMNS}
+                )
+            elif row["item_id"] is not None:
+                current["items"].append({name: _plain(row[name]) for name in ITEM_EXPORT_COLUMNS})
+        if lines:
+            yield "\n".join(lines) + "\n"
+    if current is not None:
+        yield json.dumps(current, default=str, separators=(",", ":")) + "\n"
@@ -0,0 +1,169 @@
+import asyncio
+import json
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, Optional
+
+from app.core.config import settings
+
+
+# OrderEvent.event -> delta type pushed to kitchen/floor screens
+DELTA_TYPES = {
+    "order_created": "created",
+    "status_changed": "status_changed",
+    "item_added": "item_added",
+    "order_canceled": "canceled",
+}
+
+
+def build_delta(restaurant_id: int, event) -> dict:
+    delta_type = DELTA_TYPES.get(event.event, "updated")
+    payload = event.payload or {}
+    if delta_type == "status_changed" and payload.get("status") == "canceled":
+        delta_type = "canceled"
+    return {
+        "id": event.id,
+        "type": delta_type,
+        "event": event.event,
+        "restaurant_id": restaurant_id,
+        "order_id": event.order_id,
+        "payload": payload,
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+def format_sse(delta: dict) -> str:
+    data = json.dumps(delta, default=str, separators=(",", ":"))
+    return f"id: {delta['id']}\nevent: {delta['type']}\ndata: {data}\n\n"
+
+
+class InMemoryBroker:
+    """Delivers published deltas straight to handlers in this process.
+
+    Stands in for an external broker; anything with the same
+    subscribe/publish shape can be passed to OrderFeedHub instead.
+    """
+
+    def __init__(self):
+        self._handlers: list[Callable[[dict], None]] = []
+
+    def subscribe(self, handler: Callable[[dict], None]):
+        self._handlers.append(handler)
+
+    async def publish(self, delta: dict):
+        for handler in self._handlers:
+            handler(delta)
+
+
+class FeedSubscription:
+    def __init__(self, restaurant_id: int, queue_size: int):
+        self.restaurant_id = restaurant_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+
+class OrderFeedHub:
+    """Fans order deltas out to per-restaurant subscribers.
+
+    Each subscriber has a bounded queue. A client that falls behind is
+    dropped and flagged instead of buffering without limit; it reconnects
+    with its last event id and resumes from the replay buffer.
+    """
+
+    def __init__(self, broker=None, buffer_size: int = 1000, queue_size: int = 256):
+        self.broker = broker or InMemoryBroker()
+        self.broker.subscribe(self._dispatch)
+        self.buffer_size = buffer_size
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[FeedSubscription]] = {}
+        self._recent: dict[int, deque] = {}
+
+    def subscribe(self, restaurant_id: int) -> FeedSubscription:
+        sub = FeedSubscription(restaurant_id, self.queue_size)
+        self._subscribers.setdefault(restaurant_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: FeedSubscription):
+        subs = self._subscribers.get(sub.restaurant_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            self._subscribers.pop(sub.restaurant_id, None)
+
+    def replay(self, restaurant_id: int, after_id: int) -> Optional[list[dict]]:
+        """Deltas published after after_id, or None if the buffer no longer holds it.
+
+        Ids come from a sequence assigned at flush, so concurrent writes can
+        publish out of id order; the buffer keeps publish order and everything
+        after the client's last seen delta is returned, whatever its id.
+        """
+        recent = self._recent.get(restaurant_id)
+        if not recent:
+            return None
+        for position, delta in enumerate(recent):
+            if delta["id"] == after_id:
+                return list(islice(recent, position + 1, None))
+        return None
+
+    async def publish(self, deltas: Iterable[dict]):
+        for delta in deltas:
+            await self.broker.publish(delta)
+
+    def _dispatch(self, delta: dict):
+        restaurant_id = delta["restaurant_id"]
+        self._recent.setdefault(restaurant_id, deque(maxlen=self.buffer_size)).append(delta)
+        for sub in list(self._subscribers.get(restaurant_id, ())):
+            try:
+                sub.queue.put_nowait(delta)
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                self.unsubscribe(sub)
+
+
+ORDER_FEED = OrderFeedHub(
+    buffer_size=settings.ORDER_FEED_BUFFER_SIZE,
+    queue_size=settings.ORDER_FEED_QUEUE_SIZE,
+)
+
+
+async def stream_feed(
+    hub: OrderFeedHub,
+    sub: FeedSubscription,
+    backlog: list[dict],
+    is_disconnected: Callable,
+    heartbeat_seconds: float,
+    truncated: bool = False,
+):
+    """Yield SSE frames: the backlog first, then live deltas until the client goes away.
+
+    Live deltas already sent in the backlog are skipped by id rather than by
+    a high-water mark, since a delta with a smaller id can arrive later.
+    """
+    pending = {delta["id"] for delta in backlog}
+    try:
+        for delta in backlog:
+            yield format_sse(delta)
+        if truncated:
+            # The backlog hit its limit; the client reconnects from the last id above for the rest
+            yield "event: resync\ndata: {}\n\n"
+            return
+        while True:
+            if sub.overflowed:
+                # Too slow to keep up; ask the client to reconnect with Last-Event-ID
+                yield "event: resync\ndata: {}\n\n"
+                return
+            try:
+                delta = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            if delta["id"] in pending:
+                # Each delta is queued once, so its id can be forgotten once skipped
+                pending.discard(delta["id"])
+                continue
+            yield format_sse(delta)
+    finally:
+        hub.unsubscribe(sub)
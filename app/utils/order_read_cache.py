@@ -0,0 +1,35 @@
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from app.core.config import settings
+
+
+# order_id -> (etag, stored_at, serialized OrderRead). Entries are only served
+# for the ETag the caller just derived from the database, so a write made by
+# another worker can never be answered from here; the TTL just bounds memory.
+ORDER_READ_CACHE: "OrderedDict[int, tuple[str, float, dict]]" = OrderedDict()
+
+
+def get_cached_order(order_id: int, etag: str) -> Optional[dict]:
+    entry = ORDER_READ_CACHE.get(order_id)
+    if entry is None:
+        return None
+    cached_etag, stored_at, data = entry
+    if cached_etag != etag or time.monotonic() - stored_at > settings.ORDER_READ_CACHE_TTL_SECONDS:
+        ORDER_READ_CACHE.pop(order_id, None)
+        return None
+    ORDER_READ_CACHE.move_to_end(order_id)
+    return data
+
+
+def store_cached_order(order_id: int, etag: str, data: dict):
+    ORDER_READ_CACHE[order_id] = (etag, time.monotonic(), data)
+    ORDER_READ_CACHE.move_to_end(order_id)
+    while len(ORDER_READ_CACHE) > settings.ORDER_READ_CACHE_MAX_ENTRIES:
+        ORDER_READ_CACHE.popitem(last=False)
+
+
+def invalidate_orders(order_ids: Iterable[int]):
+    for order_id in order_ids:
+        ORDER_READ_CACHE.pop(order_id, None)
@@ -0,0 +1,19 @@
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def normalize_name(value: Optional[str]) -> Optional[str]:
+    """Lowercase and collapse whitespace so names compare and index consistently."""
+    if value is None:
+        return None
+    normalized = " ".join(value.lower().split())
+    return normalized or None
+
+
+def phone_digits(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    digits = _NON_DIGITS.sub("", value)
+    return digits or None
@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import time
+from tempfile import SpooledTemporaryFile
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+from app.utils import image_upload
+from app.utils.image_upload import commit_staged_upload, discard_staged_upload, stage_image_upload
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+
+# Longest the event loop may go without running another task during an upload
+MAX_LOOP_STALL_SECONDS = 0.05
+# Simulated disk latency per chunk; any write done on the loop would show up as a stall this long
+SLOW_WRITE_SECONDS = 0.1
+
+
+def make_upload(content: bytes, size: int | None = None) -> UploadFile:
+    # Same spooling as Starlette's multipart parser, so multi-MB bodies are read from disk
+    spooled = SpooledTemporaryFile(max_size=1024 * 1024)
+    spooled.write(content)
+    spooled.seek(0)
+    return UploadFile(file=spooled, size=len(content) if size is None else size, filename="photo.png")
+
+
+def png_bytes(size: int) -> bytes:
+    return PNG_HEADER + b"\x00" * (size - len(PNG_HEADER))
+
+
+def leftovers(directory):
+    return sorted(path.name for path in directory.iterdir())
+
+
+async def measure_loop_stall(coro):
+    """Run coro while a probe task records the longest gap between its wake-ups."""
+    stalls = []
+    done = asyncio.Event()
+
+    async def probe():
+        interval = 0.001
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            stalls.append(time.perf_counter() - started - interval)
+
+    probe_task = asyncio.create_task(probe())
+    try:
+        result = await coro
+    finally:
+        done.set()
+        await probe_task
+    return result, max(stalls, default=0.0)
+
+
+def test_large_upload_does_not_stall_event_loop(tmp_path, monkeypatch):
+    content = png_bytes(4 * 1024 * 1024)
+    write_chunk = image_upload._write_chunk
+
+    def slow_write_chunk(handle, hasher, chunk):
+        time.sleep(SLOW_WRITE_SECONDS)
+        write_chunk(handle, hasher, chunk)
+
+    monkeypatch.setattr(image_upload, "_write_chunk", slow_write_chunk)
+    monkeypatch.setattr(settings, "IMAGE_UPLOAD_CHUNK_BYTES", 1024 * 1024)
+
+    staged, stall = asyncio.run(measure_loop_stall(stage_image_upload(make_upload(content), tmp_path)))
+
+    assert stall < MAX_LOOP_STALL_SECONDS
+    assert staged.size == len(content)
+    assert staged.content_type == "image/png"
+    assert staged.extension == ".png"
+    assert staged.digest == hashlib.sha256(content).hexdigest()
+    assert staged.path.read_bytes() == content
+
+
+def test_declared_size_over_limit_is_rejected_before_reading(tmp_path):
+    upload = make_upload(png_bytes(1024), size=settings.MAX_IMAGE_UPLOAD_BYTES + 1)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(stage_image_upload(upload, tmp_path))
+
+    assert exc.value.status_code == 413
+    assert not tmp_path.exists() or leftovers(tmp_path) == []
+
+
+def test_streamed_size_over_limit_is_rejected_and_cleaned_up(tmp_path):
+    # No declared size: the limit has to be enforced while streaming
+    upload = make_upload(png_bytes(settings.MAX_IMAGE_UPLOAD_BYTES + 1))
+    upload.size = None
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(stage_image_upload(upload, tmp_path))
+
+    assert exc.value.status_code == 413
+    assert leftovers(tmp_path) == []
+
+
+def test_unrecognised_content_is_rejected(tmp_path):
+    # The filename says PNG, the bytes do not
+    upload = make_upload(b"%PDF-1.7\n" + b"\x00" * 1024)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(stage_image_upload(upload, tmp_path))
+
+    assert exc.value.status_code == 415
+    assert leftovers(tmp_path) == []
+
+
+def test_empty_upload_is_rejected(tmp_path):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(stage_image_upload(make_upload(b""), tmp_path))
+
+    assert exc.value.status_code == 400
+    assert leftovers(tmp_path) == []
+
+
+def test_commit_places_file_atomically(tmp_path):
+    content = png_bytes(256 * 1024)
+    destination = tmp_path / "image.png"
+
+    async def stage_and_commit():
+        staged = await stage_image_upload(make_upload(content), tmp_path)
+        # Only the hidden temporary file exists until the commit renames it
+        assert not destination.exists()
+        assert leftovers(tmp_path) == [staged.path.name]
+        await commit_staged_upload(staged, destination)
+        return staged
+
+    staged = asyncio.run(stage_and_commit())
+
+    assert destination.read_bytes() == content
+    assert not staged.path.exists()
+    assert leftovers(tmp_path) == ["image.png"]
+
+
+def test_commit_keeps_existing_file_with_same_content(tmp_path):
+    content = png_bytes(1024)
+    destination = tmp_path / "image.png"
+    destination.write_bytes(content)
+    before = destination.stat().st_mtime_ns
+
+    async def stage_and_commit():
+        staged = await stage_image_upload(make_upload(content), tmp_path)
+        await commit_staged_upload(staged, destination)
+
+    asyncio.run(stage_and_commit())
+
+    assert destination.stat().st_mtime_ns == before
+    assert leftovers(tmp_path) == ["image.png"]
+
+
+def test_discard_removes_staged_file(tmp_path):
+    async def stage_and_discard():
+        staged = await stage_image_upload(make_upload(png_bytes(1024)), tmp_path)
+        await discard_staged_upload(staged)
+
+    asyncio.run(stage_and_discard())
+
+    assert leftovers(tmp_path) == []